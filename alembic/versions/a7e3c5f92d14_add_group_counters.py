@@ -0,0 +1,39 @@
+"""add_group_counters
+
+Revision ID: a7e3c5f92d14
+Revises: f2d6b8e41a93
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3c5f92d14'
+down_revision: Union[str, None] = 'f2d6b8e41a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('groups', sa.Column('member_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('groups', sa.Column('message_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the source tables (same counts as app.db.group_counters.reconcile_group_counters)
+    op.execute(
+        "UPDATE groups SET "
+        "member_count = (SELECT count(*) FROM group_members gm "
+        "WHERE gm.group_id = groups.group_id AND gm.status = 'active'), "
+        "message_count = (SELECT count(*) FROM group_message m "
+        "WHERE m.group_id = groups.group_id AND m.is_deleted = false)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('groups', 'message_count')
+    op.drop_column('groups', 'member_count')
@@ -0,0 +1,76 @@
+"""add_comment_path
+
+Revision ID: b8d4f1e6a273
+Revises: a7e3c5f92d14
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Optional, Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4f1e6a273'
+down_revision: Union[str, None] = 'a7e3c5f92d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+path_type = sa.Text().with_variant(sa.Text(collation='C'), 'postgresql')
+
+
+def _comment_path(comment_id: uuid.UUID, parent_path: Optional[str] = None) -> str:
+    """Frozen copy of app.db.models.comment.comment_path as of this revision"""
+    return (parent_path or "") + comment_id.hex
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('comments', sa.Column('path', path_type, nullable=True))
+
+    # Backfill with the same path the application writes: ancestors' hex ids, then the comment's own
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "WITH RECURSIVE tree AS ("
+            " SELECT comment_id, replace(comment_id::text, '-', '') AS path"
+            " FROM comments WHERE parent_comment_id IS NULL"
+            " UNION ALL"
+            " SELECT c.comment_id, tree.path || replace(c.comment_id::text, '-', '')"
+            " FROM comments c JOIN tree ON c.parent_comment_id = tree.comment_id"
+            ") "
+            "UPDATE comments SET path = tree.path FROM tree WHERE comments.comment_id = tree.comment_id"
+        )
+    else:
+        rows = bind.execute(sa.text("SELECT comment_id, parent_comment_id FROM comments")).fetchall()
+        children = {}
+        for comment_id, parent_comment_id in rows:
+            children.setdefault(parent_comment_id, []).append(comment_id)
+        # Level by level from the top-level comments
+        level, paths = [(comment_id, None) for comment_id in children.get(None, [])], {}
+        while level:
+            next_level = []
+            for comment_id, parent_path in level:
+                path = _comment_path(uuid.UUID(str(comment_id)), parent_path)
+                paths[comment_id] = path
+                next_level.extend((child_id, path) for child_id in children.get(comment_id, []))
+            level = next_level
+        if paths:
+            bind.execute(
+                sa.text("UPDATE comments SET path = :path WHERE comment_id = :comment_id"),
+                [{"path": path, "comment_id": comment_id} for comment_id, path in paths.items()]
+            )
+
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.alter_column('path', existing_type=path_type, nullable=False)
+
+    # Subtree / thread range scans
+    op.create_index('ix_comments_path', 'comments', ['path'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_path', table_name='comments')
+    op.drop_column('comments', 'path')
@@ -0,0 +1,33 @@
+"""add_post_keyset_pagination_indexes
+
+Revision ID: c1a7e3f90b21
+Revises: ab591eea608f
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1a7e3f90b21'
+down_revision: Union[str, None] = 'ab591eea608f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Composite indexes backing cursor pagination on (created_at, post_id) DESC
+    op.create_index('ix_post_created_at_post_id', 'post', ['created_at', 'post_id'], unique=False)
+    op.create_index('ix_post_status_created_at_post_id', 'post', ['status', 'created_at', 'post_id'], unique=False)
+    op.create_index('ix_post_created_by_created_at_post_id', 'post', ['created_by', 'created_at', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_post_created_by_created_at_post_id', table_name='post')
+    op.drop_index('ix_post_status_created_at_post_id', table_name='post')
+    op.drop_index('ix_post_created_at_post_id', table_name='post')
@@ -0,0 +1,48 @@
+"""add_email_job_table
+
+Revision ID: c3f7a2d95e48
+Revises: b8d4f1e6a273
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f7a2d95e48'
+down_revision: Union[str, None] = 'b8d4f1e6a273'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+email_job_status = sa.Enum('pending', 'sending', 'sent', 'dead', name='emailjobstatusenum')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'email_job',
+        sa.Column('job_id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column('recipient', sa.String(), nullable=False),
+        sa.Column('subject', sa.String(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('subtype', sa.String(), nullable=False, server_default='html'),
+        sa.Column('status', email_job_status, nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True)
+    )
+    # Due jobs for the outbox workers
+    op.create_index('ix_email_job_status_next_attempt_at', 'email_job', ['status', 'next_attempt_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_job_status_next_attempt_at', table_name='email_job')
+    op.drop_table('email_job')
+    email_job_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,74 @@
+"""add_token_hash_and_sweep_indexes
+
+Revision ID: d9e1b6c47f30
+Revises: c3f7a2d95e48
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e1b6c47f30'
+down_revision: Union[str, None] = 'c3f7a2d95e48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _token_hash(token: str) -> str:
+    """Frozen copy of app.db.models.token.token_hash_for as of this revision"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('token', sa.Column('token_hash', sa.String(length=64), nullable=True))
+
+    # Backfill with the same hex SHA-256 the application writes, then keep only the newest
+    # row per hash (tokens issued in the same second were identical before they got a jti)
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("UPDATE token SET token_hash = encode(sha256(convert_to(access_token, 'UTF8')), 'hex')")
+        op.execute(
+            "DELETE FROM token a USING token b "
+            "WHERE a.token_hash = b.token_hash AND (a.created_at, a.token_id::text) < (b.created_at, b.token_id::text)"
+        )
+    else:
+        rows = bind.execute(sa.text("SELECT token_id, access_token FROM token ORDER BY created_at DESC")).fetchall()
+        seen, duplicates, hashes = set(), [], []
+        for token_id, access_token in rows:
+            token_hash = _token_hash(access_token)
+            if token_hash in seen:
+                duplicates.append({"token_id": token_id})
+                continue
+            seen.add(token_hash)
+            hashes.append({"token_hash": token_hash, "token_id": token_id})
+        # One executemany per statement instead of a statement per row
+        if duplicates:
+            bind.execute(sa.text("DELETE FROM token WHERE token_id = :token_id"), duplicates)
+        if hashes:
+            bind.execute(sa.text("UPDATE token SET token_hash = :token_hash WHERE token_id = :token_id"), hashes)
+
+    with op.batch_alter_table('token') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=64), nullable=False)
+
+    # Token lookups by hash instead of the raw JWT
+    op.create_index('ix_token_token_hash', 'token', ['token_hash'], unique=True)
+    # Sweeper: expired rows, then deactivated ones
+    op.create_index('ix_token_expires_at', 'token', ['expires_at'])
+    op.create_index(
+        'ix_token_inactive_created_at', 'token', ['created_at'],
+        postgresql_where=sa.text("is_active = false"), sqlite_where=sa.text("is_active = 0")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_token_inactive_created_at', table_name='token')
+    op.drop_index('ix_token_expires_at', table_name='token')
+    op.drop_index('ix_token_token_hash', table_name='token')
+    op.drop_column('token', 'token_hash')
@@ -0,0 +1,77 @@
+"""add_chat_message_indexes
+
+Revision ID: e5c9a7d3b812
+Revises: d4b8f2a61c07
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c9a7d3b812'
+down_revision: Union[str, None] = 'd4b8f2a61c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _conversation_key(user_a, user_b) -> str:
+    """Frozen copy of app.db.models.message.conversation_key_for as of this revision.
+
+    Ids are parsed first: raw SQL on SQLite returns them as 32-digit hex, the ORM as UUIDs.
+    """
+    low, high = sorted((str(uuid.UUID(str(user_a))), str(uuid.UUID(str(user_b)))))
+    return f"{low}:{high}"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('message', sa.Column('conversation_key', sa.String(length=73), nullable=True))
+
+    # Backfill with the same "<lower uuid>:<higher uuid>" key the application writes
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "UPDATE message SET conversation_key = "
+            "LEAST(sender_id::text, receiver_id::text) || ':' || GREATEST(sender_id::text, receiver_id::text)"
+        )
+    else:
+        rows = bind.execute(sa.text("SELECT message_id, sender_id, receiver_id FROM message")).fetchall()
+        keys = [
+            {"key": _conversation_key(sender_id, receiver_id), "message_id": message_id}
+            for message_id, sender_id, receiver_id in rows
+        ]
+        if keys:
+            bind.execute(sa.text("UPDATE message SET conversation_key = :key WHERE message_id = :message_id"), keys)
+
+    with op.batch_alter_table('message') as batch_op:
+        batch_op.alter_column('conversation_key', existing_type=sa.String(length=73), nullable=False)
+
+    # DM history / search: one range scan per conversation
+    op.create_index(
+        'ix_message_conversation_key_created_at', 'message', ['conversation_key', 'created_at'],
+        postgresql_where=sa.text("is_deleted = false"), sqlite_where=sa.text("is_deleted = 0")
+    )
+    # Unread count and mark-read watermark
+    op.create_index(
+        'ix_message_unread_receiver_sender_created_at', 'message', ['receiver_id', 'sender_id', 'created_at'],
+        postgresql_where=sa.text("status <> 'read' AND is_deleted = false"),
+        sqlite_where=sa.text("status <> 'read' AND is_deleted = 0")
+    )
+    # Group history
+    op.create_index(
+        'ix_group_message_group_id_created_at', 'group_message', ['group_id', 'created_at'],
+        postgresql_where=sa.text("is_deleted = false"), sqlite_where=sa.text("is_deleted = 0")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_group_message_group_id_created_at', table_name='group_message')
+    op.drop_index('ix_message_unread_receiver_sender_created_at', table_name='message')
+    op.drop_index('ix_message_conversation_key_created_at', table_name='message')
+    op.drop_column('message', 'conversation_key')
@@ -0,0 +1,49 @@
+"""add_foreign_key_and_filter_indexes
+
+Revision ID: f2d6b8e41a93
+Revises: e5c9a7d3b812
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d6b8e41a93'
+down_revision: Union[str, None] = 'e5c9a7d3b812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns); post(status, ...) and post(created_by, ...) already exist
+INDEXES = [
+    ('ix_comments_post_id_created_at', 'comments', ['post_id', 'created_at']),
+    ('ix_comments_parent_comment_id', 'comments', ['parent_comment_id']),
+    ('ix_comments_account_id', 'comments', ['account_id']),
+    ('ix_post_tag_tag_id_post_id', 'post_tag', ['tag_id', 'post_id']),
+    ('ix_post_topic_topic_id_post_id', 'post_topic', ['topic_id', 'post_id']),
+    ('ix_favourite_posts_post_id', 'favourite_posts', ['post_id']),
+    ('ix_favourites_account_id', 'favourites', ['account_id']),
+    ('ix_group_members_group_id_status_account_id', 'group_members', ['group_id', 'status', 'account_id']),
+    ('ix_group_members_account_id_status', 'group_members', ['account_id', 'status']),
+    ('ix_token_account_id_is_active', 'token', ['account_id', 'is_active']),
+    ('ix_step_post_id_order_number', 'step', ['post_id', 'order_number']),
+    ('ix_post_image_post_id', 'post_image', ['post_id']),
+    ('ix_post_material_material_id', 'post_material', ['material_id']),
+    ('ix_friend_receiver_id_status', 'friend', ['receiver_id', 'status']),
+    ('ix_groups_topic_id_is_chat_group', 'groups', ['topic_id', 'is_chat_group']),
+    ('ix_groups_group_leader', 'groups', ['group_leader']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
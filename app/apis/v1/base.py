@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.apis.v1.endpoints import roles, accounts, auth, tags, materials, topics, posts, units, groups, group_members, comments, favourites, friend, feedback, feedback_types, chat, group_chat,report
+from app.apis.v1.endpoints import roles, accounts, auth, tags, materials, topics, posts, units, groups, group_members, comments, favourites, friend, feedback, feedback_types, chat, group_chat,report, system
 
 
 api_router = APIRouter()
@@ -21,3 +21,4 @@ api_router.include_router(feedback_types.router, prefix="/feedback-types", tags=
 api_router.include_router(chat.router, prefix="/chat", tags=["Chat"])
 api_router.include_router(group_chat.router, prefix="/group-chat", tags=["Group Chat"])
 api_router.include_router(report.router, prefix="/report", tags=["Report"])
+api_router.include_router(system.router, prefix="/system", tags=["System"])
@@ -6,6 +6,7 @@ from app.services.account_service import search_accounts_by_name, confirm_email,
 from app.core.deps import get_db, get_current_active_account
 from app.db.models.account import Account, AccountStatusEnum
 from app.services import account_service
+from app.services.token_service import TokenService
 from app.apis.v1.endpoints.check_role import check_roles
 from fastapi.responses import RedirectResponse
 from app.core import settings
@@ -66,9 +67,9 @@ def check_reset_token(token: str = Query(...)):
             return RedirectResponse(url=redirect_url)
         
         # Check token in database
-        from app.db.models.token import Token
+        from app.db.models.token import Token, token_hash_for
         token_record = db.query(Token).filter(
-            Token.access_token == token,
+            Token.token_hash == token_hash_for(token),
             Token.is_active == True,
             Token.token_type == "reset_password"
         ).first()
@@ -142,9 +143,9 @@ def submit_reset_password(token: str, new_password: str, confirm_password: str):
             )
         
         # Check token in database
-        from app.db.models.token import Token
+        from app.db.models.token import Token, token_hash_for
         token_record = db.query(Token).filter(
-            Token.access_token == token,
+            Token.token_hash == token_hash_for(token),
             Token.is_active == True,
             Token.token_type == "reset_password",
             Token.account_id == account.account_id
@@ -171,14 +172,8 @@ def submit_reset_password(token: str, new_password: str, confirm_password: str):
         # Deactivate reset token
         token_record.is_active = False
         
-        # Optional: Logout from all devices
-        db.query(Token).filter(
-            Token.account_id == account.account_id,
-            Token.is_active == True,
-            Token.token_type.in_(["access", "refresh"])
-        ).update({"is_active": False})
-        
-        db.commit()
+        # Optional: Logout from all devices (commits the new password too)
+        TokenService.revoke_all_user_tokens(db, account.account_id, token_types=["access", "refresh"])
         
         return {
             "message": "Password reset successfully",
@@ -264,9 +259,10 @@ async def resend_confirmation_email(username: str, db: Session = Depends(get_db_
                 detail="Email already verified"
             )
         
-        # Try to send confirmation email
+        # Queue the confirmation email
         try:
-            await send_confirmation_email(account.email, account.username)
+            send_confirmation_email(db, account.email, account.username)
+            db.commit()
             return {"message": "Confirmation email sent successfully"}
         except Exception as email_error:
             raise HTTPException(
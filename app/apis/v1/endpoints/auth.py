@@ -6,12 +6,14 @@ from fastapi.responses import RedirectResponse
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from starlette import status
-from passlib.context import CryptContext
 from jose import jwt, JWTError
+import uuid
 
 from app.core.settings import settings
+from app.core.security import get_password_hash_async, verify_and_update_password_async
 from app.schemas.token import Token, TokenData
 from app.services.token_service import TokenService
+from app.core.token_revocation import token_revocation_list
 from app.core.deps import get_db
 from app.db.models.account import Account, AccountStatusEnum
 from app.services.email_service import send_reset_password_email
@@ -26,8 +28,6 @@ router = APIRouter()
 JWT_SECRET_KEY = settings.JWT_SECRET_KEY
 JWT_ALGORITHM = settings.JWT_ALGORITHM
 
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
-
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="auth/access-token",
     scopes={
@@ -36,21 +36,20 @@ oauth2_scheme = OAuth2PasswordBearer(
     }
 )
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    return bcrypt_context.hash(password)
-
-def authenticate_account(db: Session, username_or_email: str, password: str):
+async def authenticate_account(db: Session, username_or_email: str, password: str):
     account = db.query(Account).filter(
         (Account.username == username_or_email) | (Account.email == username_or_email)
     ).first()
 
     if not account:
         return None, "Incorrect username/email or password"
-    if not verify_password(password, account.password_hash):
+    verified, new_hash = await verify_and_update_password_async(password, account.password_hash)
+    if not verified:
         return None, "Incorrect username/email or password"
+    if new_hash:
+        # Hashed with an older BCRYPT_ROUNDS; upgrade it while we have the password
+        account.password_hash = new_hash
+        db.commit()
     if account.status != AccountStatusEnum.active:
         return None, "Account is not active. Please confirm your email first."
     return account, None
@@ -64,7 +63,8 @@ def create_access_token(user: Account, scopes: Optional[list] = None) -> str:
         "user_id": str(user.account_id),
         "role": user.role.role_name,
         "exp": expire,
-        "scopes": scopes if scopes is not None else []
+        "scopes": scopes if scopes is not None else [],
+        "jti": uuid.uuid4().hex  # unique even for two logins in the same second (token_hash is unique)
     }
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
     return encoded_jwt
@@ -86,8 +86,7 @@ async def get_current_user(
     )
 
     try:
-        token_record = TokenService.get_active_token(db, token)
-        if not token_record:
+        if not token_revocation_list.is_allowed(db, token):
             raise credentials_exception
 
         payload = TokenService.verify_token(token)
@@ -125,7 +124,7 @@ async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Session = Depends(get_db)
 ):
-    user, error_message = authenticate_account(db, form_data.username, form_data.password)
+    user, error_message = await authenticate_account(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -178,20 +177,29 @@ async def refresh_token(
                 detail="User not found or inactive"
             )
 
-        new_access_token_payload = {
+        # The signature alone is not enough: the session must not have been logged out, replaced or revoked
+        if TokenService.get_active_refresh_session(db, user.account_id, refresh_token_str) is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked"
+            )
+
+        new_refresh_token_payload = {
             "sub": user.username,
             "user_id": str(user.account_id),
             "role": user.role.role_name,
             "scopes": payload.get("scopes", [])
         }
-        new_access_token = create_access_token(user, scopes=new_access_token_payload["scopes"])
+        new_access_token = create_access_token(user, scopes=new_refresh_token_payload["scopes"])
+        # Rotate: the new record replaces the old session, so the old refresh token stops working
+        new_refresh_token = TokenService.create_refresh_token(new_refresh_token_payload)
 
-        TokenService.create_token_record(db, user, new_access_token)
+        TokenService.create_token_record(db, user, new_access_token, new_refresh_token)
 
         return {
             "access_token": new_access_token,
             "token_type": "bearer",
-            "refresh_token": refresh_token_str
+            "refresh_token": new_refresh_token
         }
     except JWTError:
         raise HTTPException(
@@ -252,15 +260,16 @@ async def forgot_password(
     token_data = {
         "sub": account.username,
         "exp": expires_at,
-        "token_type": "reset_password"
+        "token_type": "reset_password",
+        "jti": uuid.uuid4().hex
     }
     import jwt
     reset_token = jwt.encode(token_data, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    # Gửi email (queued, committed together with the token record below)
+    from app.services.email_service import send_reset_password_email
+    send_reset_password_email(db, account.email, account.username, reset_token)
     # Lưu token vào DB
     TokenService.create_reset_password_token_record(db, account, reset_token, expires_at)
-    # Gửi email
-    from app.services.email_service import send_reset_password_email
-    await send_reset_password_email(account.email, account.username, reset_token)
     return {
         "message": "Hướng dẫn đặt lại mật khẩu đã được gửi đến email của bạn",
         "method": "email",
@@ -305,9 +314,9 @@ async def reset_password(
                 status_code=404,
                 detail="Account not found"
             )
-        from app.db.models.token import Token
+        from app.db.models.token import Token, token_hash_for
         token_record = db.query(Token).filter(
-            Token.access_token == request.token,
+            Token.token_hash == token_hash_for(request.token),
             Token.is_active == True,
             Token.token_type == "reset_password",
             Token.account_id == account.account_id
@@ -328,14 +337,10 @@ async def reset_password(
                 detail="Token has expired"
             )
         print("[DEBUG] Updating password...")
-        account.password_hash = get_password_hash(request.new_password)
+        account.password_hash = await get_password_hash_async(request.new_password)
         token_record.is_active = False
-        db.query(Token).filter(
-            Token.account_id == account.account_id,
-            Token.is_active == True,
-            Token.token_type.in_(["access", "refresh"])
-        ).update({"is_active": False})
-        db.commit()
+        # Commits the new password too, then revokes the cached sessions on every worker
+        TokenService.revoke_all_user_tokens(db, account.account_id, token_types=["access", "refresh"])
         print("[DEBUG] Password reset successful")
         return {
             "message": "Password reset successfully",
@@ -387,7 +392,7 @@ async def reset_password_otp(
     #         detail="Invalid or expired OTP"
     #     )
 
-    account.password_hash = get_password_hash(request.new_password)
+    account.password_hash = await get_password_hash_async(request.new_password)
     db.commit()
 
     return {
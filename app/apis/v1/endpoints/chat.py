@@ -2,21 +2,25 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPExce
 from sqlalchemy.orm import Session
 from uuid import UUID
 from typing import Optional
+from datetime import datetime
 import json
 import logging
-import asyncio
 
 from app.db.models.account import Account
+from app.db.database import run_db
 from app.core.deps import get_db
 from app.core.websocket_deps import get_current_user_websocket
-from app.core.websocket_manager import manager
-from app.schemas.message import MessageCreate, MessageOut, MessageList, ChatHistoryRequest
+from app.core.websocket_manager import ClientConnection, manager
+from app.schemas.message import MessageCreate, MessageOut, MessageList, ChatHistoryRequest, ConversationSummaryList, ReadWatermarkOut
 from app.schemas.common import AccountSummary
 from app.services.message_service import (
     send_message, get_chat_history, mark_message_as_read, 
-    delete_message, get_unread_message_count, update_user_friends_in_manager, search_chat_messages
+    delete_message, get_unread_message_count, search_chat_messages, get_conversation_summaries,
+    mark_conversation_read
 )
-from app.services.friend_service import get_friends
+from app.services.friend_service import get_friends, get_friend_ids
+from app.services.group_chat_service import get_active_chat_group_ids
+from app.apis.v1.endpoints.group_chat import handle_send_group_message, handle_group_typing_indicator
 from app.schemas.account import RoleNameEnum
 from app.apis.v1.endpoints.check_role import check_roles
 
@@ -26,35 +30,36 @@ logger = logging.getLogger(__name__)
 # WebSocket endpoint for real-time chat
 @router.websocket("/ws/chat")
 async def websocket_chat_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time chat"""
+    """WebSocket endpoint for real-time chat.
+
+    Deprecated: clients should move to the multiplexed /chat/ws endpoint, which carries DMs and
+    group chats over one socket. The frames sent here are unchanged, so clients can switch
+    one socket at a time.
+    """
     try:
         # Authenticate user
         current_user = await get_current_user_websocket(websocket)
         
-        # Connect to WebSocket
-        await manager.connect(websocket, current_user.account_id)
+        # Connect to WebSocket; group broadcasts go to the group sockets, not this one
+        connection = await manager.connect(websocket, current_user.account_id, auto_subscribe=False)
         
         # Update user's friends list in manager
-        db = SessionLocal()
-        try:
-            update_user_friends_in_manager(db, current_user.account_id)
-            
-            # Send connection confirmation
-            await websocket.send_text(json.dumps({
-                "type": "connection_established",
-                "user_id": str(current_user.account_id),
-                "message": "Connected to chat server"
-            }))
-            
-            # Send online friends list
-            online_friends = manager.get_online_friends(current_user.account_id)
-            await websocket.send_text(json.dumps({
-                "type": "online_friends",
-                "friends": [str(friend_id) for friend_id in online_friends]
-            }))
-            
-        finally:
-            db.close()
+        friend_ids = await run_db(get_friend_ids, current_user.account_id)
+        manager.update_user_friends(current_user.account_id, friend_ids)
+        
+        # Send connection confirmation
+        connection.send_message({
+            "type": "connection_established",
+            "user_id": str(current_user.account_id),
+            "message": "Connected to chat server"
+        })
+        
+        # Send online friends list
+        online_friends = manager.get_online_friends(current_user.account_id)
+        connection.send_message({
+            "type": "online_friends",
+            "friends": [str(friend_id) for friend_id in online_friends]
+        })
         
         # Handle incoming messages
         while True:
@@ -64,7 +69,7 @@ async def websocket_chat_endpoint(websocket: WebSocket):
                 
                 if message_data.get("type") == "send_message":
                     # Handle sending a message
-                    await handle_send_message(message_data, current_user.account_id)
+                    await handle_send_message(message_data, current_user.account_id, connection)
                     
                 elif message_data.get("type") == "mark_read":
                     # Handle marking message as read
@@ -75,27 +80,29 @@ async def websocket_chat_endpoint(websocket: WebSocket):
                     await handle_typing_indicator(message_data, current_user.account_id)
                     
             except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({
+                connection.send_message({
                     "type": "error",
                     "message": "Invalid JSON format"
-                }))
+                })
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
                 logger.error(f"Error handling WebSocket message: {e}")
-                await websocket.send_text(json.dumps({
+                connection.send_message({
                     "type": "error",
                     "message": "Internal server error"
-                }))
+                })
                 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for user {current_user.account_id if 'current_user' in locals() else 'unknown'}")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        if 'current_user' in locals():
-            manager.disconnect(current_user.account_id)
+        if 'connection' in locals():
+            manager.disconnect(connection)
 
-async def handle_send_message(message_data: dict, sender_id: UUID):
-    """Handle sending a message via WebSocket"""
+async def handle_send_message(message_data: dict, sender_id: UUID, connection: ClientConnection):
+    """Handle sending a message via WebSocket; the ack or error goes to the sending socket only"""
     try:
         receiver_id = UUID(message_data.get("receiver_id"))
         content = message_data.get("content", "").strip()
@@ -110,45 +117,44 @@ async def handle_send_message(message_data: dict, sender_id: UUID):
         )
         
         # Send message
-        db = SessionLocal()
-        try:
-            message = await send_message(db, msg_data, sender_id)
-            
-            # Send confirmation back to sender
-            await manager.send_personal_message({
-                "type": "message_sent",
-                "message_id": str(message.message_id),
-                "status": "sent"
-            }, sender_id)
-            
-        finally:
-            db.close()
+        message = await run_db(send_message, msg_data, sender_id)
+        
+        # Send confirmation back to the socket that sent it
+        connection.send_message({
+            "type": "message_sent",
+            "message_id": str(message.message_id),
+            "status": "sent"
+        })
             
     except Exception as e:
         logger.error(f"Error sending message: {e}")
-        await manager.send_personal_message({
+        connection.send_message({
             "type": "error",
             "message": "Failed to send message"
-        }, sender_id)
+        })
 
 async def handle_mark_read(message_data: dict, user_id: UUID):
-    """Handle marking a message as read"""
+    """Handle marking a message as read.
+
+    With "friend_id" the whole conversation is marked read up to "message_id" (or now) in one
+    UPDATE, and the friend gets a single messages_read event.
+    """
     try:
+        if message_data.get("friend_id"):
+            up_to_message_id = UUID(message_data["message_id"]) if message_data.get("message_id") else None
+            await run_db(mark_conversation_read, user_id, UUID(message_data["friend_id"]), up_to_message_id)
+            return
+        
         message_id = UUID(message_data.get("message_id"))
         
-        db = SessionLocal()
-        try:
-            message = mark_message_as_read(db, message_id, user_id)
-            
-            # Notify sender that message was read
-            await manager.send_personal_message({
-                "type": "message_read",
-                "message_id": str(message_id),
-                "read_by": str(user_id)
-            }, message.sender_id)
-            
-        finally:
-            db.close()
+        message = await run_db(mark_message_as_read, message_id, user_id)
+        
+        # Notify sender that message was read
+        await manager.send_personal_message({
+            "type": "message_read",
+            "message_id": str(message_id),
+            "read_by": str(user_id)
+        }, message.sender_id)
             
     except Exception as e:
         logger.error(f"Error marking message as read: {e}")
@@ -173,16 +179,142 @@ async def handle_typing_indicator(message_data: dict, user_id: UUID):
     except Exception as e:
         logger.error(f"Error handling typing indicator: {e}")
 
+# Multiplexed WebSocket endpoint: DMs and every group chat over one socket
+@router.websocket("/ws")
+async def websocket_multiplexed_endpoint(websocket: WebSocket):
+    """WebSocket endpoint for DMs and group chats over a single connection.
+
+    Replaces opening /ws/chat plus one /ws/group/{group_id} per group. Friends and group
+    memberships are loaded once on connect; the client then sends
+    {"type": "subscribe", "group_ids": [...]} / {"type": "unsubscribe", "group_ids": [...]}
+    to choose which groups it receives. Outgoing frames are the same as on the legacy
+    endpoints; send_message and typing target a group when they carry "group_id" and a
+    friend when they carry "receiver_id".
+    """
+    try:
+        # Authenticate user
+        current_user = await get_current_user_websocket(websocket)
+        
+        # Load friends and active group memberships in one session, two id-only queries
+        friend_ids, group_ids = await run_db(load_chat_memberships, current_user.account_id)
+        
+        connection = await manager.connect(websocket, current_user.account_id, auto_subscribe=False)
+        manager.update_user_friends(current_user.account_id, friend_ids)
+        manager.update_user_groups(current_user.account_id, group_ids)
+        
+        connection.send_message({
+            "type": "connection_established",
+            "user_id": str(current_user.account_id),
+            "groups": [str(group_id) for group_id in group_ids],
+            "online_friends": [str(friend_id) for friend_id in manager.get_online_friends(current_user.account_id)],
+            "message": "Connected to chat server"
+        })
+        
+        # Handle incoming messages
+        while True:
+            try:
+                data = await websocket.receive_text()
+                message_data = json.loads(data)
+                message_type = message_data.get("type")
+                
+                if message_type == "subscribe":
+                    handle_subscribe(connection, message_data)
+                    
+                elif message_type == "unsubscribe":
+                    handle_unsubscribe(connection, message_data)
+                    
+                elif message_type == "send_message":
+                    if message_data.get("group_id"):
+                        group_id = UUID(message_data["group_id"])
+                        if manager.is_group_member(current_user.account_id, group_id):
+                            await handle_send_group_message(message_data, current_user.account_id, group_id, connection)
+                        else:
+                            connection.send_message({"type": "error", "message": "Not an active member of this group"})
+                    else:
+                        await handle_send_message(message_data, current_user.account_id, connection)
+                    
+                elif message_type == "mark_read":
+                    await handle_mark_read(message_data, current_user.account_id)
+                    
+                elif message_type == "typing":
+                    if message_data.get("group_id"):
+                        group_id = UUID(message_data["group_id"])
+                        if manager.is_group_member(current_user.account_id, group_id):
+                            await handle_group_typing_indicator(message_data, current_user.account_id, group_id)
+                    else:
+                        await handle_typing_indicator(message_data, current_user.account_id)
+                    
+            except json.JSONDecodeError:
+                connection.send_message({
+                    "type": "error",
+                    "message": "Invalid JSON format"
+                })
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                logger.error(f"Error handling WebSocket message: {e}")
+                connection.send_message({
+                    "type": "error",
+                    "message": "Internal server error"
+                })
+                
+    except WebSocketDisconnect:
+        logger.info(f"WebSocket disconnected for user {current_user.account_id if 'current_user' in locals() else 'unknown'}")
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
+    finally:
+        if 'connection' in locals():
+            manager.disconnect(connection)
+
+def load_chat_memberships(db: Session, user_id: UUID):
+    """Friend ids and active chat group ids for the multiplexed socket"""
+    return get_friend_ids(db, user_id), get_active_chat_group_ids(db, user_id)
+
+def _frame_group_ids(message_data: dict) -> list:
+    """Group ids from a subscribe/unsubscribe frame; accepts "group_ids" or a single "group_id" """
+    raw_ids = message_data.get("group_ids") or ([message_data["group_id"]] if message_data.get("group_id") else [])
+    return [UUID(group_id) for group_id in raw_ids]
+
+def handle_subscribe(connection, message_data: dict):
+    """Subscribe the socket to group broadcasts; membership was loaded on connect, so no DB access"""
+    subscribed = []
+    rejected = []
+    for group_id in _frame_group_ids(message_data):
+        if manager.subscribe(connection, group_id):
+            subscribed.append({
+                "group_id": str(group_id),
+                "online_members": [str(member_id) for member_id in manager.get_online_group_members(group_id)]
+            })
+        else:
+            rejected.append(str(group_id))
+    
+    connection.send_message({
+        "type": "subscribed",
+        "groups": subscribed,
+        "rejected": rejected
+    })
+
+def handle_unsubscribe(connection, message_data: dict):
+    """Stop the socket receiving group broadcasts"""
+    group_ids = _frame_group_ids(message_data)
+    for group_id in group_ids:
+        manager.unsubscribe(connection, group_id)
+    
+    connection.send_message({
+        "type": "unsubscribed",
+        "group_ids": [str(group_id) for group_id in group_ids]
+    })
+
 # REST endpoints for chat functionality
 
 @router.post("/messages/", response_model=MessageOut, status_code=status.HTTP_201_CREATED)
-async def send_message_endpoint(
+def send_message_endpoint(
     message_data: MessageCreate,
     db: Session = Depends(get_db),
     current_user: Account = Depends(check_roles([RoleNameEnum.user, RoleNameEnum.moderator, RoleNameEnum.admin]))
 ):
     """Send a message to a friend (REST endpoint)"""
-    return await send_message(db, message_data, current_user.account_id)
+    return send_message(db, message_data, current_user.account_id)
 
 @router.get("/messages/history/{friend_id}", response_model=MessageList)
 def get_chat_history_endpoint(
@@ -206,7 +338,7 @@ def mark_message_as_read_endpoint(
     # Gửi sự kiện message_read qua WebSocket cho sender nếu đang online
     try:
         if manager.is_user_online(message.sender_id):
-            asyncio.create_task(
+            manager.submit(
                 manager.send_personal_message({
                     "type": "message_read",
                     "message_id": str(message_id),
@@ -217,6 +349,17 @@ def mark_message_as_read_endpoint(
         logger.error(f"Failed to send message_read via WebSocket: {e}")
     return message
 
+@router.put("/conversations/{friend_id}/read", response_model=ReadWatermarkOut)
+def mark_conversation_read_endpoint(
+    friend_id: UUID,
+    up_to_message_id: Optional[UUID] = Query(None, description="Mark messages up to and including this one"),
+    up_to: Optional[datetime] = Query(None, description="Mark messages sent at or before this time (default: now)"),
+    db: Session = Depends(get_db),
+    current_user: Account = Depends(check_roles([RoleNameEnum.user, RoleNameEnum.moderator, RoleNameEnum.admin]))
+):
+    """Mark a friend's messages read up to a watermark; the friend gets one messages_read event"""
+    return mark_conversation_read(db, current_user.account_id, friend_id, up_to_message_id=up_to_message_id, up_to=up_to)
+
 @router.delete("/messages/{message_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_message_endpoint(
     message_id: UUID,
@@ -236,6 +379,14 @@ def get_unread_message_count_endpoint(
     count = get_unread_message_count(db, current_user.account_id)
     return {"unread_count": count}
 
+@router.get("/conversations", response_model=ConversationSummaryList)
+def get_conversations_endpoint(
+    db: Session = Depends(get_db),
+    current_user: Account = Depends(check_roles([RoleNameEnum.user, RoleNameEnum.moderator, RoleNameEnum.admin]))
+):
+    """Chat inbox: every friend with the last message, unread count and last activity, most recent first"""
+    return get_conversation_summaries(db, current_user.account_id)
+
 @router.get("/friends/online")
 def get_online_friends_endpoint(
     current_user: Account = Depends(check_roles([RoleNameEnum.user, RoleNameEnum.moderator, RoleNameEnum.admin]))
@@ -244,6 +395,13 @@ def get_online_friends_endpoint(
     online_friends = manager.get_online_friends(current_user.account_id)
     return {"online_friends": [str(friend_id) for friend_id in online_friends]}
 
+@router.get("/ws/metrics")
+def get_websocket_metrics_endpoint(
+    current_user: Account = Depends(check_roles([RoleNameEnum.admin]))
+):
+    """Outbound queue depth and backpressure counters for this worker's WebSocket connections"""
+    return manager.get_queue_metrics()
+
 @router.get("/messages/search/{friend_id}", response_model=MessageList)
 def search_chat_messages_endpoint(
     friend_id: UUID,
@@ -255,6 +413,3 @@ def search_chat_messages_endpoint(
 ):
     """Search chat messages with a friend by keyword"""
     return search_chat_messages(db, current_user.account_id, friend_id, keyword, skip=skip, limit=limit)
-
-# Import SessionLocal for WebSocket endpoint
-from app.db.database import SessionLocal 
\ No newline at end of file
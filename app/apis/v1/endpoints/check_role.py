@@ -1,11 +1,14 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from uuid import UUID
 from jose import JWTError, jwt
 from app.db.models.account import Account
 from app.core.settings import settings
 from app.core.deps import get_db
+from app.core.principal_cache import principal_cache
+from app.core.token_revocation import token_revocation_list
 from typing import List
 from app.schemas.account import RoleNameEnum
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
@@ -31,13 +34,21 @@ async def get_current_user(
         role = payload.get("role")  # Get role from token
         if account_id is None or role is None:
             raise credentials_exception
+        account_id = UUID(str(account_id))
             
-    except JWTError:
+    except (JWTError, ValueError):
+        raise credentials_exception
+
+    # Logged out, replaced by a newer login, or banned
+    if not token_revocation_list.is_allowed(db, token):
         raise credentials_exception
         
-    user = db.query(Account).filter(Account.account_id == account_id).first()
+    user = principal_cache.load(db, account_id=account_id)
     if user is None:
-        raise credentials_exception
+        user = db.query(Account).options(joinedload(Account.role)).filter(Account.account_id == account_id).first()
+        if user is None:
+            raise credentials_exception
+        principal_cache.store(user)
         
     # Verify role matches between token and database
     if role != user.role.role_name:
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.core.deps import get_db, get_current_active_account
 from app.schemas.comment import (
@@ -10,7 +10,8 @@ from app.schemas.comment import (
 from app.services.comment import CommentService
 from app.db.models.account import Account
 from app.db.models.role import RoleNameEnum
-from typing import List
+from typing import List, Optional
+from uuid import UUID
 
 router = APIRouter()
 
@@ -54,14 +55,42 @@ def get_comments_by_post(
     post_id: str,
     skip: int = 0,
     limit: int = 10,
+    max_depth: int = Query(3, ge=1, le=10, description="Reply levels loaded below each top-level comment"),
+    replies_limit: int = Query(20, ge=1, le=100, description="Replies loaded per comment"),
     db: Session = Depends(get_db)
 ):
     """
-    Get comments for a post.
-    If parent_id is provided, returns replies to that comment.
-    Otherwise returns top-level comments.
+    Get a page of top-level comments for a post with their replies.
+    Comments with more replies than loaded (including those at max_depth) carry next_replies_cursor for /{comment_id}/replies.
     """
-    return CommentService.get_comments_by_post(db, post_id, skip, limit)
+    return CommentService.get_comments_by_post(db, post_id, skip, limit, max_depth, replies_limit)
+
+@router.get("/{comment_id}/replies", response_model=List[Comment])
+def get_comment_replies(
+    comment_id: UUID,
+    cursor: Optional[str] = Query(None, description="next_replies_cursor of the parent comment"),
+    limit: int = Query(20, ge=1, le=100),
+    max_depth: int = Query(3, ge=1, le=10, description="Reply levels loaded, counting these replies"),
+    replies_limit: int = Query(20, ge=1, le=100, description="Replies loaded per nested comment"),
+    db: Session = Depends(get_db)
+):
+    """
+    Load more replies of a comment, continuing from a next_replies_cursor.
+    """
+    return CommentService.get_replies(db, comment_id, cursor, limit, max_depth, replies_limit)
+
+@router.get("/{comment_id}/thread", response_model=Comment)
+def get_comment_thread(
+    comment_id: UUID,
+    max_depth: int = Query(3, ge=1, le=10, description="Reply levels loaded below the comment"),
+    replies_limit: int = Query(20, ge=1, le=100, description="Replies loaded per comment"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the thread of a comment (deep link): its top-level ancestor with the chain of replies
+    leading to the comment, and the comment's own replies.
+    """
+    return CommentService.get_comment_thread(db, comment_id, max_depth, replies_limit)
 
 @router.get("/post/{post_id}/nested", response_model=List[Comment])
 def get_nested_comments(
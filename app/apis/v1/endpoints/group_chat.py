@@ -4,11 +4,10 @@ from uuid import UUID
 from typing import List
 import json
 import logging
-import asyncio
 
 from app.core.deps import get_db, get_current_active_account
 from app.core.websocket_deps import get_current_user_websocket
-from app.core.websocket_manager import manager
+from app.core.websocket_manager import ClientConnection, manager
 from app.schemas.group import GroupCreate, GroupOut, GroupMemberCreate, GroupMemberOut, GroupChatCreateTransaction, GroupChatTransactionOut, GroupUpdate, GroupMembersSearchOut, GroupChatListResponse
 from app.schemas.group_message import GroupMessageCreate, GroupMessageOut, GroupMessageList
 from app.schemas.account import RoleNameEnum
@@ -29,12 +28,12 @@ from app.services.group_chat_service import (
     delete_group_chat,
     update_group_chat,
     remove_member_from_group,
-    update_user_groups_in_manager,
+    get_active_chat_group_ids,
     get_all_group_chats,
     join_group_chat
 )
 from app.apis.v1.endpoints.check_role import check_roles
-from app.db.database import SessionLocal
+from app.db.database import run_db
 from app.db.models.group_member import GroupMember, GroupMemberStatusEnum
 
 router = APIRouter()
@@ -43,63 +42,54 @@ logger = logging.getLogger(__name__)
 # WebSocket endpoint for real-time group chat
 @router.websocket("/ws/group/{group_id}")
 async def websocket_group_chat_endpoint(websocket: WebSocket, group_id: UUID):
-    """WebSocket endpoint for real-time group chat - only active members"""
+    """WebSocket endpoint for real-time group chat - only active members.
+
+    Deprecated: one socket per group is replaced by the multiplexed /chat/ws endpoint, where
+    the client sends {"type": "subscribe", "group_ids": [...]}. Broadcast frames are the same
+    on both, and a user may hold legacy and multiplexed sockets at the same time.
+    """
     try:
         # Authenticate user
         current_user = await get_current_user_websocket(websocket)
         
-        # Check if user is an ACTIVE member of the group
-        db = SessionLocal()
-        try:
-            member = db.query(GroupMember).filter(
-                GroupMember.group_id == group_id,
-                GroupMember.account_id == current_user.account_id,
-                GroupMember.status == GroupMemberStatusEnum.active  # Must be active
-            ).first()
-            
-            if not member:
-                await websocket.close(code=4003, reason="Not an active member of this group")
-                return
-                
-            # Get group info
-            group = get_group_by_id(db, group_id)
-            
-        finally:
-            db.close()
+        # Check membership, load the group and the user's active groups in one DB round trip
+        member, group, group_ids = await run_db(load_group_socket_state, group_id, current_user.account_id)
         
-        # Connect to WebSocket
-        await manager.connect(websocket, current_user.account_id)
+        if not member:
+            await websocket.close(code=4003, reason="Not an active member of this group")
+            return
+        
+        # Connect to WebSocket; this socket only receives its own group's broadcasts
+        connection = await manager.connect(websocket, current_user.account_id, auto_subscribe=False)
         
         # Update user's groups in manager first
-        db = SessionLocal()
-        try:
-            update_user_groups_in_manager(db, current_user.account_id)
-        finally:
-            db.close()
+        for active_group_id in group_ids:
+            if not manager.is_group_member(current_user.account_id, active_group_id):
+                manager.join_group(current_user.account_id, active_group_id)
         
-        # Join the group (this will be handled by update_user_groups_in_manager)
         # But we need to ensure user is in this specific group
         if not manager.is_group_member(current_user.account_id, group_id):
             manager.join_group(current_user.account_id, group_id)
+        manager.subscribe(connection, group_id)
         
         # Send connection confirmation
-        await websocket.send_text(json.dumps({
+        connection.send_message({
             "type": "connection_established",
             "user_id": str(current_user.account_id),
             "group_id": str(group_id),
             "group_name": group.name,
             "my_status": member.status.value,
             "message": "Connected to group chat"
-        }))
+        })
         
         # Send online members list
         online_members = manager.get_online_group_members(group_id)
         logger.info(f"User {current_user.account_id} connected to group {group_id}. Online members: {online_members}")
-        await websocket.send_text(json.dumps({
+        connection.send_message({
             "type": "online_members",
             "group_id": str(group_id),
             "members": [str(member_id) for member_id in online_members]
-        }))
+        })
         
         # Handle incoming messages
         while True:
@@ -109,35 +99,50 @@ async def websocket_group_chat_endpoint(websocket: WebSocket, group_id: UUID):
                 
                 if message_data.get("type") == "send_message":
                     # Handle sending a message
-                    await handle_send_group_message(message_data, current_user.account_id, group_id)
+                    await handle_send_group_message(message_data, current_user.account_id, group_id, connection)
                     
                 elif message_data.get("type") == "typing":
                     # Handle typing indicator
                     await handle_group_typing_indicator(message_data, current_user.account_id, group_id)
                     
             except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({
+                connection.send_message({
                     "type": "error",
                     "message": "Invalid JSON format"
-                }))
+                })
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
                 logger.error(f"Error handling WebSocket message: {e}")
-                await websocket.send_text(json.dumps({
+                connection.send_message({
                     "type": "error",
                     "message": "Internal server error"
-                }))
+                })
                 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for user {current_user.account_id if 'current_user' in locals() else 'unknown'} from group {group_id}")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        if 'current_user' in locals():
-            manager.leave_group(current_user.account_id, group_id)
-            manager.disconnect(current_user.account_id)
+        # Only this socket goes away; the user's other tabs keep their group subscriptions
+        if 'connection' in locals():
+            manager.disconnect(connection)
 
-async def handle_send_group_message(message_data: dict, sender_id: UUID, group_id: UUID):
-    """Handle sending a message to group via WebSocket"""
+def load_group_socket_state(db: Session, group_id: UUID, user_id: UUID):
+    """Active membership row, group info and the user's active chat group ids for the group socket"""
+    member = db.query(GroupMember).filter(
+        GroupMember.group_id == group_id,
+        GroupMember.account_id == user_id,
+        GroupMember.status == GroupMemberStatusEnum.active  # Must be active
+    ).first()
+    
+    if not member:
+        return None, None, []
+    
+    return member, get_group_by_id(db, group_id), get_active_chat_group_ids(db, user_id)
+
+async def handle_send_group_message(message_data: dict, sender_id: UUID, group_id: UUID, connection: ClientConnection):
+    """Handle sending a message to group via WebSocket; the ack or error goes to the sending socket only"""
     try:
         content = message_data.get("content", "").strip()
         
@@ -151,51 +156,46 @@ async def handle_send_group_message(message_data: dict, sender_id: UUID, group_i
         )
         
         # Send message
-        db = SessionLocal()
-        try:
-            message = send_group_message(db, msg_data, sender_id)
-            
-            # Send confirmation back to sender
-            await manager.send_personal_message({
-                "type": "message_sent",
+        message = await run_db(send_group_message, msg_data, sender_id)
+        
+        # Send confirmation back to the socket that sent it
+        connection.send_message({
+            "type": "message_sent",
+            "message_id": str(message.message_id),
+            "group_id": str(group_id),
+            "status": "sent"
+        })
+        
+        # Broadcast to all group members
+        group_message = {
+            "type": "group_message",
+            "data": {
                 "message_id": str(message.message_id),
-                "group_id": str(group_id),
-                "status": "sent"
-            }, sender_id)
-            
-            # Broadcast to all group members
-            group_message = {
-                "type": "group_message",
-                "data": {
-                    "message_id": str(message.message_id),
-                    "group_id": str(message.group_id),
-                    "sender_id": str(message.sender_id),
-                    "content": message.content,
-                    "status": message.status.value,
-                    "is_deleted": message.is_deleted,
-                    "created_at": message.created_at.isoformat(),
-                    "updated_at": message.updated_at.isoformat(),
-                    "sender": {
-                        "account_id": str(message.sender.account_id),
-                        "username": message.sender.username,
-                        "full_name": message.sender.full_name,
-                        "avatar": message.sender.avatar
-                    }
+                "group_id": str(message.group_id),
+                "sender_id": str(message.sender_id),
+                "content": message.content,
+                "status": message.status.value,
+                "is_deleted": message.is_deleted,
+                "created_at": message.created_at.isoformat(),
+                "updated_at": message.updated_at.isoformat(),
+                "sender": {
+                    "account_id": str(message.sender.account_id),
+                    "username": message.sender.username,
+                    "full_name": message.sender.full_name,
+                    "avatar": message.sender.avatar
                 }
             }
-            
-            logger.info(f"Broadcasting message to group {group_id} from user {sender_id}")
-            await manager.broadcast_to_group(group_message, group_id, exclude_user=sender_id)
-            
-        finally:
-            db.close()
+        }
+        
+        logger.info(f"Broadcasting message to group {group_id} from user {sender_id}")
+        await manager.broadcast_to_group(group_message, group_id, exclude_user=sender_id)
             
     except Exception as e:
         logger.error(f"Error sending group message: {e}")
-        await manager.send_personal_message({
+        connection.send_message({
             "type": "error",
             "message": "Failed to send message"
-        }, sender_id)
+        })
 
 async def handle_group_typing_indicator(message_data: dict, user_id: UUID, group_id: UUID):
     """Handle typing indicator for group chat"""
@@ -250,7 +250,7 @@ def send_message_to_group(
             }
         }
         
-        asyncio.create_task(
+        manager.submit(
             manager.broadcast_to_group(group_message, group_id, exclude_user=current_user.account_id)
         )
     except Exception as e:
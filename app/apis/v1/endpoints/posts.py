@@ -1,16 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import List
+from typing import List, Literal, Optional, Union
 from app.db.models.account import Account
 from app.core.deps import get_db
-from app.schemas.post import PostCreate, PostUpdate, PostOut, PostModeration
+from app.schemas.post import PostCreate, PostUpdate, PostOut, PostModeration, PostCursorPage
 from app.services.post_service import (
     create_post, get_post_by_id, get_all_posts,
     update_post, delete_post, search_posts,
     search_posts_by_tag_name, search_posts_by_topic_name, get_my_posts,
-    moderate_post, get_approved_posts
+    moderate_post, get_approved_posts,
+    get_approved_posts_by_cursor, get_all_posts_by_cursor, get_my_posts_by_cursor
 )
+from app.services.post_search_service import search_posts_ranked
 from app.schemas.account import RoleNameEnum
 from app.apis.v1.endpoints.check_role import check_roles
 from fastapi.responses import JSONResponse
@@ -36,13 +38,27 @@ def search_posts_endpoint(
 ):
     """Search posts by title"""
     return search_posts(db, title, skip=skip, limit=limit)
-@router.get("/approved/", response_model=List[PostOut])
+
+@router.get("/search/full-text/", response_model=List[PostOut])
+def search_posts_full_text_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms (title, content, steps, ingredients; accents optional)"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Ranked full-text search over approved posts"""
+    return search_posts_ranked(db, q, skip=skip, limit=limit)
+@router.get("/approved/", response_model=Union[List[PostOut], PostCursorPage])
 def get_approved_posts_endpoint(
     skip: int = Query(0, ge=0, description="Number of posts to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of posts to return"),
+    pagination: Literal["offset", "cursor"] = Query("offset", description="Use 'cursor' to get a page with next_cursor"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page (implies cursor pagination)"),
     db: Session = Depends(get_db)
 ):
     """Get all approved posts with pagination"""
+    if cursor or pagination == "cursor":
+        return get_approved_posts_by_cursor(db, cursor=cursor, limit=limit)
     return get_approved_posts(db, skip=skip, limit=limit)
 @router.get("/search/by-tag/", response_model=List[PostOut])
 def search_posts_by_tag_endpoint(
@@ -63,14 +79,18 @@ def search_posts_by_topic_endpoint(
 ):
     """Search posts by topic name"""
     return search_posts_by_topic_name(db, topic_name, skip=skip, limit=limit)
-@router.get("/my-posts/", response_model=List[PostOut])
+@router.get("/my-posts/", response_model=Union[List[PostOut], PostCursorPage])
 def get_my_posts_endpoint(
     skip: int = Query(0, ge=0, description="Number of posts to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of posts to return"),
+    pagination: Literal["offset", "cursor"] = Query("offset", description="Use 'cursor' to get a page with next_cursor"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page (implies cursor pagination)"),
     db: Session = Depends(get_db),
     current_user: Account = Depends(check_roles([RoleNameEnum.user, RoleNameEnum.moderator, RoleNameEnum.admin]))
 ):
     """Get all posts created by the current user"""
+    if cursor or pagination == "cursor":
+        return get_my_posts_by_cursor(db, current_user.account_id, cursor=cursor, limit=limit)
     return get_my_posts(db, current_user.account_id, skip=skip, limit=limit)
 @router.get("/{post_id}", response_model=PostOut)
 def get_post_by_id_endpoint(
@@ -80,13 +100,17 @@ def get_post_by_id_endpoint(
     """Get a specific post by ID"""
     return get_post_by_id(db, post_id)
 
-@router.get("/", response_model=List[PostOut])
+@router.get("/", response_model=Union[List[PostOut], PostCursorPage])
 def get_all_posts_endpoint(
     skip: int = Query(0, ge=0, description="Number of posts to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of posts to return"),
+    pagination: Literal["offset", "cursor"] = Query("offset", description="Use 'cursor' to get a page with next_cursor"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page (implies cursor pagination)"),
     db: Session = Depends(get_db)
 ):
     """Get all posts with pagination"""
+    if cursor or pagination == "cursor":
+        return get_all_posts_by_cursor(db, cursor=cursor, limit=limit)
     return get_all_posts(db, skip=skip, limit=limit)
 
 @router.put("/{post_id}", response_model=PostOut)
@@ -121,13 +145,17 @@ def review_post_endpoint(
     moderation_data.approved_by = current_user.account_id
     return moderate_post(db, post_id, moderation_data)
 
-@router.get("/user/{user_id}", response_model=List[PostOut])
+@router.get("/user/{user_id}", response_model=Union[List[PostOut], PostCursorPage])
 def get_posts_by_user_id_endpoint(
     user_id: UUID,
     skip: int = Query(0, ge=0, description="Number of posts to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of posts to return"),
+    pagination: Literal["offset", "cursor"] = Query("offset", description="Use 'cursor' to get a page with next_cursor"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page (implies cursor pagination)"),
     db: Session = Depends(get_db)
 ):
     """Get all posts created by a specific user (by user_id)"""
     from app.services.post_service import get_my_posts
+    if cursor or pagination == "cursor":
+        return get_my_posts_by_cursor(db, user_id, cursor=cursor, limit=limit)
     return get_my_posts(db, user_id, skip=skip, limit=limit)
\ No newline at end of file
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+
+from app.db.models.account import Account
+from app.db.database import engine
+from app.db.group_counters import reconcile_group_counters
+from app.core.email_outbox import outbox_stats, requeue_dead_jobs
+from app.services.token_service import TokenService
+from app.db.pool_metrics import pool_metrics
+from app.schemas.account import RoleNameEnum
+from app.apis.v1.endpoints.check_role import check_roles
+from app.core.deps import get_db
+
+router = APIRouter()
+
+@router.get("/db-pool")
+def get_db_pool_metrics_endpoint(
+    current_user: Account = Depends(check_roles([RoleNameEnum.admin]))
+):
+    """Connection pool gauges, checkout-wait histogram and connection counters for this worker"""
+    return pool_metrics.snapshot(engine.pool)
+
+@router.post("/group-counters/reconcile")
+def reconcile_group_counters_endpoint(
+    db: Session = Depends(get_db),
+    current_user: Account = Depends(check_roles([RoleNameEnum.admin]))
+):
+    """Recount every group's member_count / message_count and repair any drift"""
+    return {"groups_fixed": reconcile_group_counters(db)}
+
+@router.post("/tokens/purge")
+def purge_tokens_endpoint(
+    db: Session = Depends(get_db),
+    current_user: Account = Depends(check_roles([RoleNameEnum.admin]))
+):
+    """Delete expired and deactivated token rows now instead of waiting for the sweeper"""
+    return {"deleted": TokenService.purge_tokens(db)}
+
+@router.get("/email-outbox")
+def get_email_outbox_stats_endpoint(
+    db: Session = Depends(get_db),
+    current_user: Account = Depends(check_roles([RoleNameEnum.admin]))
+):
+    """Number of outbox email jobs per status (pending, sending, sent, dead)"""
+    return outbox_stats(db)
+
+@router.post("/email-outbox/requeue-dead")
+def requeue_dead_email_jobs_endpoint(
+    job_ids: Optional[List[UUID]] = None,
+    db: Session = Depends(get_db),
+    current_user: Account = Depends(check_roles([RoleNameEnum.admin]))
+):
+    """Retry dead-lettered email jobs (all of them, or the given job ids) with a fresh set of attempts"""
+    return {"requeued": requeue_dead_jobs(db, job_ids)}
@@ -2,12 +2,14 @@ from typing import Generator
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from jose import JWTError, jwt
 
 from app.db.database import SessionLocal
 from app.db.models.account import Account
 from app.core.settings import settings
+from app.core.principal_cache import principal_cache
+from app.core.token_revocation import token_revocation_list
 from app.schemas.account import AccountStatusEnum
 from app.db.models.role import RoleNameEnum
 
@@ -52,7 +54,15 @@ def get_current_account(
     except JWTError:
         raise credentials_exception
 
-    account = db.query(Account).filter(Account.username == username).first()
+    # Logged out, replaced by a newer login, or banned
+    if not token_revocation_list.is_allowed(db, token):
+        raise credentials_exception
+
+    account = principal_cache.load(db, username=username)
+    if account is None:
+        account = db.query(Account).options(joinedload(Account.role)).filter(Account.username == username).first()
+        if account is not None and account.status == AccountStatusEnum.active:
+            principal_cache.store(account)
     if account is None or account.status != AccountStatusEnum.active:
         raise credentials_exception
 
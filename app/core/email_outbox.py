@@ -0,0 +1,319 @@
+"""Transactional email outbox.
+
+Request handlers call enqueue_email(db, ...), which only adds an EmailJob row to their
+session: the email is committed (or rolled back) together with the account / token that
+caused it, and the request never waits for SMTP. A pool of async workers per API process
+claims due jobs, sends them over SMTP connections that stay open while there is work, and
+retries failures with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, after which the
+job is dead-lettered (status "dead", see last_error) for an admin to requeue.
+
+Delivery is at-least-once: a worker that dies between the SMTP send and recording it leaves
+the job to be retried once its lease expires. The Message-ID is derived from the job id, so
+duplicates are recognisable.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+import uuid
+
+import aiosmtplib
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.db.database import SessionLocal, db_executor
+from app.db.models.email_job import EmailJob, EmailJobStatusEnum
+
+logger = logging.getLogger(__name__)
+
+# Statuses a worker may claim (a "sending" job only once its lease has expired)
+_CLAIMABLE = [EmailJobStatusEnum.pending, EmailJobStatusEnum.sending]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# Session.info flags: the session's after_commit listener is installed / its transaction queued email
+_LISTENING = "email_outbox_listening"
+_WAKE_PENDING = "email_outbox_wake_pending"
+
+
+def _wake_after_commit(session: Session):
+    if session.info.pop(_WAKE_PENDING, False):
+        outbox.wake()
+
+
+def enqueue_email(db: Session, recipient: str, subject: str, body: str, subtype: str = "html") -> EmailJob:
+    """Add an email to the outbox in the caller's transaction; it is sent after db.commit()"""
+    job = EmailJob(recipient=recipient, subject=subject, body=body, subtype=subtype)
+    db.add(job)
+    # Wake this process's workers right after the commit instead of at the next poll; one
+    # listener per session, however many emails its transactions queue
+    db.info[_WAKE_PENDING] = True
+    if not db.info.get(_LISTENING):
+        db.info[_LISTENING] = True
+        event.listen(db, "after_commit", _wake_after_commit)
+    return job
+
+
+def outbox_stats(db: Session) -> Dict[str, int]:
+    """Number of jobs per status"""
+    counts = {status.value: 0 for status in EmailJobStatusEnum}
+    for status, count in db.query(EmailJob.status, func.count(EmailJob.job_id)).group_by(EmailJob.status).all():
+        counts[status.value] = count
+    return counts
+
+
+def requeue_dead_jobs(db: Session, job_ids: Optional[List[uuid.UUID]] = None) -> int:
+    """Give dead-lettered jobs (all, or the given ones) a fresh set of attempts; returns how many"""
+    query = db.query(EmailJob).filter(EmailJob.status == EmailJobStatusEnum.dead)
+    if job_ids:
+        query = query.filter(EmailJob.job_id.in_(job_ids))
+    requeued = query.update({
+        EmailJob.status: EmailJobStatusEnum.pending,
+        EmailJob.attempts: 0,
+        EmailJob.next_attempt_at: _now()
+    }, synchronize_session=False)
+    db.commit()
+    if requeued:
+        outbox.wake()
+    return requeued
+
+
+@dataclass
+class ClaimedJob:
+    job_id: uuid.UUID
+    recipient: str
+    subject: str
+    body: str
+    subtype: str
+    attempts: int
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies about the message or its recipient will not change on retry.
+
+    Authentication failures are 5xx too, but they are a configuration problem that every
+    job would hit: those keep backing off instead of dead-lettering the whole queue.
+    """
+    if isinstance(error, aiosmtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(refused.code >= 500 for refused in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code >= 500
+    return False
+
+
+class EmailOutbox:
+    """Worker pool sending EmailJob rows; one instance per process (`outbox`), started with the app"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        workers: int = settings.EMAIL_OUTBOX_WORKERS,
+        poll_interval: float = settings.EMAIL_OUTBOX_POLL_SECONDS,
+        max_attempts: int = settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        retry_base: float = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS,
+        retry_max: float = settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS,
+        lease: float = settings.EMAIL_OUTBOX_LEASE_SECONDS,
+        smtp_options: Optional[Dict[str, Any]] = None,
+        sender: Optional[str] = None
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = lease
+        self.smtp_options = smtp_options if smtp_options is not None else {
+            "hostname": settings.SMTP_HOST,
+            "port": settings.SMTP_PORT,
+            "username": settings.SMTP_USER,
+            "password": settings.SMTP_PASSWORD,
+            "use_tls": settings.SMTP_SSL,
+            "start_tls": settings.SMTP_TLS and not settings.SMTP_SSL,
+            "timeout": settings.EMAIL_OUTBOX_SMTP_TIMEOUT_SECONDS,
+        }
+        self.sender = sender or formataddr((settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [self._loop.create_task(self._work(number)) for number in range(self.workers)]
+        logger.info(f"Email outbox started with {self.workers} worker(s)")
+
+    async def stop(self):
+        """Let in-flight sends finish, then stop the workers; unsent jobs stay in the table"""
+        self._stopping = True
+        self.wake()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def wake(self):
+        """Have idle workers look for jobs now. Safe from any thread; a no-op when not started"""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            if asyncio.get_running_loop() is loop:
+                wakeup.set()
+                return
+        except RuntimeError:
+            pass
+        loop.call_soon_threadsafe(wakeup.set)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """fn(db, *args) with its own session on the DB thread pool"""
+        def call():
+            db = self.session_factory()
+            try:
+                return fn(db, *args)
+            finally:
+                db.close()
+
+        return await asyncio.get_running_loop().run_in_executor(db_executor, call)
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter, so a relay outage does not end in a retry stampede"""
+        delay = min(self.retry_max, self.retry_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _claim(self, db: Session) -> Optional[ClaimedJob]:
+        """Claim the most overdue job with a conditional update, so each attempt goes to one worker
+        across all processes"""
+        now = _now()
+        candidates = db.query(EmailJob.job_id, EmailJob.attempts)\
+            .filter(EmailJob.status.in_(_CLAIMABLE), EmailJob.next_attempt_at <= now)\
+            .order_by(EmailJob.next_attempt_at)\
+            .limit(self.workers * 2)\
+            .all()
+        for job_id, attempts in candidates:
+            claimed = db.query(EmailJob).filter(
+                EmailJob.job_id == job_id,
+                EmailJob.attempts == attempts,
+                EmailJob.status.in_(_CLAIMABLE),
+                EmailJob.next_attempt_at <= now
+            ).update({
+                EmailJob.status: EmailJobStatusEnum.sending,
+                EmailJob.attempts: attempts + 1,
+                EmailJob.next_attempt_at: now + timedelta(seconds=self.lease)
+            }, synchronize_session=False)
+            db.commit()
+            if claimed:
+                job = db.query(EmailJob).filter(EmailJob.job_id == job_id).first()
+                return ClaimedJob(job.job_id, job.recipient, job.subject, job.body, job.subtype, job.attempts)
+        return None
+
+    def _record(self, db: Session, job: ClaimedJob, error: Optional[Exception]):
+        # Only while we still hold the lease: a job reclaimed meanwhile belongs to its new worker
+        query = db.query(EmailJob).filter(
+            EmailJob.job_id == job.job_id,
+            EmailJob.attempts == job.attempts,
+            EmailJob.status == EmailJobStatusEnum.sending
+        )
+        if error is None:
+            values = {EmailJob.status: EmailJobStatusEnum.sent, EmailJob.sent_at: _now(), EmailJob.last_error: None}
+        elif _is_permanent(error) or job.attempts >= self.max_attempts:
+            values = {EmailJob.status: EmailJobStatusEnum.dead, EmailJob.last_error: str(error)}
+        else:
+            values = {
+                EmailJob.status: EmailJobStatusEnum.pending,
+                EmailJob.next_attempt_at: _now() + timedelta(seconds=self._retry_delay(job.attempts)),
+                EmailJob.last_error: str(error)
+            }
+        query.update(values, synchronize_session=False)
+        db.commit()
+
+    def _message(self, job: ClaimedJob) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = job.recipient
+        message["Subject"] = job.subject
+        message["Message-ID"] = f"<{job.job_id}@{self.sender.rsplit('@', 1)[-1].rstrip('>')}>"
+        message.set_content(job.body, subtype=job.subtype)
+        return message
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        options = dict(self.smtp_options)
+        username, password = options.pop("username", None), options.pop("password", None)
+        smtp = aiosmtplib.SMTP(**options)
+        await smtp.connect()
+        if username and smtp.supports_extension("auth"):
+            await smtp.login(username, password)
+        return smtp
+
+    async def _send(self, smtp: Optional[aiosmtplib.SMTP], message: EmailMessage) -> aiosmtplib.SMTP:
+        """Send on the worker's connection, (re)connecting as needed; returns the connection to keep"""
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.send_message(message)
+                return smtp
+            except aiosmtplib.SMTPServerDisconnected:
+                # The relay closed an idle connection; not the message's fault
+                pass
+        smtp = await self._connect()
+        await smtp.send_message(message)
+        return smtp
+
+    async def _close(self, smtp: Optional[aiosmtplib.SMTP]):
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+    async def _work(self, number: int):
+        smtp: Optional[aiosmtplib.SMTP] = None
+        while not self._stopping:
+            # Cleared before claiming: a wake() for a job committed after this point is not lost
+            self._wakeup.clear()
+            try:
+                job = await self._run(self._claim)
+            except Exception as e:
+                logger.error(f"Email outbox worker {number} could not claim a job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    # Idle for a whole poll interval: don't hold the relay's connection
+                    await self._close(smtp)
+                    smtp = None
+                continue
+
+            started = time.perf_counter()
+            error: Optional[Exception] = None
+            try:
+                smtp = await self._send(smtp, self._message(job))
+            except Exception as e:
+                error = e
+                await self._close(smtp)
+                smtp = None
+            try:
+                await self._run(self._record, job, error)
+            except Exception as e:
+                logger.error(f"Email outbox could not record job {job.job_id}: {e}")
+            if error is None:
+                logger.info(f"Email {job.job_id} sent to {job.recipient} in {time.perf_counter() - started:.2f}s")
+            else:
+                logger.warning(f"Email {job.job_id} to {job.recipient} failed (attempt {job.attempts}): {error}")
+        await self._close(smtp)
+
+
+outbox = EmailOutbox()
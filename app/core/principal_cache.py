@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+import threading
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.settings import settings
+from app.db.models.account import Account
+
+
+def _detached_copy(obj):
+    """Copy an instance's loaded column values into a new detached instance (no session, no SQL)"""
+    mapper = inspect(obj).mapper
+    copy = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        set_committed_value(copy, attr.key, getattr(obj, attr.key))
+    make_transient_to_detached(copy)
+    return copy
+
+
+class PrincipalCache:
+    """TTL + LRU cache of authenticated accounts, so auth dependencies skip the Account and role queries.
+
+    Entries are detached snapshots keyed by account_id, with a username index for tokens that
+    carry the username. Callers never get the snapshot itself: `load` merges it into the
+    request's session without SQL, so endpoints can still modify and commit the account.
+    Entries are dropped whenever an Account row is updated or deleted through the ORM (ban,
+    role/profile/password/username changes, deletion). Invalidation is per process; with
+    several workers the TTL bounds how long another worker may serve the old principal.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[UUID, Tuple[float, Account]]" = OrderedDict()
+        self._usernames: Dict[str, UUID] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def _get(self, account_id: UUID) -> Optional[Account]:
+        entry = self._entries.get(account_id)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            self._drop(account_id)
+            return None
+        self._entries.move_to_end(account_id)
+        return snapshot
+
+    def _drop(self, account_id: UUID):
+        entry = self._entries.pop(account_id, None)
+        if entry is not None:
+            self._usernames.pop(entry[1].username, None)
+
+    def load(self, db: Session, account_id: Optional[UUID] = None, username: Optional[str] = None) -> Optional[Account]:
+        """Return the cached account (by id or username) attached to `db`, or None on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if account_id is None and username is not None:
+                account_id = self._usernames.get(username)
+            snapshot = self._get(account_id) if account_id is not None else None
+            if snapshot is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return db.merge(snapshot, load=False)
+
+    def store(self, account: Account):
+        """Cache a freshly loaded account; its role must already be loaded"""
+        if not self.enabled:
+            return
+        snapshot = _detached_copy(account)
+        if account.role is not None:
+            set_committed_value(snapshot, "role", _detached_copy(account.role))
+        with self._lock:
+            self._drop(snapshot.account_id)
+            self._entries[snapshot.account_id] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._usernames[snapshot.username] = snapshot.account_id
+            while len(self._entries) > self.max_size:
+                oldest_id, _ = next(iter(self._entries.items()))
+                self._drop(oldest_id)
+
+    def invalidate(self, account_id: UUID):
+        with self._lock:
+            self._drop(account_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._usernames.clear()
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+@event.listens_for(Account, "after_update")
+@event.listens_for(Account, "after_delete")
+def _invalidate_on_write(mapper, connection, target):
+    # Drop now, and again after commit in case a concurrent request re-cached the old row meanwhile
+    principal_cache.invalidate(target.account_id)
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault("principal_cache_invalidated", set()).add(target.account_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for account_id in session.info.pop("principal_cache_invalidated", ()):
+        principal_cache.invalidate(account_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("principal_cache_invalidated", None)
@@ -0,0 +1,51 @@
+"""Periodic maintenance jobs (APScheduler), started and stopped with the API.
+
+Every worker process runs its own scheduler. The jobs are idempotent batch statements, so
+workers overlapping only costs a few empty queries.
+"""
+from datetime import datetime, timedelta, timezone
+import logging
+import random
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.core.settings import settings
+from app.db.database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+scheduler = BackgroundScheduler(timezone="UTC")
+
+
+def sweep_tokens():
+    """Delete expired / deactivated token rows; with partitioning, also rotate the partitions"""
+    from app.services.token_service import TokenService
+
+    with SessionLocal() as db:
+        deleted = TokenService.purge_tokens(db)
+    if settings.TOKEN_PARTITIONING:
+        from app.db.token_partitions import is_partitioned, maintain
+
+        with engine.begin() as connection:
+            if is_partitioned(connection):
+                logger.info(f"Token partitions: {maintain(connection)}")
+    if deleted:
+        logger.info(f"Token sweeper deleted {deleted} expired or inactive token(s)")
+
+
+def start_scheduler():
+    interval = settings.TOKEN_SWEEP_INTERVAL_MINUTES
+    if interval > 0:
+        scheduler.add_job(
+            sweep_tokens, "interval", minutes=interval, id="sweep_tokens", replace_existing=True,
+            coalesce=True, max_instances=1,
+            # Spread the workers' first runs instead of all sweeping at startup
+            next_run_time=datetime.now(timezone.utc) + timedelta(seconds=random.uniform(0, min(interval * 60, 300)))
+        )
+    if scheduler.get_jobs():
+        scheduler.start()
+
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -1,13 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import asyncio
+
 from passlib.context import CryptContext
 from app.core.settings import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Changing BCRYPT_ROUNDS marks existing hashes for an upgrade; logins rehash them (verify_and_update_password_async)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# Every bcrypt call runs here. bcrypt releases the GIL, so the threads hash in parallel, and the
+# pool size caps how many cores hashing can take: a burst of logins queues here instead of
+# blocking the event loop or filling FastAPI's shared threadpool.
+password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_executor.submit(pwd_context.hash, password).result()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_executor.submit(pwd_context.verify, plain_password, hashed_password).result()
+
+# Use these from async def handlers
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(password_executor, pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(
+        password_executor, pwd_context.verify, plain_password, hashed_password
+    )
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (verified, new_hash); new_hash is set when the stored hash uses an outdated cost factor"""
+    return await asyncio.get_running_loop().run_in_executor(
+        password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
 
 JWT_SECRET_KEY = settings.JWT_SECRET_KEY
 JWT_ALGORITHM = settings.JWT_ALGORITHM
@@ -22,6 +22,22 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_PORT: int
     DATABASE_URL: str
+    # Connection pool (ignored for SQLite). Each worker holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # wait for a free connection before raising
+    DB_POOL_RECYCLE_SECONDS: int = 300  # replace connections older than this; serverless Postgres drops idle ones
+    DB_POOL_PRE_PING: bool = True  # test connections on checkout instead of failing the first query
+    # Postgres connection options
+    DB_CONNECT_TIMEOUT_SECONDS: int = 10
+    # 0 disables. Sent as a startup option on direct connections; through a pooler (Neon -pooler host, port 6432)
+    # it is SET LOCAL per transaction instead. Prefer ALTER ROLE ... SET statement_timeout there and leave this at 0
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_APPLICATION_NAME: str = "food-forum-api"
+    # Threads that run blocking DB work for async code (WebSocket handlers); keep <= the connection pool size
+    DB_THREAD_POOL_SIZE: int = 5
+    # Log unindexed foreign keys / service-layer filters on startup (also: python -m app.db.index_advisor)
+    DB_INDEX_ADVISOR_ON_STARTUP: bool = False
 
     # Superuser settings
     FIRST_SUPERUSER_GMAIL: EmailStr
@@ -44,6 +60,24 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 43200
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     REFRESH_TOKEN_SECRET_KEY: str
+    # Password hashing: bcrypt cost factor (raising it rehashes each account at its next login) and
+    # the threads bcrypt runs on per worker, i.e. how many cores hashing may use at once
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    # Authenticated accounts cached per worker; 0 disables. Writes to an account invalidate it immediately
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
+    # Token revocation: per-worker cache of "is this token's session still active" verdicts; 0 disables the cache
+    TOKEN_REVOCATION_CACHE_TTL_SECONDS: float = 300.0
+    TOKEN_REVOCATION_CACHE_SIZE: int = 100000
+    TOKEN_REVOCATION_BACKEND: str = "memory"  # "memory" (single worker) or "redis" (REDIS_URL) to push revocations to every worker
+    TOKEN_REVOCATION_CHANNEL: str = "auth:revocations"
+    # Token table hygiene: a scheduled sweeper deletes expired and deactivated rows in batches (0 disables)
+    TOKEN_SWEEP_INTERVAL_MINUTES: int = 60
+    TOKEN_SWEEP_BATCH_SIZE: int = 1000
+    # Set after `python -m app.db.token_partitions convert` (PostgreSQL): the sweeper also rotates monthly partitions
+    TOKEN_PARTITIONING: bool = False
+    TOKEN_PARTITION_MONTHS_AHEAD: int = 2
 
     # CORS settings
     FRONTEND_HOST: List[AnyHttpUrl] = []
@@ -60,6 +94,26 @@ class Settings(BaseSettings):
     EMAILS_FROM_NAME: str
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
     EMAIL_TEST_USER: EmailStr
+    # Email templates: compiled once per worker; set auto-reload in development to pick up edits without a restart
+    EMAIL_TEMPLATE_AUTO_RELOAD: bool = False
+    EMAIL_TEMPLATE_BYTECODE_CACHE: bool = True
+    EMAIL_TEMPLATE_BYTECODE_CACHE_DIR: Optional[str] = None  # default: a per-user directory under the system temp dir
+    # Email outbox (app.core.email_outbox): workers per API process, each reusing one SMTP connection while busy
+    EMAIL_OUTBOX_ENABLED: bool = True  # start the workers with the API; jobs queue up in email_job otherwise
+    EMAIL_OUTBOX_WORKERS: int = 2
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5.0  # picks up due retries and jobs enqueued by other processes
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 6  # then the job is dead-lettered
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: float = 30.0  # doubled after every failed attempt
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS: float = 3600.0
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 300.0  # a claimed job is retried if its worker has not reported back by then
+    EMAIL_OUTBOX_SMTP_TIMEOUT_SECONDS: float = 30.0
+
+    # WebSocket settings
+    WEBSOCKET_BACKPLANE: str = "memory"  # "memory" (single worker) or "redis"
+    WEBSOCKET_BACKPLANE_CHANNEL: str = "ws:backplane"
+    REDIS_URL: Optional[str] = None
+    WEBSOCKET_SEND_TIMEOUT_SECONDS: float = 5.0
+    WEBSOCKET_MAX_QUEUE_SIZE: int = 256
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,142 @@
+"""Bearer-token revocation checks without a query per request.
+
+A token is only valid while its row in the token table is active: a new login deactivates
+the account's previous tokens (single session), and logout and bans deactivate them too.
+Checking the table on every request would cost a query, so each worker keeps a verdict
+cache keyed by token hash:
+
+- a hit is a dict lookup; a miss runs one indexed token_hash lookup and caches the answer
+  for TOKEN_REVOCATION_CACHE_TTL_SECONDS (never past the token's expiry);
+- logout, re-login, ban and password reset (TokenService.revoke_all_user_tokens) call
+  revoke(), which marks the tokens revoked in this worker at once and publishes them on a
+  backplane (see app.core.websocket_backplane) so every other worker does the same. With TOKEN_REVOCATION_BACKEND=memory (one worker) other processes
+  are not told and pick a revocation up when their cached verdict expires.
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.core.websocket_backplane import Backplane, create_backplane
+from app.db.models.token import Token, token_hash_for
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationList:
+    def __init__(self, backplane: Backplane, ttl_seconds: float, max_size: int):
+        self.backplane = backplane
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        # token hash -> (monotonic expiry, allowed)
+        self._verdicts: "OrderedDict[str, Tuple[float, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        await self.backplane.start(self._handle_event)
+
+    async def stop(self):
+        await self.backplane.stop()
+        self._loop = None
+
+    def _get(self, key: str) -> Optional[bool]:
+        with self._lock:
+            entry = self._verdicts.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._verdicts.pop(key, None)
+                self.misses += 1
+                return None
+            self._verdicts.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _remember(self, keys: Iterable[str], allowed: bool, ttl_seconds: float):
+        if not self.enabled or ttl_seconds <= 0:
+            return
+        expires_at = time.monotonic() + ttl_seconds
+        with self._lock:
+            for key in keys:
+                self._verdicts[key] = (expires_at, allowed)
+                self._verdicts.move_to_end(key)
+            # Evicting is safe either way: a forgotten verdict is looked up again
+            while len(self._verdicts) > self.max_size:
+                self._verdicts.popitem(last=False)
+
+    def is_allowed(self, db: Session, token: str) -> bool:
+        """Is `token` an access token whose session is still active?"""
+        key = token_hash_for(token)
+        verdict = self._get(key) if self.enabled else None
+        if verdict is not None:
+            return verdict
+
+        now = datetime.now(timezone.utc)
+        record = db.query(Token.token_type, Token.expires_at).filter(
+            Token.token_hash == key,
+            Token.is_active == True,
+            Token.expires_at > now
+        ).first()
+        allowed = record is not None and record.token_type == "access"
+        ttl = self.ttl_seconds
+        if allowed:
+            expires_at = record.expires_at if record.expires_at.tzinfo else record.expires_at.replace(tzinfo=timezone.utc)
+            ttl = min(ttl, (expires_at - now).total_seconds())
+        self._remember([key], allowed, ttl)
+        return allowed
+
+    def revoke(self, token_hashes: Iterable[str]):
+        """Mark tokens revoked in this worker now and tell the other workers. Call after the commit"""
+        token_hashes = list(token_hashes)
+        if not token_hashes:
+            return
+        self._remember(token_hashes, False, self.ttl_seconds)
+        self._publish({"kind": "tokens_revoked", "token_hashes": token_hashes})
+
+    def _publish(self, event: dict):
+        """Publish from sync or async code without awaiting the broker"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None and loop is self._loop:
+            loop.create_task(self._safe_publish(event))
+        elif self._loop is not None and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._safe_publish(event), self._loop)
+
+    async def _safe_publish(self, event: dict):
+        try:
+            await self.backplane.publish(event)
+        except Exception as e:
+            logger.error(f"Failed to publish token revocation: {e}")
+
+    async def _handle_event(self, event: dict):
+        if event.get("kind") == "tokens_revoked":
+            self._remember(event.get("token_hashes", []), False, self.ttl_seconds)
+
+    def clear(self):
+        with self._lock:
+            self._verdicts.clear()
+
+
+token_revocation_list = TokenRevocationList(
+    create_backplane(
+        settings.TOKEN_REVOCATION_BACKEND,
+        redis_url=settings.REDIS_URL,
+        channel=settings.TOKEN_REVOCATION_CHANNEL
+    ),
+    ttl_seconds=settings.TOKEN_REVOCATION_CACHE_TTL_SECONDS,
+    max_size=settings.TOKEN_REVOCATION_CACHE_SIZE
+)
@@ -0,0 +1,162 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set
+import asyncio
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Called with every event published by *other* nodes
+EventHandler = Callable[[dict], Awaitable[None]]
+
+
+class Backplane(ABC):
+    """Cross-node event bus used by ConnectionManager.
+
+    Every worker process is a node with a unique node_id. Events are JSON-serialisable
+    dicts; a node never receives its own events back.
+    """
+
+    def __init__(self, node_id: Optional[str] = None):
+        self.node_id = node_id or uuid.uuid4().hex
+        self._handler: Optional[EventHandler] = None
+
+    async def start(self, handler: EventHandler):
+        self._handler = handler
+
+    async def stop(self):
+        self._handler = None
+
+    @abstractmethod
+    async def publish(self, event: dict):
+        """Send an event to every other node"""
+
+    async def _dispatch(self, raw: str):
+        """Decode an event from the wire and hand it to the manager, dropping our own events"""
+        try:
+            event = json.loads(raw)
+        except (TypeError, ValueError):
+            logger.warning("Dropping malformed backplane event")
+            return
+        if event.get("origin") == self.node_id or self._handler is None:
+            return
+        try:
+            await self._handler(event)
+        except Exception as e:
+            logger.error(f"Error handling backplane event {event.get('kind')}: {e}")
+
+
+class InMemoryBroker:
+    """In-process pub/sub broker; lets several backplane nodes talk inside one process (tests, dev)"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set["InMemoryBackplane"]] = {}
+
+    def subscribe(self, channel: str, node: "InMemoryBackplane"):
+        self.subscribers.setdefault(channel, set()).add(node)
+
+    def unsubscribe(self, channel: str, node: "InMemoryBackplane"):
+        if channel in self.subscribers:
+            self.subscribers[channel].discard(node)
+            if not self.subscribers[channel]:
+                del self.subscribers[channel]
+
+    async def publish(self, channel: str, raw: str):
+        for node in list(self.subscribers.get(channel, ())):
+            await node._dispatch(raw)
+
+
+class InMemoryBackplane(Backplane):
+    """Backplane over an InMemoryBroker.
+
+    With its own private broker (the default) it is a single-node no-op, which is what a
+    single uvicorn worker needs. Share one broker between nodes to simulate a cluster.
+    """
+
+    def __init__(self, broker: Optional[InMemoryBroker] = None, channel: str = "ws:backplane", node_id: Optional[str] = None):
+        super().__init__(node_id)
+        self.broker = broker or InMemoryBroker()
+        self.channel = channel
+
+    async def start(self, handler: EventHandler):
+        await super().start(handler)
+        self.broker.subscribe(self.channel, self)
+
+    async def stop(self):
+        self.broker.unsubscribe(self.channel, self)
+        await super().stop()
+
+    async def publish(self, event: dict):
+        event["origin"] = self.node_id
+        await self.broker.publish(self.channel, json.dumps(event))
+
+
+class RedisBackplane(Backplane):
+    """Backplane over Redis (or any Redis-protocol server) pub/sub.
+
+    Requires the `redis` package (redis>=4.2 for redis.asyncio, listed in requirements.txt).
+    """
+
+    def __init__(self, url: str, channel: str = "ws:backplane", node_id: Optional[str] = None):
+        super().__init__(node_id)
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self, handler: EventHandler):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("The redis backplane requires the 'redis' package (pip install -r requirements.txt)") from e
+
+        await super().start(handler)
+        self._redis = aioredis.from_url(self.url, decode_responses=True)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._reader = asyncio.create_task(self._read_loop())
+        logger.info(f"Redis backplane node {self.node_id} subscribed to {self.channel}")
+
+    async def _read_loop(self):
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") == "message":
+                        await self._dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis backplane reader error, resubscribing: {e}")
+                await asyncio.sleep(1)
+
+    async def stop(self):
+        if self._reader:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._pubsub:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.close()
+            self._pubsub = None
+        if self._redis:
+            await self._redis.close()
+            self._redis = None
+        await super().stop()
+
+    async def publish(self, event: dict):
+        event["origin"] = self.node_id
+        await self._redis.publish(self.channel, json.dumps(event))
+
+
+def create_backplane(kind: str, redis_url: Optional[str] = None, channel: str = "ws:backplane") -> Backplane:
+    """Build the backplane selected in settings ("memory" or "redis")"""
+    if kind == "redis":
+        if not redis_url:
+            raise RuntimeError("WEBSOCKET_BACKPLANE=redis requires REDIS_URL")
+        return RedisBackplane(redis_url, channel=channel)
+    return InMemoryBackplane(channel=channel)
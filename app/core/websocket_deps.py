@@ -3,11 +3,18 @@ from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.db.database import SessionLocal
+from app.db.database import run_db
 from app.db.models.account import Account
 from app.core.settings import settings
+from app.core.token_revocation import token_revocation_list
 from app.schemas.account import AccountStatusEnum
 
+def get_active_account_by_username(db: Session, username: str) -> Account:
+    return db.query(Account).filter(
+        Account.username == username,
+        Account.status == AccountStatusEnum.active
+    ).first()
+
 async def get_current_user_websocket(websocket: WebSocket) -> Account:
     """Authenticate user for WebSocket connection"""
     try:
@@ -32,21 +39,19 @@ async def get_current_user_websocket(websocket: WebSocket) -> Account:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid token")
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        # Get user from database
-        db = SessionLocal()
-        try:
-            account = db.query(Account).filter(
-                Account.username == username,
-                Account.status == AccountStatusEnum.active
-            ).first()
-            
-            if account is None:
-                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="User not found or inactive")
-                raise HTTPException(status_code=401, detail="User not found or inactive")
-            
-            return account
-        finally:
-            db.close()
+        # Logged out, replaced by a newer login, or banned (a DB lookup only on a cache miss)
+        if not await run_db(token_revocation_list.is_allowed, token):
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token revoked")
+            raise HTTPException(status_code=401, detail="Token revoked")
+        
+        # Get user from database, off the event loop
+        account = await run_db(get_active_account_by_username, username)
+        
+        if account is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="User not found or inactive")
+            raise HTTPException(status_code=401, detail="User not found or inactive")
+        
+        return account
             
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -1,82 +1,371 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Set
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
 from uuid import UUID
+from collections import deque
+import asyncio
 import json
 import logging
 from datetime import datetime, timezone
 
+from app.core.settings import settings
+from app.core.websocket_backplane import Backplane, InMemoryBackplane, create_backplane
+
 logger = logging.getLogger(__name__)
 
+# Frames that may be discarded under backpressure; everything else is a must-deliver message
+DEFAULT_DROPPABLE_TYPES = frozenset({"typing_indicator"})
+
+
+class ClientConnection:
+    """One accepted WebSocket with a bounded outbound queue drained by its own writer task.
+
+    Producers only enqueue, so they never wait on a slow client. When the queue is full a
+    droppable frame (typing indicator) evicts the oldest droppable frame; a must-deliver frame
+    triggers `on_overflow`, which disconnects the client instead of buffering without bound.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: UUID,
+        max_queue_size: int,
+        send_timeout: float,
+        on_failure: Callable[["ClientConnection", str], None],
+        auto_subscribe: bool = True
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        # Follow every group the user is in; the chat endpoints subscribe each socket explicitly instead
+        self.auto_subscribe = auto_subscribe
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.queue: Deque[Tuple[str, bool]] = deque()
+        # Groups whose broadcasts this socket receives
+        self.subscriptions: Set[UUID] = set()
+        self.dropped_frames = 0
+        self.closed = False
+        self._on_failure = on_failure
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+
+    def shutdown(self):
+        """Stop the writer; queued frames are discarded"""
+        self.closed = True
+        self.queue.clear()
+        try:
+            current = asyncio.current_task()
+        except RuntimeError:
+            current = None
+        if self._writer and not self._writer.done() and self._writer is not current:
+            self._writer.cancel()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.queue)
+
+    def enqueue(self, text: str, droppable: bool = False) -> bool:
+        """Queue a pre-serialised frame; returns False if it was not accepted"""
+        if self.closed:
+            return False
+        if len(self.queue) >= self.max_queue_size:
+            if not droppable:
+                self._on_failure(self, "outbound queue overflow")
+                return False
+            for index, (_, queued_droppable) in enumerate(self.queue):
+                if queued_droppable:
+                    del self.queue[index]
+                    break
+            else:
+                # Only must-deliver frames are queued; drop the new indicator itself
+                self.dropped_frames += 1
+                return False
+            self.dropped_frames += 1
+        self.queue.append((text, droppable))
+        self._wakeup.set()
+        return True
+
+    def send_message(self, message: dict, droppable: bool = False) -> bool:
+        """Queue a frame for this socket only (connection acks, per-socket errors)"""
+        return self.enqueue(json.dumps(message), droppable)
+
+    async def _write_loop(self):
+        while not self.closed:
+            if not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            text, _ = self.queue.popleft()
+            try:
+                async with asyncio.timeout(self.send_timeout):
+                    await self.websocket.send_text(text)
+            except asyncio.TimeoutError:
+                self._on_failure(self, f"send timed out after {self.send_timeout}s")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._on_failure(self, f"send failed: {e}")
+                return
+
+
 class ConnectionManager:
-    def __init__(self):
-        # Store active connections: {user_id: WebSocket}
-        self.active_connections: Dict[UUID, WebSocket] = {}
+    def __init__(
+        self,
+        backplane: Optional[Backplane] = None,
+        send_timeout: float = 5.0,
+        max_queue_size: int = 256,
+        droppable_types: Iterable[str] = DEFAULT_DROPPABLE_TYPES
+    ):
+        # Per-frame send timeout (seconds); sockets that cannot take a frame in time are dropped
+        self.send_timeout = send_timeout
+        # Outbound frames buffered per connection before the overflow policy applies
+        self.max_queue_size = max_queue_size
+        # Message "type" values that are dropped (oldest first) rather than disconnecting on overflow
+        self.droppable_types = frozenset(droppable_types)
+        # Backpressure counters, exposed through get_queue_metrics()
+        self.dropped_frames = 0
+        self.overflow_disconnects = 0
+        self.failed_sends = 0
+        # Event loop the manager runs on, for scheduling from threadpool (sync) endpoints
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Cross-node event bus: forwards messages for users/groups connected to other workers
+        self.backplane = backplane or InMemoryBackplane()
+        # Users connected to other nodes: {node_id: Set[user_ids]}
+        self.remote_presence: Dict[str, Set[UUID]] = {}
+        # Group members connected to other nodes: {node_id: {group_id: Set[user_ids]}}
+        self.remote_group_members: Dict[str, Dict[UUID, Set[UUID]]] = {}
+        # Keep references to fire-and-forget tasks (publishes, socket closes) so they are not garbage collected
+        self._background_tasks: Set[asyncio.Task] = set()
+        # Store active connections, one per socket (tab/device): {user_id: Set[ClientConnection]}
+        self.active_connections: Dict[UUID, Set[ClientConnection]] = {}
         # Store user's friends for quick lookup: {user_id: Set[friend_ids]}
         self.user_friends: Dict[UUID, Set[UUID]] = {}
-        # Store group connections: {group_id: Set[user_ids]}
-        self.group_connections: Dict[UUID, Set[UUID]] = {}
+        # Store sockets subscribed to each group: {group_id: Set[ClientConnection]}
+        self.group_connections: Dict[UUID, Set[ClientConnection]] = {}
         # Store user's groups: {user_id: Set[group_ids]}
         self.user_groups: Dict[UUID, Set[UUID]] = {}
+        # Store connected members of each group, subscribed or not: {group_id: Set[user_ids]}
+        self.group_members: Dict[UUID, Set[UUID]] = {}
     
-    async def connect(self, websocket: WebSocket, user_id: UUID):
-        """Connect a user to the WebSocket"""
+    async def start(self):
+        """Attach to the backplane and ask the other nodes who is online"""
+        self._loop = asyncio.get_running_loop()
+        await self.backplane.start(self._handle_backplane_event)
+        await self.backplane.publish({"kind": "presence_sync"})
+        logger.info(f"WebSocket manager started on node {self.backplane.node_id}")
+
+    async def stop(self):
+        """Tell the other nodes our users are gone and detach from the backplane"""
+        try:
+            await self.backplane.publish({"kind": "node_down"})
+        except Exception as e:
+            logger.error(f"Failed to announce node shutdown: {e}")
+        await self.backplane.stop()
+
+    def submit(self, coro):
+        """Run a manager coroutine in the background from any context.
+
+        Works from async handlers and from sync endpoints running in the threadpool, where
+        asyncio.create_task() has no running loop.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            task = loop.create_task(coro)
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        elif self._loop is not None and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+        else:
+            coro.close()
+            logger.warning("WebSocket manager is not running; dropping background send")
+
+    def _publish_nowait(self, event: dict):
+        """Publish from sync code paths (disconnect) without awaiting the broker"""
+        self.submit(self.backplane.publish(event))
+
+    def _is_droppable(self, message: dict) -> bool:
+        return message.get("type") in self.droppable_types
+
+    async def _handle_backplane_event(self, event: dict):
+        """Apply an event published by another node"""
+        kind = event.get("kind")
+        origin = event.get("origin")
+
+        if kind == "user_message":
+            await self._send_text(event["text"], UUID(event["user_id"]), forward=False, droppable=event.get("droppable", False))
+        elif kind == "group_message":
+            exclude_user = UUID(event["exclude_user"]) if event.get("exclude_user") else None
+            self._send_text_to_local_group(
+                event["text"], UUID(event["group_id"]), exclude_user, droppable=event.get("droppable", False)
+            )
+        elif kind == "presence":
+            users = self.remote_presence.setdefault(origin, set())
+            user_id = UUID(event["user_id"])
+            if event.get("online"):
+                users.add(user_id)
+            else:
+                users.discard(user_id)
+                for members in self.remote_group_members.get(origin, {}).values():
+                    members.discard(user_id)
+        elif kind == "group_member":
+            members = self.remote_group_members.setdefault(origin, {}).setdefault(UUID(event["group_id"]), set())
+            if event.get("member"):
+                members.add(UUID(event["user_id"]))
+            else:
+                members.discard(UUID(event["user_id"]))
+        elif kind == "presence_sync":
+            await self.backplane.publish({
+                "kind": "presence_snapshot",
+                "user_ids": [str(user_id) for user_id in self.active_connections],
+                "group_members": {
+                    str(group_id): [str(user_id) for user_id in members]
+                    for group_id, members in self.group_members.items()
+                }
+            })
+        elif kind == "presence_snapshot":
+            self.remote_presence[origin] = {UUID(user_id) for user_id in event.get("user_ids", [])}
+            self.remote_group_members[origin] = {
+                UUID(group_id): {UUID(user_id) for user_id in user_ids}
+                for group_id, user_ids in event.get("group_members", {}).items()
+            }
+        elif kind == "node_down":
+            self.remote_presence.pop(origin, None)
+            self.remote_group_members.pop(origin, None)
+
+    def _is_remote_online(self, user_id: UUID) -> bool:
+        return any(user_id in users for users in self.remote_presence.values())
+
+    async def connect(self, websocket: WebSocket, user_id: UUID, auto_subscribe: bool = True) -> ClientConnection:
+        """Connect a socket for a user; a user may hold several (tabs, devices, chat + group sockets).
+
+        With auto_subscribe the socket receives every group the user is in; otherwise it only
+        receives the groups it subscribe()s to. Frames for this socket only go through the
+        returned connection.
+        """
         await websocket.accept()
-        self.active_connections[user_id] = websocket
-        logger.info(f"User {user_id} connected to WebSocket")
+        connection = ClientConnection(
+            websocket, user_id, self.max_queue_size, self.send_timeout, self._handle_connection_failure,
+            auto_subscribe=auto_subscribe
+        )
+        connection.start()
+        connections = self.active_connections.setdefault(user_id, set())
+        first_connection = not connections
+        connections.add(connection)
+        # A new device receives the groups the user is already in
+        if auto_subscribe:
+            for group_id in self.user_groups.get(user_id, ()):
+                self._subscribe(connection, group_id)
+        if first_connection:
+            await self.backplane.publish({"kind": "presence", "user_id": str(user_id), "online": True})
+        logger.info(f"User {user_id} connected to WebSocket ({len(connections)} open)")
+        return connection
     
-    def disconnect(self, user_id: UUID):
-        """Disconnect a user from the WebSocket"""
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-        if user_id in self.user_friends:
-            del self.user_friends[user_id]
-        if user_id in self.user_groups:
-            # Remove user from all groups
-            for group_id in list(self.user_groups[user_id]):
-                self.leave_group(user_id, group_id)
-            del self.user_groups[user_id]
+    def disconnect(self, connection: ClientConnection):
+        """Disconnect one socket; the user's friend/group state is dropped with their last socket"""
+        user_id = connection.user_id
+        connections = self.active_connections.get(user_id)
+        if not connections or connection not in connections:
+            connection.shutdown()
+            return
+        connections.discard(connection)
+        self.dropped_frames += connection.dropped_frames
+        connection.shutdown()
+        for group_id in connection.subscriptions:
+            self._unsubscribe(connection, group_id)
+        connection.subscriptions.clear()
+        if connections:
+            logger.info(f"User {user_id} closed a WebSocket ({len(connections)} still open)")
+            return
+        del self.active_connections[user_id]
+        self._publish_nowait({"kind": "presence", "user_id": str(user_id), "online": False})
+        self.user_friends.pop(user_id, None)
+        for group_id in self.user_groups.pop(user_id, ()):
+            self._remove_group_member(group_id, user_id, announce=False)
         logger.info(f"User {user_id} disconnected from WebSocket")
     
+    def _remove_group_member(self, group_id: UUID, user_id: UUID, announce: bool = True):
+        members = self.group_members.get(group_id)
+        if members is not None:
+            members.discard(user_id)
+            if not members:
+                del self.group_members[group_id]
+        # Not needed on the last disconnect: the other nodes drop the user with its presence
+        if announce:
+            self._publish_nowait({"kind": "group_member", "group_id": str(group_id), "user_id": str(user_id), "member": False})
+
+    def subscribe(self, connection: ClientConnection, group_id: UUID) -> bool:
+        """Subscribe one socket to a group's broadcasts; returns False if the user is not a member"""
+        if not self.is_group_member(connection.user_id, group_id):
+            return False
+        self._subscribe(connection, group_id)
+        return True
+
+    def unsubscribe(self, connection: ClientConnection, group_id: UUID):
+        """Stop one socket receiving a group's broadcasts; the user stays a member"""
+        connection.subscriptions.discard(group_id)
+        self._unsubscribe(connection, group_id)
+
+    def _subscribe(self, connection: ClientConnection, group_id: UUID):
+        connection.subscriptions.add(group_id)
+        self.group_connections.setdefault(group_id, set()).add(connection)
+
+    def _unsubscribe(self, connection: ClientConnection, group_id: UUID):
+        subscribers = self.group_connections.get(group_id)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.group_connections[group_id]
+
     def update_user_friends(self, user_id: UUID, friend_ids: List[UUID]):
         """Update the list of friends for a user"""
         self.user_friends[user_id] = set(friend_ids)
         logger.info(f"Updated friends for user {user_id}: {friend_ids}")
     
     def join_group(self, user_id: UUID, group_id: UUID):
-        """Add user to a group"""
-        if group_id not in self.group_connections:
-            self.group_connections[group_id] = set()
-        self.group_connections[group_id].add(user_id)
-        
+        """Add user to a group and subscribe each of their auto-subscribing sockets"""
         if user_id not in self.user_groups:
             self.user_groups[user_id] = set()
         self.user_groups[user_id].add(group_id)
+        members = self.group_members.setdefault(group_id, set())
+        if user_id not in members:
+            members.add(user_id)
+            self._publish_nowait({"kind": "group_member", "group_id": str(group_id), "user_id": str(user_id), "member": True})
+        
+        for connection in self.active_connections.get(user_id, ()):
+            if connection.auto_subscribe:
+                self._subscribe(connection, group_id)
         
         logger.info(f"User {user_id} joined group {group_id}")
     
     def leave_group(self, user_id: UUID, group_id: UUID):
-        """Remove user from a group"""
-        if group_id in self.group_connections:
-            self.group_connections[group_id].discard(user_id)
-            if not self.group_connections[group_id]:
-                del self.group_connections[group_id]
+        """Remove user from a group on all of their sockets"""
+        for connection in self.active_connections.get(user_id, ()):
+            self.unsubscribe(connection, group_id)
         
         if user_id in self.user_groups:
             self.user_groups[user_id].discard(group_id)
             if not self.user_groups[user_id]:
                 del self.user_groups[user_id]
+        self._remove_group_member(group_id, user_id)
         
         logger.info(f"User {user_id} left group {group_id}")
     
     def update_user_groups(self, user_id: UUID, group_ids: List[UUID]):
         """Update the list of groups for a user"""
-        # Remove user from all current groups
+        new_group_ids = set(group_ids)
+        # Remove user from groups they are no longer in; kept groups keep their socket subscriptions
         if user_id in self.user_groups:
-            for group_id in list(self.user_groups[user_id]):
+            for group_id in list(self.user_groups[user_id] - new_group_ids):
                 self.leave_group(user_id, group_id)
         
         # Add user to new groups
-        for group_id in group_ids:
+        for group_id in new_group_ids - self.user_groups.get(user_id, set()):
             self.join_group(user_id, group_id)
         
         logger.info(f"Updated groups for user {user_id}: {group_ids}")
@@ -89,49 +378,100 @@ class ConnectionManager:
     
     def is_group_member(self, user_id: UUID, group_id: UUID) -> bool:
         """Check if user is a member of the group"""
-        if group_id in self.group_connections:
-            return user_id in self.group_connections[group_id]
+        if user_id in self.user_groups:
+            return group_id in self.user_groups[user_id]
         return False
     
+    def _handle_connection_failure(self, connection: ClientConnection, reason: str):
+        """Overflow or send failure on a connection: unregister it and close the socket in the background"""
+        if reason == "outbound queue overflow":
+            self.overflow_disconnects += 1
+        else:
+            self.failed_sends += 1
+        logger.warning(f"Dropping WebSocket for user {connection.user_id}: {reason}")
+        # Only this socket is dropped; the user's other tabs and devices stay connected
+        self.disconnect(connection)
+        self.submit(self._close_quietly(connection.websocket))
+
+    async def _close_quietly(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+
+    async def _send_text(self, text: str, user_id: UUID, forward: bool = True, droppable: bool = False) -> bool:
+        """Queue pre-serialised text on every local socket of a user and forward it to any other node they are on"""
+        accepted = False
+        # Copy: an overflow disconnects the connection and mutates the set
+        for connection in list(self.active_connections.get(user_id, ())):
+            accepted = connection.enqueue(text, droppable) or accepted
+        # A user may hold sockets on several nodes at once
+        if forward and self._is_remote_online(user_id):
+            await self.backplane.publish({
+                "kind": "user_message", "user_id": str(user_id), "text": text, "droppable": droppable
+            })
+            accepted = True
+        return accepted
+
+    def _send_text_to_local_group(
+        self, text: str, group_id: UUID, exclude_user: UUID = None, droppable: bool = False
+    ) -> Dict[str, int]:
+        """Queue pre-serialised text on every subscribed socket on this node; counts are per socket"""
+        delivered = failed = 0
+        # Each socket is in the set once, so a member with several devices gets one frame per device
+        for connection in list(self.group_connections.get(group_id, ())):
+            if exclude_user and connection.user_id == exclude_user:
+                continue
+            if connection.enqueue(text, droppable):
+                delivered += 1
+            else:
+                failed += 1
+        return {"delivered": delivered, "failed": failed}
+
     async def send_personal_message(self, message: dict, user_id: UUID):
         """Send a message to a specific user"""
-        if user_id in self.active_connections:
-            try:
-                await self.active_connections[user_id].send_text(json.dumps(message))
-                logger.info(f"Message sent to user {user_id}")
-                return True
-            except Exception as e:
-                logger.error(f"Failed to send message to user {user_id}: {e}")
-                # Remove the connection if it's broken
-                self.disconnect(user_id)
-                return False
-        return False
+        return await self._send_text(json.dumps(message), user_id, droppable=self._is_droppable(message))
     
-    async def broadcast_to_friends(self, message: dict, sender_id: UUID):
-        """Broadcast a message to all friends of the sender"""
+    async def broadcast_to_friends(self, message: dict, sender_id: UUID) -> Dict[str, int]:
+        """Broadcast a message to every device of the sender's online friends; returns per-friend delivered/failed counts"""
         if sender_id not in self.user_friends:
-            return
+            return {"delivered": 0, "failed": 0}
         
-        sent_count = 0
+        text = json.dumps(message)
+        droppable = self._is_droppable(message)
+        result = {"delivered": 0, "failed": 0}
         for friend_id in self.user_friends[sender_id]:
-            if await self.send_personal_message(message, friend_id):
-                sent_count += 1
+            if not self.is_user_online(friend_id):
+                continue
+            if await self._send_text(text, friend_id, droppable=droppable):
+                result["delivered"] += 1
+            else:
+                result["failed"] += 1
         
-        logger.info(f"Broadcasted message from {sender_id} to {sent_count} friends")
+        logger.info(f"Broadcasted message from {sender_id} to friends: {result}")
+        return result
     
-    async def broadcast_to_group(self, message: dict, group_id: UUID, exclude_user: UUID = None):
-        """Broadcast a message to all members of a group"""
-        if group_id not in self.group_connections:
-            return
-        
-        sent_count = 0
-        for user_id in self.group_connections[group_id]:
-            if exclude_user and user_id == exclude_user:
-                continue
-            if await self.send_personal_message(message, user_id):
-                sent_count += 1
+    async def broadcast_to_group(self, message: dict, group_id: UUID, exclude_user: UUID = None) -> Dict[str, int]:
+        """Broadcast a message to all members of a group, on this node and on every other node.
+
+        Frames are queued per connection, so this never waits on a slow client. Returns
+        queued/rejected counts for the sockets connected to this node.
+        """
+        text = json.dumps(message)
+        droppable = self._is_droppable(message)
+        result = self._send_text_to_local_group(text, group_id, exclude_user, droppable=droppable)
+
+        if any(self.remote_presence.values()):
+            await self.backplane.publish({
+                "kind": "group_message",
+                "group_id": str(group_id),
+                "exclude_user": str(exclude_user) if exclude_user else None,
+                "text": text,
+                "droppable": droppable
+            })
         
-        logger.info(f"Broadcasted message to group {group_id} to {sent_count} members")
+        logger.info(f"Broadcasted message to group {group_id} local members: {result}")
+        return result
     
     def get_online_friends(self, user_id: UUID) -> List[UUID]:
         """Get list of online friends for a user"""
@@ -140,26 +480,49 @@ class ConnectionManager:
         
         online_friends = []
         for friend_id in self.user_friends[user_id]:
-            if friend_id in self.active_connections:
+            if self.is_user_online(friend_id):
                 online_friends.append(friend_id)
         
         return online_friends
     
     def get_online_group_members(self, group_id: UUID) -> List[UUID]:
-        """Get list of online members for a group"""
-        if group_id not in self.group_connections:
-            return []
-        
-        online_members = []
-        for user_id in self.group_connections[group_id]:
-            if user_id in self.active_connections:
-                online_members.append(user_id)
+        """Get list of online members for a group on any node, whether or not their sockets subscribe to it"""
+        online_members = {user_id for user_id in self.group_members.get(group_id, ()) if user_id in self.active_connections}
+        for node_id, groups in self.remote_group_members.items():
+            online_on_node = self.remote_presence.get(node_id, set())
+            online_members.update(user_id for user_id in groups.get(group_id, ()) if user_id in online_on_node)
         
-        return online_members
+        return list(online_members)
     
     def is_user_online(self, user_id: UUID) -> bool:
-        """Check if a user is currently online"""
-        return user_id in self.active_connections
+        """Check if a user is currently online on any node"""
+        return user_id in self.active_connections or self._is_remote_online(user_id)
+
+    def get_queue_metrics(self) -> dict:
+        """Outbound queue depth and backpressure counters for this node"""
+        connections = [
+            connection for user_connections in self.active_connections.values() for connection in user_connections
+        ]
+        depths = [connection.queue_depth for connection in connections]
+        return {
+            "users": len(self.active_connections),
+            "connections": len(connections),
+            "max_queue_size": self.max_queue_size,
+            "queued_frames": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "connections_over_half_full": sum(1 for depth in depths if depth * 2 >= self.max_queue_size),
+            "dropped_frames": self.dropped_frames + sum(connection.dropped_frames for connection in connections),
+            "overflow_disconnects": self.overflow_disconnects,
+            "failed_sends": self.failed_sends
+        }
 
 # Global connection manager instance
-manager = ConnectionManager() 
\ No newline at end of file
+manager = ConnectionManager(
+    create_backplane(
+        settings.WEBSOCKET_BACKPLANE,
+        redis_url=settings.REDIS_URL,
+        channel=settings.WEBSOCKET_BACKPLANE_CHANNEL
+    ),
+    send_timeout=settings.WEBSOCKET_SEND_TIMEOUT_SECONDS,
+    max_queue_size=settings.WEBSOCKET_MAX_QUEUE_SIZE
+)
\ No newline at end of file
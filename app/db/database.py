@@ -1,6 +1,78 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+import asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.settings import settings
+from app.db.pool_metrics import InstrumentedQueuePool, instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+
+def _is_pooler(url: URL) -> bool:
+    """PgBouncer-style poolers (Neon's -pooler endpoints, PgBouncer's default port) reject startup `options`"""
+    return "-pooler" in (url.host or "") or url.port == 6432
+
+
+def _engine_options(database_url: str) -> dict:
+    """Pool sizing and connection settings from Settings; SQLite keeps SQLAlchemy's defaults"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql":
+        connect_args = {
+            "connect_timeout": settings.DB_CONNECT_TIMEOUT_SECONDS,
+            "application_name": settings.DB_APPLICATION_NAME,
+        }
+        if settings.DB_STATEMENT_TIMEOUT_MS > 0 and not _is_pooler(url):
+            connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+        options["connect_args"] = connect_args
+    return options
+
+
+def _set_statement_timeout_per_transaction(engine: Engine):
+    """Through a pooler the timeout cannot be a startup option; SET LOCAL it in every transaction instead"""
+    timeout_sql = f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}"
+
+    @event.listens_for(engine, "begin")
+    def set_statement_timeout(connection):
+        connection.exec_driver_sql(timeout_sql)
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+instrument_engine(engine)
+if engine.dialect.name == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0 and _is_pooler(engine.url):
+    _set_statement_timeout_per_transaction(engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+T = TypeVar("T")
+
+# Bounded pool for blocking DB work issued from async code. Sized to the connection pool,
+# so a burst of WebSocket traffic queues here instead of blocking the event loop or
+# starving FastAPI's shared threadpool.
+db_executor = ThreadPoolExecutor(max_workers=settings.DB_THREAD_POOL_SIZE, thread_name_prefix="db")
+
+
+async def run_db(fn: Callable[..., T], *args: Any) -> T:
+    """Run fn(db, *args) with its own session on the DB thread pool and await the result.
+
+    Return plain data or Pydantic models: the session is closed before the result reaches
+    the caller, so ORM objects come back detached.
+    """
+    def call() -> T:
+        db: Session = SessionLocal()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    return await asyncio.get_running_loop().run_in_executor(db_executor, call)
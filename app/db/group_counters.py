@@ -0,0 +1,136 @@
+"""Denormalised Group.member_count (active members) and Group.message_count (live messages).
+
+The counters are kept in step by mapper events on GroupMember and GroupMessage, so every
+ORM insert / status change / soft delete / delete updates them in the same transaction,
+whichever service made the change. Bulk query.update() / query.delete() bypass the events;
+reconcile_group_counters repairs any drift:
+    python -m app.db.group_counters
+"""
+from sqlalchemy import event, func, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.models.group import Group
+from app.db.models.group_member import GroupMember, GroupMemberStatusEnum
+from app.db.models.group_message import GroupMessage
+
+groups = Group.__table__
+
+
+class GroupFullError(Exception):
+    """Raised from the flush when activating a member would exceed the group's max_members"""
+
+    def __init__(self, group_id):
+        super().__init__(f"Group {group_id} is full")
+        self.group_id = group_id
+
+
+def _is_active(status) -> bool:
+    return status == GroupMemberStatusEnum.active
+
+
+def _add_member(connection, group_id):
+    # Conditional increment: the capacity check and the reservation are one atomic statement,
+    # and the row lock serialises concurrent joins to the same group
+    result = connection.execute(
+        groups.update()
+        .where(groups.c.group_id == group_id, groups.c.member_count < groups.c.max_members)
+        .values(member_count=groups.c.member_count + 1)
+    )
+    if result.rowcount == 0:
+        raise GroupFullError(group_id)
+
+
+def _bump(connection, group_id, column: str, delta: int):
+    if group_id is None or not delta:
+        return
+    connection.execute(
+        groups.update()
+        .where(groups.c.group_id == group_id)
+        .values({column: groups.c[column] + delta})
+    )
+
+
+@event.listens_for(GroupMember, "after_insert")
+def _member_inserted(mapper, connection, target):
+    if _is_active(target.status) and target.group_id is not None:
+        _add_member(connection, target.group_id)
+
+
+@event.listens_for(GroupMember, "after_update")
+def _member_updated(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if not history.has_changes():
+        return
+    was_active = any(_is_active(status) for status in history.deleted)
+    if _is_active(target.status) and not was_active:
+        _add_member(connection, target.group_id)
+    elif was_active and not _is_active(target.status):
+        _bump(connection, target.group_id, "member_count", -1)
+
+
+@event.listens_for(GroupMember, "after_delete")
+def _member_deleted(mapper, connection, target):
+    if _is_active(target.status):
+        _bump(connection, target.group_id, "member_count", -1)
+
+
+@event.listens_for(GroupMessage, "after_insert")
+def _message_inserted(mapper, connection, target):
+    if not target.is_deleted:
+        _bump(connection, target.group_id, "message_count", 1)
+
+
+@event.listens_for(GroupMessage, "after_update")
+def _message_updated(mapper, connection, target):
+    history = inspect(target).attrs.is_deleted.history
+    if not history.has_changes():
+        return
+    was_deleted = any(history.deleted)
+    if target.is_deleted and not was_deleted:
+        _bump(connection, target.group_id, "message_count", -1)
+    elif was_deleted and not target.is_deleted:
+        _bump(connection, target.group_id, "message_count", 1)
+
+
+@event.listens_for(GroupMessage, "after_delete")
+def _message_deleted(mapper, connection, target):
+    if not target.is_deleted:
+        _bump(connection, target.group_id, "message_count", -1)
+
+
+def _actual_member_count():
+    return select(func.count(GroupMember.group_member_id)).where(
+        GroupMember.group_id == Group.group_id,
+        GroupMember.status == GroupMemberStatusEnum.active
+    ).correlate(Group).scalar_subquery()
+
+
+def _actual_message_count():
+    return select(func.count(GroupMessage.message_id)).where(
+        GroupMessage.group_id == Group.group_id,
+        GroupMessage.is_deleted == False
+    ).correlate(Group).scalar_subquery()
+
+
+def reconcile_group_counters(db: Session) -> int:
+    """Recount every group's counters from the source tables; returns the number of groups fixed"""
+    member_count, message_count = _actual_member_count(), _actual_message_count()
+    fixed = db.query(Group).filter(
+        or_(Group.member_count != member_count, Group.message_count != message_count)
+    ).update({
+        Group.member_count: member_count,
+        Group.message_count: message_count
+    }, synchronize_session=False)
+    db.commit()
+    return fixed
+
+
+def main():
+    from app.db.database import SessionLocal
+
+    with SessionLocal() as db:
+        print(f"Reconciled counters of {reconcile_group_counters(db)} group(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Index advisor: foreign keys and service-layer filter columns that no index can serve.
+
+Works on the model metadata (kept in sync with the migrations), so it needs no database:
+    python -m app.db.index_advisor
+
+Findings listed in ACCEPTED (or on an audit column) were reviewed and left unindexed on
+purpose; they are counted but not reported. Exits with status 1 when anything else is found,
+so it can run as a check. Pass --all to list the accepted findings too. Set
+DB_INDEX_ADVISOR_ON_STARTUP=true to log the same report as warnings when the API starts.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import ast
+import logging
+import sys
+
+from sqlalchemy import MetaData, Table
+
+import app.db.models  # noqa: F401  (registers every table on the metadata)
+from app.db.base_class import Base
+
+logger = logging.getLogger(__name__)
+
+SERVICES_DIR = Path(__file__).resolve().parent.parent / "services"
+
+# Query methods whose arguments are WHERE / JOIN predicates
+_FILTER_METHODS = {"filter", "where", "join", "outerjoin"}
+
+# Who created / updated / approved a row: shown on detail pages, never filtered or joined on in
+# a listing. Only deleting an account (a rare admin action) pays for the scan.
+AUDIT_COLUMNS = {"created_by", "updated_by", "approved_by", "resolved_by"}
+
+# Reviewed findings left unindexed on purpose: {(table, columns): reason}
+ACCEPTED: Dict[Tuple[str, Tuple[str, ...]], str] = {
+    ("account", ("role_id",)): "a handful of roles, which are never deleted",
+    ("account", ("status",)): "low cardinality; the username search around it cannot use a btree anyway",
+    ("material", ("unit_id",)): "small lookup table; units are deleted only by admins",
+    ("topic", ("status",)): "small table, read whole",
+    ("feedback_type", ("status",)): "small lookup table, read whole",
+    ("feedback", ("feedback_type_id",)): "low-volume admin table; dashboard counts scan it anyway",
+    ("feedback", ("created_by",)): "low-volume table; a user's own feedback list",
+    ("feedback", ("status",)): "low cardinality, admin dashboard only",
+    ("feedback", ("priority",)): "low cardinality, admin dashboard only",
+    ("comments", ("status",)): "residual predicate after the post_id / path / parent_comment_id lookup",
+    ("friend", ("status",)): "residual predicate; the join is served by the primary key and ix_friend_receiver_id_status",
+    ("groups", ("is_chat_group",)): "boolean; listings that also filter topic_id use ix_groups_topic_id_is_chat_group",
+    ("token", ("token_type",)): "residual predicate after the account_id / is_active lookup",
+}
+
+
+@dataclass
+class Finding:
+    table: str
+    columns: Tuple[str, ...]
+    reason: str  # "foreign key" or "filter"
+    locations: List[str] = field(default_factory=list)
+
+    @property
+    def accepted(self) -> bool:
+        if self.reason == "foreign key" and set(self.columns) <= AUDIT_COLUMNS:
+            return True
+        return (self.table, self.columns) in ACCEPTED
+
+    def __str__(self):
+        where = f" (used at {', '.join(self.locations[:3])}{', ...' if len(self.locations) > 3 else ''})" if self.locations else ""
+        return f"{self.table}({', '.join(self.columns)}): unindexed {self.reason}{where}"
+
+
+def _index_column_lists(table: Table) -> List[Tuple[str, ...]]:
+    """Column lists of every index on the table, including the primary key and unique constraints"""
+    lists = []
+    if table.primary_key.columns:
+        lists.append(tuple(column.name for column in table.primary_key.columns))
+    for index in table.indexes:
+        lists.append(tuple(column.name for column in index.columns))
+    for constraint in table.constraints:
+        if constraint.__class__.__name__ == "UniqueConstraint":
+            lists.append(tuple(column.name for column in constraint.columns))
+    return lists
+
+
+def unindexed_foreign_keys(metadata: MetaData = Base.metadata) -> List[Finding]:
+    """Foreign keys whose columns are not the leading columns of any index.
+
+    Without one, joins from the parent and ON DELETE CASCADE / RESTRICT checks scan the table.
+    """
+    findings = []
+    for table in metadata.tables.values():
+        indexed = _index_column_lists(table)
+        for constraint in table.foreign_key_constraints:
+            columns = tuple(column.name for column in constraint.columns)
+            if not any(set(candidate[:len(columns)]) == set(columns) for candidate in indexed):
+                findings.append(Finding(table.name, columns, "foreign key"))
+    return findings
+
+
+def _table_lookup(metadata: MetaData) -> Dict[str, Table]:
+    """Names the services use to reference tables: mapped class names and Table variables"""
+    lookup = {mapper.class_.__name__: mapper.local_table for mapper in Base.registry.mappers}
+    lookup.update(metadata.tables)
+    return lookup
+
+
+def _column_reference(node: ast.AST, tables: Dict[str, Table]) -> Optional[Tuple[Table, str]]:
+    """Resolve `Model.column` or `table.c.column` to (table, column name)"""
+    if not isinstance(node, ast.Attribute):
+        return None
+    owner = node.value
+    if isinstance(owner, ast.Attribute) and owner.attr == "c":
+        owner = owner.value
+    if isinstance(owner, ast.Name) and owner.id in tables and node.attr in tables[owner.id].c:
+        return tables[owner.id], node.attr
+    return None
+
+
+def _filtered_columns(predicates: Sequence[ast.AST], tables: Dict[str, Table]) -> Dict[Table, Set[str]]:
+    """Columns compared (==, <, IN, ...) anywhere inside one filter() argument list.
+
+    LIKE / ILIKE are left out: a btree index cannot serve a '%keyword%' search anyway.
+    """
+    found: Dict[Table, Set[str]] = {}
+    for node in (inner for predicate in predicates for inner in ast.walk(predicate)):
+        operands = []
+        if isinstance(node, ast.Compare):
+            operands = [node.left, *node.comparators]
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in ("in_", "between", "is_"):
+            operands = [node.func.value]
+        for operand in operands:
+            reference = _column_reference(operand, tables)
+            if reference:
+                found.setdefault(reference[0], set()).add(reference[1])
+    return found
+
+
+def unindexed_filters(paths: Iterable[Path] = (), metadata: MetaData = Base.metadata) -> List[Finding]:
+    """Column sets filtered on in the service layer where no index leads with any of those columns"""
+    tables = _table_lookup(metadata)
+    findings: Dict[Tuple[str, Tuple[str, ...]], Finding] = {}
+    for path in sorted(paths or SERVICES_DIR.rglob("*.py")):
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in _FILTER_METHODS):
+                continue
+            for table, columns in _filtered_columns(node.args, tables).items():
+                leading = {candidate[0] for candidate in _index_column_lists(table) if candidate}
+                if leading & columns:
+                    continue
+                key = (table.name, tuple(sorted(columns)))
+                finding = findings.setdefault(key, Finding(table.name, key[1], "filter"))
+                finding.locations.append(f"{path.name}:{node.lineno}")
+    return list(findings.values())
+
+
+def advise(paths: Sequence[Path] = ()) -> List[Finding]:
+    return unindexed_foreign_keys() + unindexed_filters(paths)
+
+
+def log_report():
+    """Log every finding that was not accepted as a warning (used on startup)"""
+    for finding in advise():
+        if not finding.accepted:
+            logger.warning(f"Index advisor: {finding}")
+
+
+def main():
+    show_all = "--all" in sys.argv[1:]
+    findings = advise()
+    reported = [finding for finding in findings if not finding.accepted]
+    for finding in findings if show_all else reported:
+        print(f"{finding}{' [accepted]' if finding.accepted else ''}")
+    print(f"{len(reported)} finding(s), {len(findings) - len(reported)} accepted")
+    sys.exit(1 if reported else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@ from app.db.models.step import Step
 from app.db.models.feedback import Feedback
 from app.db.models.feedback_type import FeedbackType
 from app.db.models.message import Message
+from app.db.models.email_job import EmailJob
 
 __all__ = [
     "Account",
@@ -45,5 +46,9 @@ __all__ = [
     "Step",
     "Feedback",
     "FeedbackType",
-    "Message"
-]
\ No newline at end of file
+    "Message",
+    "EmailJob"
+]
+
+# Group member / message counter maintenance (mapper events)
+import app.db.group_counters  # noqa: E402,F401
\ No newline at end of file
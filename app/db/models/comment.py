@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 import enum
 from datetime import datetime, timezone
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy import event
+from typing import Optional, Tuple
 import uuid
 
 class CommentStatusEnum(str, enum.Enum):
@@ -12,8 +13,36 @@ class CommentStatusEnum(str, enum.Enum):
     reported = "reported"
     deleted = "deleted"
 
+# Materialised path: the 32-char hex ids of every ancestor, then the comment's own, with no
+# separator. Compared byte-wise (C / BINARY collation) each subtree is one contiguous range.
+COMMENT_PATH_SEGMENT_LENGTH = 32
+
+def comment_path(comment_id: uuid.UUID, parent_path: Optional[str] = None) -> str:
+    return (parent_path or "") + comment_id.hex
+
+def comment_subtree_range(path: str) -> Tuple[str, str]:
+    """(low, high) bounds such that every strict descendant d of `path` has low < d.path < high"""
+    # Segments only use [0-9a-f]; 'g' sorts after all of them
+    return path, path + "g"
+
+def comment_path_ids(path: str) -> list:
+    """Comment ids along a path, root first"""
+    return [
+        uuid.UUID(path[start:start + COMMENT_PATH_SEGMENT_LENGTH])
+        for start in range(0, len(path), COMMENT_PATH_SEGMENT_LENGTH)
+    ]
+
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # Comment tree of a post, oldest first
+        Index("ix_comments_post_id_created_at", "post_id", "created_at"),
+        # Subtree / thread range scans
+        Index("ix_comments_path", "path", unique=True),
+        # Replies of a comment (and the ON DELETE CASCADE from the parent)
+        Index("ix_comments_parent_comment_id", "parent_comment_id"),
+        Index("ix_comments_account_id", "account_id"),
+    )
 
     comment_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     post_id = Column(UUID, ForeignKey("post.post_id", ondelete="CASCADE"), nullable=False)
@@ -23,6 +52,7 @@ class Comment(Base):
     status = Column(Enum(CommentStatusEnum), default=CommentStatusEnum.active)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     level = Column(Integer, default=1)  # Track nesting level
+    path = Column(Text().with_variant(Text(collation="C"), "postgresql"), nullable=False)  # see comment_path
 
     # Relationships
     post = relationship("Post", back_populates="comments")
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base_class import Base
+from datetime import datetime, timezone
+import enum
+import uuid
+
+class EmailJobStatusEnum(str, enum.Enum):
+    pending = "pending"  # waiting for (another) attempt at next_attempt_at
+    sending = "sending"  # claimed by a worker; reclaimable once next_attempt_at (the lease) has passed
+    sent = "sent"
+    dead = "dead"  # out of attempts or permanently rejected; see last_error
+
+class EmailJob(Base):
+    """Outbox row: an email is committed with the request that caused it and sent by app.core.email_outbox"""
+    __tablename__ = "email_job"
+    __table_args__ = (
+        # Due jobs for the workers
+        Index("ix_email_job_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    subtype = Column(String, nullable=False, default="html")  # "html" or "plain"
+    status = Column(Enum(EmailJobStatusEnum), nullable=False, default=EmailJobStatusEnum.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    sent_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -7,6 +7,9 @@ import uuid
 
 class Favourite(Base):
     __tablename__ = "favourites"
+    __table_args__ = (
+        Index("ix_favourites_account_id", "account_id"),
+    )
 
     favourite_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     account_id = Column(UUID(as_uuid=True), ForeignKey("account.account_id", ondelete="CASCADE"), nullable=False)
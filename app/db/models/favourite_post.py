@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, ForeignKey, DateTime
+from sqlalchemy import Table, Column, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base_class import Base
 from datetime import datetime, timezone
@@ -8,5 +8,7 @@ favourite_posts = Table(
     Base.metadata,
     Column("favourite_id", UUID(as_uuid=True), ForeignKey("favourites.favourite_id", ondelete="CASCADE"), primary_key=True),
     Column("post_id", UUID(as_uuid=True), ForeignKey("post.post_id", ondelete="CASCADE"), primary_key=True),
-    Column("created_at", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    Column("created_at", DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)),
+    # Reverse lookup and the ON DELETE CASCADE from post; favourite_id is already the leading primary key column
+    Index("ix_favourite_posts_post_id", "post_id")
 ) 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -13,6 +13,10 @@ class FriendStatusEnum(str, enum.Enum):
 
 class Friend(Base):
     __tablename__ = "friend"
+    __table_args__ = (
+        # Requests received by a user; the primary key only serves sender_id first
+        Index("ix_friend_receiver_id_status", "receiver_id", "status"),
+    )
 
     sender_id = Column(UUID(as_uuid=True), ForeignKey("account.account_id", ondelete="CASCADE"), primary_key=True)
     receiver_id = Column(UUID(as_uuid=True), ForeignKey("account.account_id", ondelete="CASCADE"), primary_key=True)
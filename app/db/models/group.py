@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, UUID, Boolean, Text, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey, UUID, Boolean, Text, Integer, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 import uuid
@@ -6,6 +6,12 @@ from datetime import datetime, timezone
 
 class Group(Base):
     __tablename__ = "groups"
+    __table_args__ = (
+        # A topic's groups and its chat group (group chat listings, one chat group per topic)
+        Index("ix_groups_topic_id_is_chat_group", "topic_id", "is_chat_group"),
+        # Groups led by an account
+        Index("ix_groups_group_leader", "group_leader"),
+    )
 
     group_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     topic_id = Column(UUID(as_uuid=True), ForeignKey("topic.topic_id"), nullable=False)
@@ -16,6 +22,9 @@ class Group(Base):
     max_members = Column(Integer, default=50, nullable=False)  # Số thành viên tối đa
     is_chat_group = Column(Boolean, default=False, nullable=False)  # Đánh dấu là chat group
     is_active = Column(Boolean, default=True, nullable=False)  # Trạng thái hoạt động của group
+    # Denormalised counters, maintained by app.db.group_counters
+    member_count = Column(Integer, default=0, server_default="0", nullable=False)  # Active members
+    message_count = Column(Integer, default=0, server_default="0", nullable=False)  # Messages not deleted
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy.orm import column_property, relationship
 from app.db.base_class import Base
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import UUID
@@ -20,12 +20,23 @@ class GroupMemberStatusEnum(str, enum.Enum):
 
 class GroupMember(Base):
     __tablename__ = "group_members"
+    __table_args__ = (
+        # Active members of a group, and membership checks (group_id, account_id[, status])
+        Index("ix_group_members_group_id_status_account_id", "group_id", "status", "account_id"),
+        # Groups of a user
+        Index("ix_group_members_account_id_status", "account_id", "status"),
+    )
 
     group_member_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     account_id = Column(UUID(as_uuid=True), ForeignKey("account.account_id"))
     group_id = Column(UUID(as_uuid=True), ForeignKey("groups.group_id"))
     role = Column(SQLEnum(GroupMemberRoleEnum), default=GroupMemberRoleEnum.member, nullable=False)
-    status = Column(SQLEnum(GroupMemberStatusEnum), default=GroupMemberStatusEnum.active, nullable=False)
+    # active_history: the member_count events (app.db.group_counters) need the old status even
+    # when the row was expired by a commit before the assignment
+    status = column_property(
+        Column(SQLEnum(GroupMemberStatusEnum), default=GroupMemberStatusEnum.active, nullable=False),
+        active_history=True
+    )
     joined_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Text, Boolean, Enum
+from sqlalchemy import Column, ForeignKey, DateTime, Text, Boolean, Enum, Index, text
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship
 import enum
 import uuid
 from datetime import datetime, timezone
@@ -13,13 +13,21 @@ class GroupMessageStatusEnum(str, enum.Enum):
 
 class GroupMessage(Base):
     __tablename__ = "group_message"
+    __table_args__ = (
+        # Group history: live messages of one group in time order
+        Index(
+            "ix_group_message_group_id_created_at", "group_id", "created_at",
+            postgresql_where=text("is_deleted = false"), sqlite_where=text("is_deleted = 0")
+        ),
+    )
 
     message_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     group_id = Column(UUID(as_uuid=True), ForeignKey("groups.group_id", ondelete="CASCADE"), nullable=False, index=True)
     sender_id = Column(UUID(as_uuid=True), ForeignKey("account.account_id", ondelete="CASCADE"), nullable=False, index=True)
     content = Column(Text, nullable=False)
     status = Column(Enum(GroupMessageStatusEnum), default=GroupMessageStatusEnum.sent, nullable=False)
-    is_deleted = Column(Boolean, default=False, nullable=False)
+    # active_history: the message_count events (app.db.group_counters) need the old value
+    is_deleted = column_property(Column(Boolean, default=False, nullable=False), active_history=True)
     
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Text, Boolean, Enum
+from sqlalchemy import Column, ForeignKey, DateTime, Text, Boolean, Enum, String, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -11,12 +11,35 @@ class MessageStatusEnum(str, enum.Enum):
     delivered = "delivered"
     read = "read"
 
+def conversation_key_for(user_a, user_b) -> str:
+    """Order-independent key shared by both directions of a DM conversation"""
+    low, high = sorted((str(user_a), str(user_b)))
+    return f"{low}:{high}"
+
+def _default_conversation_key(context) -> str:
+    params = context.get_current_parameters()
+    return conversation_key_for(params["sender_id"], params["receiver_id"])
+
 class Message(Base):
     __tablename__ = "message"
+    __table_args__ = (
+        # DM history / search: one range scan per conversation, newest first
+        Index(
+            "ix_message_conversation_key_created_at", "conversation_key", "created_at",
+            postgresql_where=text("is_deleted = false"), sqlite_where=text("is_deleted = 0")
+        ),
+        # Unread count and mark-read watermark: only unread rows are indexed, so it stays small
+        Index(
+            "ix_message_unread_receiver_sender_created_at", "receiver_id", "sender_id", "created_at",
+            postgresql_where=text("status <> 'read' AND is_deleted = false"),
+            sqlite_where=text("status <> 'read' AND is_deleted = 0")
+        ),
+    )
 
     message_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     sender_id = Column(UUID(as_uuid=True), ForeignKey("account.account_id", ondelete="CASCADE"), nullable=False, index=True)
     receiver_id = Column(UUID(as_uuid=True), ForeignKey("account.account_id", ondelete="CASCADE"), nullable=False, index=True)
+    conversation_key = Column(String(73), nullable=False, default=_default_conversation_key)
     content = Column(Text, nullable=False)
     status = Column(Enum(MessageStatusEnum), default=MessageStatusEnum.sent, nullable=False)
     is_deleted = Column(Boolean, default=False, nullable=False)
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 import enum
 import uuid
-from sqlalchemy import Column, String, Enum, ForeignKey, Text, DateTime
+from sqlalchemy import Column, String, Enum, ForeignKey, Text, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
@@ -22,6 +22,12 @@ class PostStatusEnum(str, enum.Enum):
 
 class Post(Base):
     __tablename__ = "post"
+    __table_args__ = (
+        # Keyset pagination indexes for feeds ordered by (created_at, post_id) DESC
+        Index("ix_post_created_at_post_id", "created_at", "post_id"),
+        Index("ix_post_status_created_at_post_id", "status", "created_at", "post_id"),
+        Index("ix_post_created_by_created_at_post_id", "created_by", "created_at", "post_id"),
+    )
 
     post_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(300), nullable=False)
@@ -35,6 +41,9 @@ class Post(Base):
     created_by = Column(UUID(as_uuid=True), ForeignKey("account.account_id"), nullable=True)
     updated_by = Column(UUID(as_uuid=True), ForeignKey("account.account_id"), nullable=True)
 
+    # Normalised title/content/steps/ingredients text, maintained by post_search_service
+    search_document = Column(Text, nullable=True)
+
     # Relationships
     tags = relationship(Tag, secondary=post_tag, back_populates="posts")
     steps = relationship("Step", back_populates="post", cascade="all, delete-orphan",order_by="Step.order_number")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, UUID
+from sqlalchemy import Column, String, ForeignKey, DateTime, UUID, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 import uuid
@@ -6,6 +6,9 @@ from datetime import datetime, timezone
 
 class PostImage(Base):
     __tablename__ = "post_image"
+    __table_args__ = (
+        Index("ix_post_image_post_id", "post_id"),
+    )
 
     image_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     post_id = Column(UUID(as_uuid=True), ForeignKey("post.post_id"), nullable=False)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, ForeignKey, Float, String
+from sqlalchemy import Column, ForeignKey, Float, String, Index
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base_class import Base
 from sqlalchemy.orm import relationship
 
 class PostMaterial(Base):
     __tablename__ = "post_material"
+    __table_args__ = (
+        # Reverse lookup (posts using a material); the primary key only serves post_id first
+        Index("ix_post_material_material_id", "material_id"),
+    )
 
     post_id = Column(UUID(as_uuid=True), ForeignKey("post.post_id"), primary_key=True)
     material_id = Column(UUID(as_uuid=True), ForeignKey("material.material_id"), primary_key=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, ForeignKey
+from sqlalchemy import Table, Column, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base_class import Base
 from sqlalchemy.orm import relationship
@@ -8,4 +8,6 @@ post_tag = Table(
     Base.metadata,
     Column("post_id", UUID(as_uuid=True), ForeignKey("post.post_id"), primary_key=True),
     Column("tag_id", UUID(as_uuid=True), ForeignKey("tag.tag_id"), primary_key=True),
+    # Reverse lookup (posts of a tag); the primary key only serves post_id first
+    Index("ix_post_tag_tag_id_post_id", "tag_id", "post_id"),
 )
\ No newline at end of file
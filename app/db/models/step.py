@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text
+from sqlalchemy import Column, Integer, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -6,6 +6,10 @@ from app.db.base_class import Base
 
 class Step(Base):
     __tablename__ = "step"
+    __table_args__ = (
+        # Steps of a post in order
+        Index("ix_step_post_id_order_number", "post_id", "order_number"),
+    )
 
     step_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     post_id = Column(UUID(as_uuid=True), ForeignKey("post.post_id", ondelete="CASCADE"))
@@ -1,15 +1,36 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base_class import Base
 from datetime import datetime, timezone
+import hashlib
 import uuid
 
+def token_hash_for(token: str) -> str:
+    """Fixed-width lookup key for a token string (hex SHA-256)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _default_token_hash(context) -> str:
+    return token_hash_for(context.get_current_parameters()["access_token"])
+
 class Token(Base):
     __tablename__ = "token"
+    __table_args__ = (
+        # Active tokens of an account (login, logout, password reset)
+        Index("ix_token_account_id_is_active", "account_id", "is_active"),
+        # Token lookups (auth, logout, password reset) by hash instead of the raw JWT
+        Index("ix_token_token_hash", "token_hash", unique=True),
+        # Sweeper (TokenService.purge_tokens): expired rows, then deactivated ones
+        Index("ix_token_expires_at", "expires_at"),
+        Index(
+            "ix_token_inactive_created_at", "created_at",
+            postgresql_where=text("is_active = false"), sqlite_where=text("is_active = 0")
+        ),
+    )
 
     token_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     account_id = Column(UUID(as_uuid=True), ForeignKey("account.account_id"), nullable=False)
     access_token = Column(String, nullable=False)
+    token_hash = Column(String(64), nullable=False, default=_default_token_hash)  # token_hash_for(access_token)
     refresh_token = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,116 @@
+from typing import Dict, List
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool
+
+# Upper bounds (milliseconds) of the checkout-wait histogram buckets; the last bucket is +Inf
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """Checkout-wait histogram and connection lifecycle counters for one engine's pool"""
+
+    def __init__(self, buckets_ms=CHECKOUT_WAIT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.bucket_counts: List[int] = [0] * (len(self.buckets_ms) + 1)
+            self.wait_count = 0
+            self.wait_sum_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.checkout_timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+
+    def observe_checkout_wait(self, wait_ms: float):
+        index = len(self.buckets_ms)
+        for position, bound in enumerate(self.buckets_ms):
+            if wait_ms <= bound:
+                index = position
+                break
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.wait_count += 1
+            self.wait_sum_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+    def record_timeout(self):
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool: Pool) -> Dict:
+        """Current gauges from the pool plus the counters collected since start (or reset)"""
+        with self._lock:
+            cumulative = 0
+            buckets = []
+            # Cumulative counts, Prometheus style: each bucket counts waits <= its bound
+            for bound, count in zip(list(self.buckets_ms) + ["+Inf"], self.bucket_counts):
+                cumulative += count
+                buckets.append({"le_ms": bound, "count": cumulative})
+            checkout_wait = {
+                "count": self.wait_count,
+                "sum_ms": round(self.wait_sum_ms, 3),
+                "avg_ms": round(self.wait_sum_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                "max_ms": round(self.wait_max_ms, 3),
+                "buckets": buckets
+            }
+            counters = {
+                "checkout_timeouts": self.checkout_timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations
+            }
+
+        gauges = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            gauges.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout()
+            })
+        return {"pool": gauges, "checkout_wait": checkout_wait, **counters}
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout, including waiting for a free connection,
+    opening an overflow connection and the pre-ping"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        finally:
+            pool_metrics.observe_checkout_wait((time.perf_counter() - start) * 1000)
+
+
+def instrument_engine(engine: Engine):
+    """Count new and invalidated (stale, pre-ping failed) connections on an engine"""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool_metrics.record_connect()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.record_invalidation()
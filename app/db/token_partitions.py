@@ -0,0 +1,133 @@
+"""Optional monthly RANGE partitioning of the token table by expires_at (PostgreSQL only).
+
+Lookups are already O(log n) through ix_token_token_hash. Partitioning keeps every index
+small, lets the `expires_at > now()` filter of TokenService.get_active_token prune past
+months, and makes expiry free: a month of expired tokens is a DROP TABLE, not a DELETE.
+
+    python -m app.db.token_partitions convert   # one-off, in a maintenance window
+    python -m app.db.token_partitions maintain  # create upcoming months, drop expired ones
+
+With TOKEN_PARTITIONING=true the token sweeper runs `maintain` on every pass. On the
+partitioned table the primary key and the token_hash unique index include expires_at, as
+PostgreSQL requires; the ORM keeps addressing rows by token_id.
+"""
+from datetime import datetime, timezone
+from typing import List
+import re
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.settings import settings
+
+_PARTITION_NAME = re.compile(r"^token_p(\d{4})(\d{2})$")
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def is_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(connection.execute(
+        text("SELECT count(*) FROM pg_partitioned_table WHERE partrelid = to_regclass('token')")
+    ).scalar())
+
+
+def _partitions(connection: Connection) -> List[str]:
+    return list(connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('token')"
+    )).scalars())
+
+
+def create_partitions(connection: Connection, months_ahead: int = settings.TOKEN_PARTITION_MONTHS_AHEAD) -> int:
+    """Make sure this month and the next `months_ahead` months have a partition; returns how many were created"""
+    existing = set(_partitions(connection))
+    month, created = _month_start(datetime.now(timezone.utc)), 0
+    for _ in range(months_ahead + 1):
+        name = f"token_p{month:%Y%m}"
+        if name not in existing:
+            connection.execute(text(
+                f"CREATE TABLE {name} PARTITION OF token "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+            ))
+            created += 1
+        month = _next_month(month)
+    return created
+
+
+def drop_expired_partitions(connection: Connection) -> int:
+    """Drop the partitions whose every token has expired; returns how many were dropped"""
+    current, dropped = _month_start(datetime.now(timezone.utc)), 0
+    for name in _partitions(connection):
+        match = _PARTITION_NAME.match(name)
+        if match and datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc) < current:
+            connection.execute(text(f"DROP TABLE {name}"))
+            dropped += 1
+    return dropped
+
+
+def maintain(connection: Connection) -> dict:
+    return {"created": create_partitions(connection), "dropped": drop_expired_partitions(connection)}
+
+
+def convert(connection: Connection):
+    """Replace the token table with a partitioned one holding its unexpired rows (expired rows are dropped)"""
+    connection.execute(text("ALTER TABLE token RENAME TO token_unpartitioned"))
+    for index in ("ix_token_account_id_is_active", "ix_token_token_hash", "ix_token_expires_at", "ix_token_inactive_created_at"):
+        connection.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    connection.execute(text(
+        "CREATE TABLE token (LIKE token_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (expires_at)"
+    ))
+    # Named: the renamed table still owns the token_pkey index
+    connection.execute(text("ALTER TABLE token ADD CONSTRAINT token_partitioned_pkey PRIMARY KEY (token_id, expires_at)"))
+    connection.execute(text(
+        "ALTER TABLE token ADD FOREIGN KEY (account_id) REFERENCES account (account_id)"
+    ))
+    # Catches anything beyond the pre-created months (e.g. a longer token lifetime); keep it empty
+    connection.execute(text("CREATE TABLE token_default PARTITION OF token DEFAULT"))
+    create_partitions(connection)
+    connection.execute(text("INSERT INTO token SELECT * FROM token_unpartitioned WHERE expires_at > now()"))
+    connection.execute(text("DROP TABLE token_unpartitioned"))
+
+    connection.execute(text("CREATE INDEX ix_token_account_id_is_active ON token (account_id, is_active)"))
+    connection.execute(text("CREATE UNIQUE INDEX ix_token_token_hash ON token (token_hash, expires_at)"))
+    connection.execute(text("CREATE INDEX ix_token_expires_at ON token (expires_at)"))
+    connection.execute(text(
+        "CREATE INDEX ix_token_inactive_created_at ON token (created_at) WHERE is_active = false"
+    ))
+
+
+def main():
+    from app.db.database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "maintain"
+    if engine.dialect.name != "postgresql":
+        print("Token partitioning needs PostgreSQL")
+        sys.exit(1)
+    with engine.begin() as connection:
+        if command == "convert":
+            if is_partitioned(connection):
+                print("The token table is already partitioned")
+                return
+            convert(connection)
+            print(f"Token table partitioned: {', '.join(sorted(_partitions(connection)))}")
+        elif command == "maintain":
+            if not is_partitioned(connection):
+                print("The token table is not partitioned (run: python -m app.db.token_partitions convert)")
+                sys.exit(1)
+            print(maintain(connection))
+        else:
+            print(f"Unknown command {command!r} (convert, maintain)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -44,6 +44,64 @@ with SessionLocal() as db:
 from app.apis.v1 import base as api_v1
 app.include_router(api_v1.api_router, prefix=settings.API_V1_STR)
 
+# WebSocket backplane (cross-worker chat delivery and presence)
+from app.core.websocket_manager import manager as websocket_manager
+
+@app.on_event("startup")
+async def start_websocket_manager():
+    await websocket_manager.start()
+
+# Token revocations pushed between workers
+from app.core.token_revocation import token_revocation_list
+
+@app.on_event("startup")
+async def start_token_revocation_list():
+    await token_revocation_list.start()
+
+@app.on_event("shutdown")
+async def stop_token_revocation_list():
+    await token_revocation_list.stop()
+
+# Email outbox workers (registration / password reset emails are sent from here)
+from app.core.email_outbox import outbox as email_outbox
+
+@app.on_event("startup")
+def precompile_email_templates():
+    from app.services.email_service import precompile_email_templates as compile_templates
+
+    compile_templates()
+
+if settings.EMAIL_OUTBOX_ENABLED:
+    @app.on_event("startup")
+    async def start_email_outbox():
+        await email_outbox.start()
+
+    @app.on_event("shutdown")
+    async def stop_email_outbox():
+        await email_outbox.stop()
+
+# Periodic maintenance (token sweeper)
+from app.core.scheduler import start_scheduler, stop_scheduler
+
+@app.on_event("startup")
+def start_maintenance_scheduler():
+    start_scheduler()
+
+@app.on_event("shutdown")
+def stop_maintenance_scheduler():
+    stop_scheduler()
+
+if settings.DB_INDEX_ADVISOR_ON_STARTUP:
+    from app.db.index_advisor import log_report as log_index_report
+
+    @app.on_event("startup")
+    def run_index_advisor():
+        log_index_report()
+
+@app.on_event("shutdown")
+async def stop_websocket_manager():
+    await websocket_manager.stop()
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
@@ -35,6 +35,9 @@ class CommentInDBBase(CommentBase):
     level: int
     account: Optional[AccountInfo] = None
     replies: Optional[List['Comment']] = None
+    # Set by the tree loaders: visible direct replies, and where to continue when not all were loaded
+    reply_count: Optional[int] = None
+    next_replies_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
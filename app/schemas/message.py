@@ -44,6 +44,31 @@ class MessageList(BaseModel):
     skip: int
     limit: int
 
+class ConversationLastMessage(BaseModel):
+    message_id: UUID
+    sender_id: UUID
+    content: str
+    status: MessageStatusEnum
+    created_at: datetime
+
+class ConversationSummary(BaseModel):
+    """One friend conversation in the chat inbox"""
+    friend: "AccountSummary"
+    last_message: Optional[ConversationLastMessage] = None
+    unread_count: int = 0
+    last_activity_at: Optional[datetime] = None
+
+class ConversationSummaryList(BaseModel):
+    conversations: List[ConversationSummary]
+    total_unread: int
+
+class ReadWatermarkOut(BaseModel):
+    """Result of marking a conversation read up to a watermark"""
+    friend_id: UUID
+    up_to: datetime
+    up_to_message_id: Optional[UUID] = None
+    updated: int
+
 class ChatHistoryRequest(BaseModel):
     friend_id: UUID = Field(..., description="ID of the friend to get chat history with")
     skip: int = Field(0, ge=0, description="Number of messages to skip")
@@ -10,7 +10,6 @@ from app.schemas.material import MaterialOut
 from app.schemas.topic import TopicOut
 from app.schemas.step import StepCreate, StepOut
 from app.schemas.post_material import PostMaterialCreate, PostMaterialOut
-from app.schemas.common import AccountSummary
 import logging
 logger = logging.getLogger(__name__)
 
@@ -114,37 +113,20 @@ class PostOut(BaseModel):
     # Replace from_orm with a custom method that works with model_validate
     @classmethod
     def from_db_model(cls, db_obj):
-        logger.info(f"Converting post {db_obj.post_id} to PostOut")
-        
-        # Convert creator info
-        creator = None
-        if hasattr(db_obj, 'creator') and db_obj.creator:
-            creator = AccountSummary.model_validate(db_obj.creator)
-        
         # Convert steps
         steps = [StepOut.model_validate(step) for step in sorted(db_obj.steps, key=lambda x: x.order_number)]
-        
-        # Convert tags to TagOut
-        tags = [TagOut.model_validate(tag) for tag in db_obj.tags]
-        logger.info(f"Converted {len(tags)} tags")
 
-        # Convert topics to TopicOut
+        # Convert tags, topics and images
+        tags = [TagOut.model_validate(tag) for tag in db_obj.tags]
         topics = [TopicOut.model_validate(topic) for topic in db_obj.topics]
-        logger.info(f"Converted {len(topics)} topics")
-
-        # Convert images to PostImageOut
         images = [PostImageOut.model_validate(image) for image in db_obj.images]
-        logger.info(f"Converted {len(images)} images")
 
         # Convert materials
-        materials = []
-        for pm in getattr(db_obj, 'post_materials', []):
-            if hasattr(pm, 'material') and pm.material is not None:
-                material_out = PostMaterialOut.from_sqlalchemy(pm)
-                materials.append(material_out)
-        
-        logger.info(f"Final materials in PostOut: {materials}")
-        logger.info(f"Materials count: {len(materials)}")
+        materials = [
+            PostMaterialOut.from_sqlalchemy(pm)
+            for pm in getattr(db_obj, 'post_materials', [])
+            if getattr(pm, 'material', None) is not None
+        ]
 
         # Convert user relationships
         creator = UserInfoOut.model_validate(db_obj.creator) if db_obj.creator else None
@@ -173,4 +155,97 @@ class PostOut(BaseModel):
             "materials": materials
         }
 
-        return cls.model_validate(obj_dict)
\ No newline at end of file
+        return cls.model_validate(obj_dict)
+
+
+def _user_info_dict(account) -> Optional[Dict[str, Any]]:
+    if account is None:
+        return None
+    return {
+        "account_id": account.account_id,
+        "username": account.username,
+        "full_name": account.full_name,
+        "avatar": account.avatar
+    }
+
+
+def serialize_post(db_obj) -> Dict[str, Any]:
+    """Build the PostOut-shaped response dict for an already-loaded post without validating it"""
+    return {
+        "post_id": db_obj.post_id,
+        "title": db_obj.title,
+        "content": db_obj.content,
+        "status": db_obj.status,
+        "rejection_reason": db_obj.rejection_reason,
+        "created_at": db_obj.created_at,
+        "updated_at": db_obj.updated_at,
+        "created_by": db_obj.created_by,
+        "updated_by": db_obj.updated_by,
+        "approved_by": db_obj.approved_by,
+        "creator": _user_info_dict(db_obj.creator),
+        "updater": _user_info_dict(db_obj.updater),
+        "approver": _user_info_dict(db_obj.approver),
+        "tags": [
+            {
+                "tag_id": tag.tag_id,
+                "name": tag.name,
+                "status": tag.status,
+                "created_at": tag.created_at,
+                "updated_at": tag.updated_at,
+                "created_by": tag.created_by,
+                "updated_by": tag.updated_by
+            }
+            for tag in db_obj.tags
+        ],
+        "steps": [
+            {"step_id": step.step_id, "order_number": step.order_number, "content": step.content}
+            for step in sorted(db_obj.steps, key=lambda x: x.order_number)
+        ],
+        "topics": [
+            {
+                "topic_id": topic.topic_id,
+                "name": topic.name,
+                "status": topic.status,
+                "created_at": topic.created_at,
+                "updated_at": topic.updated_at
+            }
+            for topic in db_obj.topics
+        ],
+        "images": [
+            {
+                "image_id": image.image_id,
+                "image_url": image.image_url,
+                "created_at": image.created_at,
+                "updated_at": image.updated_at
+            }
+            for image in db_obj.images
+        ],
+        "materials": [
+            {
+                "material_id": pm.material.material_id,
+                "material_name": pm.material.name,
+                "unit": pm.unit,
+                "quantity": pm.quantity
+            }
+            for pm in getattr(db_obj, 'post_materials', [])
+            if getattr(pm, 'material', None) is not None
+        ]
+    }
+
+
+def serialize_posts(db_objs) -> List[Dict[str, Any]]:
+    """Bulk serializer for a page of posts.
+
+    Returns plain dicts instead of PostOut instances: FastAPI validates the response
+    against response_model anyway, so building validated models here would validate
+    every nested tag, step, image and user twice.
+    """
+    return [serialize_post(db_obj) for db_obj in db_objs]
+
+
+class PostCursorPage(BaseModel):
+    """Keyset-paginated page of posts; pass next_cursor back as `cursor` to fetch the next page"""
+    posts: List[PostOut]
+    next_cursor: Optional[str] = None
+    limit: int
+    has_more: bool
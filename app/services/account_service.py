@@ -1,12 +1,13 @@
 from sqlalchemy.orm import Session
 from app.db.models.account import Account, AccountStatusEnum
 from app.schemas.account import AccountCreate, AccountUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, get_password_hash_async, verify_password
 from fastapi import HTTPException
 from sqlalchemy import text
 from typing import List, Optional
 from sqlalchemy.exc import IntegrityError
 from app.services.email_service import send_confirmation_email, send_email_verification
+from app.services.token_service import TokenService
 from jose import jwt, JWTError
 from app.core.settings import settings
 from datetime import datetime
@@ -82,7 +83,7 @@ async def create_account(db: Session, account: AccountCreate) -> Account:
         # Check unique constraints before creating
         check_unique_fields(db, username=account.username, email=account.email)
 
-        hashed_password = get_password_hash(account.password)
+        hashed_password = await get_password_hash_async(account.password)
 
         db_account = Account(
             username=account.username,
@@ -115,9 +116,9 @@ async def create_account(db: Session, account: AccountCreate) -> Account:
             db.rollback()
             raise ValueError("Missing required fields: email and username are required")
         
-        # Try to send confirmation email BEFORE committing
+        # Queue the confirmation email in the same transaction as the account
         try:
-            await send_confirmation_email(db_account.email, db_account.username)
+            send_confirmation_email(db, db_account.email, db_account.username)
         except Exception as email_error:
             # If email fails, rollback and raise error
             db.rollback()
@@ -126,7 +127,7 @@ async def create_account(db: Session, account: AccountCreate) -> Account:
                 detail=f"Failed to send confirmation email: {str(email_error)}"
             )
         
-        # If email sent successfully, commit the transaction
+        # Commit the account together with its email job
         db.commit()
         db.refresh(db_account)
 
@@ -212,7 +213,7 @@ async def update_account_profile(db: Session, account: Account, profile_update:
                     detail="Email already in use"
                 )
             # Send verification email
-            await send_email_verification(account.email, account.username, profile_update.email)
+            send_email_verification(db, account.email, account.username, profile_update.email)
             # Set email_verified to False until verified
             account.email_verified = False
             account.email = profile_update.email # Update email in account object
@@ -378,6 +379,8 @@ def ban_account(db: Session, account_id: str) -> Account:
         raise HTTPException(status_code=400, detail="Account is already banned")
     account.status = AccountStatusEnum.banned
     db.commit()
+    # End the account's sessions everywhere, not only on its next login attempt
+    TokenService.revoke_all_user_tokens(db, account.account_id)
     db.refresh(account)
     return account
 
@@ -404,7 +407,7 @@ async def update_account(db: Session, account_id: str, account_update: AccountUp
                     detail="Email already in use"
                 )
             # Send verification email
-            await send_email_verification(account.email, account.username, account_update.email)
+            send_email_verification(db, account.email, account.username, account_update.email)
             # Set email_verified to False until verified
             account.email_verified = False
             account.email = account_update.email
@@ -1,10 +1,94 @@
-from sqlalchemy.orm import Session
-from app.db.models.comment import Comment
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, func, or_, select
+from app.db.models.comment import (
+    Comment, CommentStatusEnum, COMMENT_PATH_SEGMENT_LENGTH, comment_path, comment_path_ids, comment_subtree_range
+)
 from app.db.models.post import Post, PostStatusEnum
 from app.db.models.account import Account
 from app.schemas.comment import CommentCreate, CommentUpdate
+from app.services.pagination import decode_keyset_cursor, encode_keyset_cursor
 from fastapi import HTTPException
 from uuid import UUID
+from typing import Dict, List, Optional
+import uuid
+
+# Statuses shown in comment trees (deleted ones are rendered with a placeholder)
+VISIBLE_COMMENT_STATUSES = [CommentStatusEnum.active, CommentStatusEnum.deleted]
+
+def _reply_count_column():
+    """Visible direct replies of the outer query's Comment row (served by ix_comments_parent_comment_id)"""
+    reply = aliased(Comment)
+    return select(func.count(reply.comment_id)).where(
+        reply.parent_comment_id == Comment.comment_id,
+        reply.status.in_(VISIBLE_COMMENT_STATUSES)
+    ).correlate(Comment).scalar_subquery()
+
+def _with_reply_counts(rows) -> List[Comment]:
+    comments = []
+    for comment, reply_count in rows:
+        comment.reply_count = reply_count
+        comment.next_replies_cursor = None
+        set_committed_value(comment, "replies", [])
+        comments.append(comment)
+    return comments
+
+def _set_replies_cursors(comments):
+    """next_replies_cursor for comments with replies that were not loaded"""
+    for comment in comments:
+        if comment.replies and comment.reply_count > len(comment.replies):
+            last = comment.replies[-1]
+            comment.next_replies_cursor = encode_keyset_cursor(last.created_at, last.comment_id)
+        elif not comment.replies and comment.reply_count:
+            # Cut off at max_depth: a cursor at the comment itself starts from its first reply
+            comment.next_replies_cursor = encode_keyset_cursor(comment.created_at, UUID(int=0))
+
+def _attach_reply_trees(db: Session, parents: List[Comment], max_depth: int, replies_limit: int):
+    """Load the first `replies_limit` replies of every comment, `max_depth` levels below `parents`.
+
+    Each parent's subtree is one range scan on the materialised path index, cut at max_depth
+    by path length; a row_number per parent keeps the first replies_limit replies of each
+    comment (oldest first). Comments with replies that were not loaded, because of
+    replies_limit or because they sit at max_depth, get a `next_replies_cursor` for the
+    replies endpoint.
+    """
+    if not parents or max_depth < 1:
+        _set_replies_cursors(parents)
+        return
+    subtrees = []
+    for parent in parents:
+        low, high = comment_subtree_range(parent.path)
+        subtrees.append(and_(
+            Comment.path > low,
+            Comment.path < high,
+            func.length(Comment.path) <= len(parent.path) + max_depth * COMMENT_PATH_SEGMENT_LENGTH
+        ))
+    ranked = select(
+        Comment.comment_id,
+        func.row_number().over(
+            partition_by=Comment.parent_comment_id,
+            order_by=(Comment.created_at, Comment.comment_id)
+        ).label("position")
+    ).where(
+        or_(*subtrees),
+        Comment.status.in_(VISIBLE_COMMENT_STATUSES)
+    ).subquery()
+
+    rows = db.query(Comment, _reply_count_column())\
+        .options(joinedload(Comment.account))\
+        .join(ranked, ranked.c.comment_id == Comment.comment_id)\
+        .filter(ranked.c.position <= replies_limit)\
+        .order_by(Comment.created_at.asc(), Comment.comment_id.asc())\
+        .all()
+
+    by_id: Dict[UUID, Comment] = {parent.comment_id: parent for parent in parents}
+    # Oldest first, so every reply comes after its parent; replies of trimmed replies are dropped
+    for comment in _with_reply_counts(rows):
+        parent = by_id.get(comment.parent_comment_id)
+        if parent is not None:
+            parent.replies.append(comment)
+            by_id[comment.comment_id] = comment
+    _set_replies_cursors(by_id.values())
 
 class CommentService:
     @staticmethod
@@ -24,6 +108,7 @@ class CommentService:
         # Set default level and parent comment
         level = 1
         parent_comment = None
+        comment_id = uuid.uuid4()
 
         # If parent_comment_id exists, validate and get parent comment
         if comment.parent_comment_id:
@@ -37,6 +122,8 @@ class CommentService:
 
         # Tạo comment mới với level đã tính
         comment_data = {
+            "comment_id": comment_id,
+            "path": comment_path(comment_id, parent_comment.path if parent_comment else None),
             "post_id": comment.post_id,
             "account_id": user_id,
             "content": comment.content,
@@ -60,54 +147,114 @@ class CommentService:
         db: Session,
         post_id: str,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        max_depth: int = 3,
+        replies_limit: int = 20
     ) -> list[Comment]:
-        from sqlalchemy.orm import joinedload
-        from app.db.models.comment import CommentStatusEnum
-        
+        """Page of root comments (newest first) with their reply trees.
+
+        Only the requested roots are read, then their replies up to `max_depth` levels and
+        `replies_limit` per comment in one materialised-path range query; the rest, including
+        the replies of comments at max_depth, is fetched on demand through get_replies with
+        each comment's next_replies_cursor.
+        """
         # Validate post exists
         post = db.query(Post).filter(Post.post_id == post_id).first()
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
 
-        # Get all comments (including deleted ones to show them with special message)
-        all_comments = db.query(Comment)\
+        # Root comments of this page only (including deleted ones to show them with special message)
+        root_comments = _with_reply_counts(
+            db.query(Comment, _reply_count_column())\
+                .options(joinedload(Comment.account))\
+                .filter(Comment.post_id == post_id)\
+                .filter(Comment.parent_comment_id.is_(None))\
+                .filter(Comment.status.in_(VISIBLE_COMMENT_STATUSES))\
+                .order_by(Comment.created_at.desc(), Comment.comment_id.desc())\
+                .offset(skip)\
+                .limit(limit)\
+                .all()
+        )
+
+        _attach_reply_trees(db, root_comments, max_depth, replies_limit)
+        return root_comments
+
+    @staticmethod
+    def get_replies(
+        db: Session,
+        comment_id: UUID,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        max_depth: int = 3,
+        replies_limit: int = 20
+    ) -> list[Comment]:
+        """Next replies of a comment (oldest first) after `cursor`, each with its own reply tree"""
+        parent = db.query(Comment).filter(Comment.comment_id == comment_id).first()
+        if not parent:
+            raise HTTPException(status_code=404, detail="Comment not found")
+
+        query = db.query(Comment, _reply_count_column())\
             .options(joinedload(Comment.account))\
-            .filter(Comment.post_id == post_id)\
-            .filter(Comment.status.in_([CommentStatusEnum.active, CommentStatusEnum.deleted]))\
-            .order_by(Comment.created_at.asc())\
-            .all()
+            .filter(Comment.parent_comment_id == comment_id)\
+            .filter(Comment.status.in_(VISIBLE_COMMENT_STATUSES))
+        if cursor:
+            cursor_created_at, cursor_comment_id = decode_keyset_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Comment.created_at > cursor_created_at,
+                    and_(Comment.created_at == cursor_created_at, Comment.comment_id > cursor_comment_id)
+                )
+            )
 
-        # Create a dictionary to store comments by their ID
-        comment_dict = {comment.comment_id: comment for comment in all_comments}
-        
-        # Initialize replies list for all comments (including deleted ones)
-        for comment in all_comments:
-            comment.replies = []
-        
-        # Build nested structure
-        root_comments = []
-        for comment in all_comments:
-            if comment.parent_comment_id is None:
-                root_comments.append(comment)
-            else:
-                parent = comment_dict.get(comment.parent_comment_id)
-                if parent:
-                    parent.replies.append(comment)
+        replies = _with_reply_counts(
+            query.order_by(Comment.created_at.asc(), Comment.comment_id.asc()).limit(limit).all()
+        )
+        _attach_reply_trees(db, replies, max_depth - 1, replies_limit)
+        return replies
 
-        # Recursive function to sort replies by created_at
-        def sort_replies(comment_list):
-            for comment in comment_list:
-                if hasattr(comment, 'replies') and comment.replies:
-                    comment.replies.sort(key=lambda x: x.created_at)
-                    sort_replies(comment.replies)
+    @staticmethod
+    def get_comment_thread(
+        db: Session,
+        comment_id: UUID,
+        max_depth: int = 3,
+        replies_limit: int = 20
+    ) -> Comment:
+        """Deep link: the root of a comment's thread, with the chain of ancestors down to the
+        comment, and the comment's own replies up to `max_depth` levels. Ancestors with other
+        replies get a `next_replies_cursor` that pages all of their replies from the first.
 
-        # Sort all replies recursively
-        sort_replies(root_comments)
+        Ancestor ids come from the comment's path, so this is one primary-key IN query plus
+        one subtree range scan, whatever the size of the post.
+        """
+        target = db.query(Comment).filter(Comment.comment_id == comment_id).first()
+        if not target:
+            raise HTTPException(status_code=404, detail="Comment not found")
 
-        # Sort root comments by created_at desc and apply pagination
-        root_comments.sort(key=lambda x: x.created_at, reverse=True)
-        return root_comments[skip:skip + limit]
+        chain_ids = comment_path_ids(target.path)
+        chain = {
+            comment.comment_id: comment
+            for comment in _with_reply_counts(
+                db.query(Comment, _reply_count_column())\
+                    .options(joinedload(Comment.account))\
+                    .filter(Comment.comment_id.in_(chain_ids))\
+                    .all()
+            )
+        }
+        # Hidden (reported) comments are not reachable through a deep link either
+        if len(chain) != len(chain_ids) or any(
+            comment.status not in VISIBLE_COMMENT_STATUSES for comment in chain.values()
+        ):
+            raise HTTPException(status_code=404, detail="Comment not found")
+
+        for parent_id, child_id in zip(chain_ids, chain_ids[1:]):
+            ancestor = chain[parent_id]
+            ancestor.replies.append(chain[child_id])
+            # Only the reply on the path is loaded: page the others from the ancestor's first
+            # reply (the one on the path comes back too)
+            if ancestor.reply_count > 1:
+                ancestor.next_replies_cursor = encode_keyset_cursor(ancestor.created_at, UUID(int=0))
+        _attach_reply_trees(db, [chain[chain_ids[-1]]], max_depth, replies_limit)
+        return chain[chain_ids[0]]
 
     @staticmethod
     def get_nested_comments(db: Session, post_id: str) -> list[Comment]:
@@ -1,32 +1,72 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from sqlalchemy.orm import Session
 from app.core.settings import settings
+from app.core.email_outbox import enqueue_email
 from pathlib import Path
 import jwt
 from datetime import datetime, timedelta, timezone
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 import os
 
-# Configure Jinja2
+# Configure Jinja2. Templates are compiled once (precompile_email_templates() on startup) and
+# kept in memory: without auto_reload, get_template() no longer stat()s the file per email,
+# and the bytecode cache lets restarts and the other workers skip parsing and compiling.
 template_dir = Path(__file__).parent.parent / 'templates'
-env = Environment(loader=FileSystemLoader(template_dir))
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.SMTP_USER,
-    MAIL_PASSWORD=settings.SMTP_PASSWORD,
-    MAIL_FROM=settings.EMAILS_FROM_EMAIL,
-    MAIL_PORT=settings.SMTP_PORT,
-    MAIL_SERVER=settings.SMTP_HOST,
-    MAIL_FROM_NAME=settings.EMAILS_FROM_NAME,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
+env = Environment(
+    loader=FileSystemLoader(template_dir),
+    auto_reload=settings.EMAIL_TEMPLATE_AUTO_RELOAD,
+    bytecode_cache=FileSystemBytecodeCache(settings.EMAIL_TEMPLATE_BYTECODE_CACHE_DIR or None)
+    if settings.EMAIL_TEMPLATE_BYTECODE_CACHE else None
 )
 
-async def send_confirmation_email(email: str, username: str):
+def precompile_email_templates() -> int:
+    """Compile every email template into the template cache; returns how many"""
+    names = env.list_templates(extensions=["html", "txt"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+def render_email_batch(template_name: str, shared_context: Dict[str, Any], contexts: Iterable[Dict[str, Any]]) -> List[str]:
+    """
+    Render one template for many recipients (moderation notices, digests).
+    The compiled template is looked up once and the shared context is merged with the
+    template globals once; each render only adds the recipient's own variables.
+    """
+    template = env.get_template(template_name)
+    base = dict(template.globals, **shared_context)
+    rendered = []
+    for context in contexts:
+        template_context = template.new_context({**base, **context}, shared=True)
+        try:
+            rendered.append(env.concat(template.root_render_func(template_context)))
+        except Exception:
+            env.handle_exception()
+    return rendered
+
+def queue_bulk_email(
+    db: Session,
+    template_name: str,
+    subject: str,
+    recipients: Sequence[Tuple[str, Dict[str, Any]]],
+    shared_context: Optional[Dict[str, Any]] = None
+) -> int:
     """
-    Send confirmation email to newly registered user.
-    Raises exception if email sending fails.
+    Render `template_name` for every (email, context) pair and queue the emails in the
+    caller's transaction; returns how many were queued.
+    """
+    shared = {"project_name": settings.PROJECT_NAME, **(shared_context or {})}
+    bodies = render_email_batch(template_name, shared, (context for _, context in recipients))
+    for (email, _), body in zip(recipients, bodies):
+        enqueue_email(db, recipient=email, subject=subject, body=body, subtype="html")
+    return len(bodies)
+
+# Emails are not sent inline: they are queued in the caller's transaction (app.core.email_outbox)
+# and go out once it commits, with retries.
+
+def send_confirmation_email(db: Session, email: str, username: str):
+    """
+    Queue the confirmation email for a newly registered user; sent after db.commit().
+    Raises exception if the email cannot be built.
     """
     # Validate inputs before processing
     if not email or not email.strip():
@@ -64,31 +104,28 @@ async def send_confirmation_email(email: str, username: str):
             expire_hours=settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS
         )
         
-        # Create email message
-        message = MessageSchema(
+        # Queue email
+        enqueue_email(
+            db,
+            recipient=email,
             subject=f"Welcome to {settings.PROJECT_NAME} - Confirm Your Email",
-            recipients=[email],
             body=html_content,
             subtype="html"
         )
         
-        # Send email
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        
-        print(f"Confirmation email sent successfully to {email} for user {username}")
+        print(f"Confirmation email queued for {email} for user {username}")
         
     except ValueError:
         # Re-raise validation errors
         raise
     except Exception as e:
-        print(f"Failed to send confirmation email to {email} for user {username}: {str(e)}")
+        print(f"Failed to queue confirmation email to {email} for user {username}: {str(e)}")
         raise Exception(f"Email sending failed: {str(e)}")
 
-async def send_reset_password_email(email: str, username: str, reset_token: str):
+def send_reset_password_email(db: Session, email: str, username: str, reset_token: str):
     """
-    Send reset password email to user.
-    Raises exception if email sending fails.
+    Queue the reset password email for a user; sent after db.commit().
+    Raises exception if the email cannot be built.
     """
     # Validate inputs before processing
     if not email or not email.strip():
@@ -118,28 +155,25 @@ async def send_reset_password_email(email: str, username: str, reset_token: str)
             expire_hours=settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS
         )
         
-        # Create email message
-        message = MessageSchema(
+        # Queue email
+        enqueue_email(
+            db,
+            recipient=email,
             subject=f"{settings.PROJECT_NAME} - Reset Your Password",
-            recipients=[email],
             body=html_content,
             subtype="html"
         )
         
-        # Send email
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        
-        print(f"Reset password email sent successfully to {email} for user {username}")
+        print(f"Reset password email queued for {email} for user {username}")
         
     except ValueError:
         # Re-raise validation errors
         raise
     except Exception as e:
-        print(f"Failed to send reset password email to {email} for user {username}: {str(e)}")
+        print(f"Failed to queue reset password email to {email} for user {username}: {str(e)}")
         raise Exception(f"Email sending failed: {str(e)}")
 
-async def send_email_verification(email: str, username: str, new_email: str):
+def send_email_verification(db: Session, email: str, username: str, new_email: str):
     token_data = {
         "sub": username,
         "email": new_email,
@@ -166,4 +200,4 @@ async def send_email_verification(email: str, username: str, new_email: str):
     Your App Team
     """
     
-    await send_email(email, subject, body) 
\ No newline at end of file
+    enqueue_email(db, recipient=email, subject=subject, body=body, subtype="plain") 
\ No newline at end of file
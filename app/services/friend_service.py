@@ -80,6 +80,15 @@ def get_friends(db: Session, account_id: UUID) -> List[Account]:
     
     return friends
 
+def get_friend_ids(db: Session, account_id: UUID) -> List[UUID]:
+    """Ids of accepted friends, read from the friend table alone (no account rows loaded)"""
+    rows = db.query(Friend.sender_id, Friend.receiver_id).filter(
+        (Friend.sender_id == account_id) | (Friend.receiver_id == account_id),
+        Friend.status == FriendStatusEnum.accepted
+    ).all()
+    
+    return [row.receiver_id if row.sender_id == account_id else row.sender_id for row in rows]
+
 def get_pending_requests(db: Session, account_id: UUID):
     # Join with Account to get sender information
     pending_requests = db.query(Friend, Account).join(
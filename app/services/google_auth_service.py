@@ -7,7 +7,7 @@ import uuid
 from app.core.settings import settings
 from app.schemas.auth import GoogleToken, GoogleUserInfo # Corrected import path based on schema changes
 from app.db.models.account import Account, AccountStatusEnum
-from app.core.security import get_password_hash # Assuming this is the correct import for password hashing
+from app.core.security import get_password_hash_async # Assuming this is the correct import for password hashing
 
 # Assuming TokenService is imported and has relevant methods, though not directly used here
 # from app.services.token_service import TokenService
@@ -91,7 +91,7 @@ async def get_or_create_google_account(db: Session, google_user: GoogleUserInfo)
     # In a real app, you might want to check for username uniqueness and append numbers if needed.
 
     # Create a random password hash since Google handles authentication
-    random_password_hash = get_password_hash(str(uuid.uuid4()))
+    random_password_hash = await get_password_hash_async(str(uuid.uuid4()))
 
     new_account = Account(
         username=username,
@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
 from fastapi import HTTPException, status
 from uuid import UUID
 from typing import List, Optional
@@ -12,6 +13,7 @@ from app.db.models.account import Account
 from app.schemas.group import GroupCreate, GroupOut, GroupMemberCreate, GroupMemberOut
 from app.schemas.group_message import GroupMessageCreate, GroupMessageOut, GroupMessageList
 from app.schemas.account import RoleNameEnum
+from app.db.group_counters import GroupFullError
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
@@ -99,19 +101,24 @@ def get_group_by_id(db: Session, group_id: UUID) -> GroupOut:
             detail="Group not found"
         )
     
-    # Get active member count only
-    member_count = db.query(GroupMember).filter(
-        GroupMember.group_id == group_id,
-        GroupMember.status == GroupMemberStatusEnum.active
-    ).count()
-    
     group_out = GroupOut.model_validate(group)
     group_out.topic_name = group.topic.name if group.topic else None
     group_out.leader_name = group.leader.full_name if group.leader else None
-    group_out.member_count = member_count
+    group_out.member_count = group.member_count  # Active members only
     
     return group_out
 
+def _commit_membership(db: Session, full_detail: str):
+    """Commit a member activation; the counter update refuses it when the group is full"""
+    try:
+        db.commit()
+    except GroupFullError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=full_detail
+        )
+
 def add_member_to_group(
     db: Session, 
     group_id: UUID, 
@@ -171,23 +178,11 @@ def add_member_to_group(
         existing_member.status = GroupMemberStatusEnum.active
         existing_member.role = member_data.role
         existing_member.joined_at = datetime.now()
-        db.commit()
+        _commit_membership(db, "Group is full")
         db.refresh(existing_member)
         return get_group_member_by_id(db, existing_member.group_member_id)
     
-    # Check if group is full (only count active members)
-    active_member_count = db.query(GroupMember).filter(
-        GroupMember.group_id == group_id,
-        GroupMember.status == GroupMemberStatusEnum.active
-    ).count()
-    
-    if active_member_count >= group.max_members:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Group is full"
-        )
-    
-    # Add new member
+    # Add new member; the group's active member counter enforces max_members atomically
     member = GroupMember(
         account_id=member_data.account_id,
         group_id=group_id,
@@ -196,7 +191,7 @@ def add_member_to_group(
     )
     
     db.add(member)
-    db.commit()
+    _commit_membership(db, "Group is full")
     db.refresh(member)
     
     return get_group_member_by_id(db, member.group_member_id)
@@ -358,6 +353,13 @@ def get_group_message_by_id(db: Session, message_id: UUID) -> GroupMessageOut:
     
     return GroupMessageOut.model_validate(message)
 
+def _group_history_query(db: Session, group_id: UUID):
+    """Live messages of a group, served by the (group_id, created_at) partial index"""
+    return db.query(GroupMessage).filter(
+        GroupMessage.group_id == group_id,
+        GroupMessage.is_deleted == False
+    )
+
 def get_group_chat_history(
     db: Session, 
     group_id: UUID,
@@ -381,11 +383,8 @@ def get_group_chat_history(
         )
     
     # Get messages
-    query = db.query(GroupMessage).options(
+    query = _group_history_query(db, group_id).options(
         joinedload(GroupMessage.sender)
-    ).filter(
-        GroupMessage.group_id == group_id,
-        GroupMessage.is_deleted == False
     )
     
     total = query.count()
@@ -437,6 +436,22 @@ def check_topic_can_create_chat_group(db: Session, topic_id: UUID) -> dict:
         "topic_name": topic.name
     }
 
+def _all_member_count_column():
+    """Member count (any status) of the outer query's Group row, as a correlated subquery.
+
+    Active members are counted by Group.member_count instead.
+    """
+    return select(func.count(GroupMember.group_member_id)).where(
+        GroupMember.group_id == Group.group_id
+    ).correlate(Group).scalar_subquery()
+
+def _latest_message_id_column():
+    """Id of the newest live message of the outer query's Group row (one index probe per group)"""
+    return select(GroupMessage.message_id).where(
+        GroupMessage.group_id == Group.group_id,
+        GroupMessage.is_deleted == False
+    ).order_by(GroupMessage.created_at.desc()).limit(1).correlate(Group).scalar_subquery()
+
 def get_available_topics_for_chat_group(db: Session) -> List[dict]:
     """Get list of topics that can create chat groups"""
     # Get all topics
@@ -463,20 +478,15 @@ def get_available_topics_for_chat_group(db: Session) -> List[dict]:
 
 def get_topics_with_chat_groups(db: Session) -> List[dict]:
     """Get list of topics that already have chat groups"""
-    # Get topics with chat groups
-    topics_with_groups = db.query(Topic, Group).join(
+    # Get topics with chat groups and their member counts in one query
+    topics_with_groups = db.query(Topic, Group, _all_member_count_column()).join(
         Group, Topic.topic_id == Group.topic_id
     ).filter(
         Group.is_chat_group == True
     ).all()
     
     result = []
-    for topic, group in topics_with_groups:
-        # Get member count
-        member_count = db.query(GroupMember).filter(
-            GroupMember.group_id == group.group_id
-        ).count()
-        
+    for topic, group, member_count in topics_with_groups:
         result.append({
             "topic_id": str(topic.topic_id),
             "topic_name": topic.name,
@@ -492,18 +502,18 @@ def get_topics_with_chat_groups(db: Session) -> List[dict]:
 
 def get_all_topics_with_group_chat(db: Session) -> list:
     """Return all topics and, for each, the group chat info if it exists (or null if not)"""
-    topics = db.query(Topic).all()
+    rows = db.query(Topic, Group, _all_member_count_column()).outerjoin(
+        Group, (Group.topic_id == Topic.topic_id) & (Group.is_chat_group == True)
+    ).all()
     result = []
-    for topic in topics:
-        group = db.query(Group).filter(
-            Group.topic_id == topic.topic_id,
-            Group.is_chat_group == True
-        ).first()
+    seen_topic_ids = set()
+    for topic, group, member_count in rows:
+        # A topic has at most one chat group; keep the first row if it ever has more
+        if topic.topic_id in seen_topic_ids:
+            continue
+        seen_topic_ids.add(topic.topic_id)
         group_info = None
         if group:
-            member_count = db.query(GroupMember).filter(
-                GroupMember.group_id == group.group_id
-            ).count()
             group_info = {
                 "group_id": str(group.group_id),
                 "group_name": group.name,
@@ -604,9 +614,13 @@ def get_my_group_chats(db: Session, user_id: UUID) -> List[dict]:
     """Get list of group chats where user is an active member"""
     from app.db.models.account import Account
     
-    # Get only groups where user is active member
-    my_groups = db.query(Group, GroupMember).join(
+    # Get only groups where user is active member, with topic and leader
+    my_groups = db.query(Group, GroupMember, Topic.name, Account.full_name).join(
         GroupMember, Group.group_id == GroupMember.group_id
+    ).outerjoin(
+        Topic, Topic.topic_id == Group.topic_id
+    ).outerjoin(
+        Account, Account.account_id == Group.group_leader
     ).filter(
         GroupMember.account_id == user_id,
         GroupMember.status == GroupMemberStatusEnum.active,  # Only active memberships
@@ -614,30 +628,18 @@ def get_my_group_chats(db: Session, user_id: UUID) -> List[dict]:
     ).all()
     
     result = []
-    for group, member in my_groups:
-        # Get topic info
-        topic = db.query(Topic).filter(Topic.topic_id == group.topic_id).first()
-        
-        # Count active members only
-        member_count = db.query(GroupMember).filter(
-            GroupMember.group_id == group.group_id,
-            GroupMember.status == GroupMemberStatusEnum.active
-        ).count()
-        
-        # Get leader info
-        leader = db.query(Account).filter(Account.account_id == group.group_leader).first()
-        
+    for group, member, topic_name, leader_name in my_groups:
         result.append({
             "group_id": str(group.group_id),
             "group_name": group.name,
             "group_description": group.description,
             "topic_id": str(group.topic_id),
-            "topic_name": topic.name if topic else None,
-            "member_count": member_count,
+            "topic_name": topic_name,
+            "member_count": group.member_count,
             "max_members": group.max_members,
             "my_role": member.role.value if hasattr(member.role, 'value') else str(member.role),
             "my_status": member.status.value if hasattr(member.status, 'value') else str(member.status),
-            "leader_name": leader.full_name if leader else None,
+            "leader_name": leader_name,
             "created_at": group.created_at,
             "joined_at": member.joined_at
         })
@@ -864,10 +866,7 @@ def get_all_group_chats(
     """Get all group chats with active member count"""
     
     # Base query for group chats
-    query = db.query(Group).options(
-        joinedload(Group.topic),
-        joinedload(Group.leader)
-    ).filter(Group.is_chat_group == True)
+    query = db.query(Group).filter(Group.is_chat_group == True)
     
     # Apply search filter if provided and not empty
     if search is not None and search.strip() != "":
@@ -883,28 +882,26 @@ def get_all_group_chats(
     # Get total count
     total = query.count()
     
-    # Apply pagination
-    groups = query.order_by(Group.created_at.desc()).offset(skip).limit(limit).all()
+    # Apply pagination; the latest message id comes with the page in the same query
+    rows = query.options(
+        joinedload(Group.topic),
+        joinedload(Group.leader)
+    ).add_columns(
+        _latest_message_id_column()
+    ).order_by(Group.created_at.desc()).offset(skip).limit(limit).all()
+    
+    # Latest messages of the whole page in one IN query
+    latest_message_ids = [row[1] for row in rows if row[1] is not None]
+    latest_messages = {
+        message.message_id: message
+        for message in db.query(GroupMessage).options(
+            joinedload(GroupMessage.sender)
+        ).filter(GroupMessage.message_id.in_(latest_message_ids)).all()
+    } if latest_message_ids else {}
     
     result = []
-    for group in groups:
-        # Get active member count only
-        member_count = db.query(GroupMember).filter(
-            GroupMember.group_id == group.group_id,
-            GroupMember.status == GroupMemberStatusEnum.active
-        ).count()
-        
-        # Get message count
-        message_count = db.query(GroupMessage).filter(
-            GroupMessage.group_id == group.group_id,
-            GroupMessage.is_deleted == False
-        ).count()
-        
-        # Get latest message info
-        latest_message = db.query(GroupMessage).filter(
-            GroupMessage.group_id == group.group_id,
-            GroupMessage.is_deleted == False
-        ).order_by(GroupMessage.created_at.desc()).first()
+    for group, latest_message_id in rows:
+        latest_message = latest_messages.get(latest_message_id)
         
         group_info = {
             "group_id": group.group_id,
@@ -913,9 +910,9 @@ def get_all_group_chats(
             "topic_id": group.topic_id,
             "topic_name": group.topic.name if group.topic else None,
             "topic_status": str(group.topic.status) if group.topic and hasattr(group.topic.status, 'value') else str(group.topic.status) if group.topic else None,
-            "member_count": member_count,  # Active members only
+            "member_count": group.member_count,  # Active members only
             "max_members": group.max_members,
-            "message_count": message_count,
+            "message_count": group.message_count,
             "group_leader": group.group_leader,
             "leader_name": group.leader.full_name if group.leader else None,
             "leader_username": group.leader.username if group.leader else None,
@@ -923,9 +920,9 @@ def get_all_group_chats(
             "created_at": group.created_at,
             "updated_at": group.updated_at,
             "latest_message": {
-                "content": latest_message.content if latest_message else None,
-                "sender_name": latest_message.sender.full_name if latest_message and latest_message.sender else None,
-                "created_at": latest_message.created_at if latest_message else None
+                "content": latest_message.content,
+                "sender_name": latest_message.sender.full_name if latest_message.sender else None,
+                "created_at": latest_message.created_at
             } if latest_message else None,
             "is_active": group.is_active
         }
@@ -987,23 +984,11 @@ def join_group_chat(
         # Rejoin if was left/removed/inactive - just update status
         existing_member.status = GroupMemberStatusEnum.active
         existing_member.joined_at = datetime.now()
-        db.commit()
+        _commit_membership(db, "Group is full (maximum 50 members)")
         db.refresh(existing_member)
         return get_group_member_by_id(db, existing_member.group_member_id)
     
-    # Check if group is full (only count active members)
-    active_member_count = db.query(GroupMember).filter(
-        GroupMember.group_id == group_id,
-        GroupMember.status == GroupMemberStatusEnum.active
-    ).count()
-    
-    if active_member_count >= group.max_members:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Group is full (maximum 50 members)"
-        )
-    
-    # Add user as new active member
+    # Add user as new active member; the group's active member counter enforces max_members atomically
     member = GroupMember(
         account_id=user_id,
         group_id=group_id,
@@ -1012,23 +997,26 @@ def join_group_chat(
     )
     
     db.add(member)
-    db.commit()
+    _commit_membership(db, "Group is full (maximum 50 members)")
     db.refresh(member)
     
     return get_group_member_by_id(db, member.group_member_id)
 
-def update_user_groups_in_manager(db: Session, user_id: UUID):
-    """Update user's groups in WebSocket manager (only active memberships)"""
-    from app.core.websocket_manager import manager
-    
-    # Get user's active groups only
-    user_groups = db.query(Group).join(GroupMember).filter(
+def get_active_chat_group_ids(db: Session, user_id: UUID) -> List[UUID]:
+    """Ids of the chat groups the user is an active member of, in one query"""
+    rows = db.query(GroupMember.group_id).join(Group, Group.group_id == GroupMember.group_id).filter(
         GroupMember.account_id == user_id,
         GroupMember.status == GroupMemberStatusEnum.active,  # Only active memberships
         Group.is_chat_group == True
     ).all()
     
-    group_ids = [group.group_id for group in user_groups]
+    return [row.group_id for row in rows]
+
+def update_user_groups_in_manager(db: Session, user_id: UUID):
+    """Update user's groups in WebSocket manager (only active memberships)"""
+    from app.core.websocket_manager import manager
+    
+    group_ids = get_active_chat_group_ids(db, user_id)
     
     # Add user to active groups
     for group_id in group_ids:
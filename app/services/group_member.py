@@ -2,6 +2,7 @@ from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from app.db.models.group_member import GroupMember
 from app.db.models.group import Group
+from app.db.group_counters import GroupFullError
 from app.db.models.account import Account
 from app.schemas.group_member import GroupMemberCreate, GroupMemberUpdate
 from fastapi import HTTPException, status
@@ -45,7 +46,14 @@ def create_group_member(db: Session, member: GroupMemberCreate) -> GroupMember:
 
     db_member = GroupMember(**member.model_dump())
     db.add(db_member)
-    db.commit()
+    try:
+        db.commit()
+    except GroupFullError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Group is full"
+        )
     db.refresh(db_member)
     return db_member
 
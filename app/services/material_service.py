@@ -8,6 +8,7 @@ from datetime import datetime, timezone
 
 from app.db.models.material import Material, MaterialStatusEnum
 from app.schemas.material import MaterialCreate, MaterialUpdate, MaterialListResponse, MaterialOut
+from app.services.post_search_service import refresh_search_documents_for_material
 
 
 def check_material_name_unique(db: Session, name: str):
@@ -90,9 +91,14 @@ def update_material(db: Session, material_id: UUID, material_data: MaterialUpdat
         # Handle name update
         if material_data.name is not None:
             # Check if new name is unique (if it's different from current name)
-            if material_data.name != material.name:
+            name_changed = material_data.name != material.name
+            if name_changed:
                 check_material_name_unique(db, material_data.name)
             material.name = material_data.name
+            if name_changed:
+                # Ingredient names are part of the post search index
+                db.flush()
+                refresh_search_documents_for_material(db, material_id)
 
         # Handle status update    
         if material_data.status is not None:
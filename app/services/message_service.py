@@ -1,18 +1,33 @@
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, case, func, or_
 from fastapi import HTTPException, status
 from uuid import UUID
 from typing import List, Optional
 from datetime import datetime, timezone
-import asyncio
 
-from app.db.models.message import Message, MessageStatusEnum
+from app.db.models.message import Message, MessageStatusEnum, conversation_key_for
 from app.db.models.friend import Friend, FriendStatusEnum
 from app.db.models.account import Account
-from app.schemas.message import MessageCreate, MessageUpdate, MessageOut, MessageList
+from app.schemas.message import MessageCreate, MessageUpdate, MessageOut, MessageList, ConversationSummaryList, ReadWatermarkOut
 from app.core.websocket_manager import manager
 
-async def send_message(db: Session, message_data: MessageCreate, sender_id: UUID) -> MessageOut:
-    """Send a message to a friend"""
+def _conversation_messages_query(db: Session, user_id: UUID, friend_id: UUID):
+    """Live messages between two users, served by the (conversation_key, created_at) partial index"""
+    return db.query(Message).filter(
+        Message.conversation_key == conversation_key_for(user_id, friend_id),
+        Message.is_deleted == False
+    )
+
+def _unread_messages_query(db: Session, user_id: UUID):
+    """Unread messages received by a user, served by the unread partial index"""
+    return db.query(Message).filter(
+        Message.receiver_id == user_id,
+        Message.status != MessageStatusEnum.read,
+        Message.is_deleted == False
+    )
+
+def send_message(db: Session, message_data: MessageCreate, sender_id: UUID) -> MessageOut:
+    """Send a message to a friend; the real-time push is scheduled on the WebSocket manager's loop"""
     # Check if receiver exists
     receiver = db.query(Account).filter(Account.account_id == message_data.receiver_id).first()
     if not receiver:
@@ -70,7 +85,7 @@ async def send_message(db: Session, message_data: MessageCreate, sender_id: UUID
         }
         
         # Send to receiver
-        await manager.send_personal_message(websocket_message, message_data.receiver_id)
+        manager.submit(manager.send_personal_message(websocket_message, message_data.receiver_id))
     
     return get_message_by_id(db, message.message_id)
 
@@ -111,28 +126,32 @@ def get_chat_history(
         )
     
     # Get messages between the two users
-    query = db.query(Message).options(
+    query = _conversation_messages_query(db, user_id, friend_id).options(
         joinedload(Message.sender),
         joinedload(Message.receiver)
-    ).filter(
-        ((Message.sender_id == user_id) & (Message.receiver_id == friend_id)) |
-        ((Message.sender_id == friend_id) & (Message.receiver_id == user_id)),
-        Message.is_deleted == False
     )
     
     total = query.count()
     messages = query.order_by(Message.created_at.desc()).offset(skip).limit(limit).all()
     
-    # Mark messages as read if they were sent to the current user
-    for message in messages:
-        if message.receiver_id == user_id and message.status != MessageStatusEnum.read:
-            message.status = MessageStatusEnum.read
-            message.read_at = datetime.now(timezone.utc)
-    
-    db.commit()
-    
     message_outs = [MessageOut.model_validate(message) for message in messages]
     
+    # Mark the conversation read up to the newest unread message on this page with one
+    # UPDATE; pages with nothing unread write nothing
+    newest_unread = next(
+        (message for message in message_outs
+         if message.receiver_id == user_id and message.status != MessageStatusEnum.read),
+        None
+    )
+    if newest_unread is not None:
+        watermark = mark_conversation_read(db, user_id, friend_id, up_to_message_id=newest_unread.message_id)
+        read_at = datetime.now(timezone.utc)
+        for message in message_outs:
+            if (message.receiver_id == user_id and message.status != MessageStatusEnum.read
+                    and message.created_at <= watermark.up_to):
+                message.status = MessageStatusEnum.read
+                message.read_at = read_at
+    
     return MessageList(
         messages=message_outs,
         total=total,
@@ -153,13 +172,63 @@ def mark_message_as_read(db: Session, message_id: UUID, user_id: UUID) -> Messag
             detail="Message not found"
         )
     
-    message.status = MessageStatusEnum.read
-    message.read_at = datetime.now(timezone.utc)
+    if message.status != MessageStatusEnum.read:
+        message.status = MessageStatusEnum.read
+        message.read_at = datetime.now(timezone.utc)
+        db.commit()
+    
+    return get_message_by_id(db, message_id)
+
+def mark_conversation_read(
+    db: Session,
+    user_id: UUID,
+    friend_id: UUID,
+    up_to_message_id: Optional[UUID] = None,
+    up_to: Optional[datetime] = None
+) -> ReadWatermarkOut:
+    """Mark every unread message from a friend up to a watermark as read with one UPDATE.
+
+    The watermark is the given message's timestamp, else `up_to`, else now. When rows change
+    the friend gets a single `messages_read` event carrying the watermark.
+    """
+    if up_to_message_id is not None:
+        watermark_message = db.query(Message.created_at).filter(
+            Message.message_id == up_to_message_id,
+            Message.conversation_key == conversation_key_for(user_id, friend_id)
+        ).first()
+        if not watermark_message:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Message not found in this conversation"
+            )
+        up_to = watermark_message.created_at
+    elif up_to is None:
+        up_to = datetime.now(timezone.utc)
     
+    updated = _unread_messages_query(db, user_id).filter(
+        Message.sender_id == friend_id,
+        Message.created_at <= up_to
+    ).update({
+        Message.status: MessageStatusEnum.read,
+        Message.read_at: datetime.now(timezone.utc)
+    }, synchronize_session=False)
     db.commit()
-    db.refresh(message)
     
-    return get_message_by_id(db, message_id)
+    if updated and manager.is_user_online(friend_id):
+        manager.submit(manager.send_personal_message({
+            "type": "messages_read",
+            "read_by": str(user_id),
+            "up_to": up_to.isoformat(),
+            "up_to_message_id": str(up_to_message_id) if up_to_message_id else None,
+            "count": updated
+        }, friend_id))
+    
+    return ReadWatermarkOut(
+        friend_id=friend_id,
+        up_to=up_to,
+        up_to_message_id=up_to_message_id,
+        updated=updated
+    )
 
 def delete_message(db: Session, message_id: UUID, user_id: UUID) -> bool:
     """Delete a message (soft delete)"""
@@ -183,11 +252,74 @@ def delete_message(db: Session, message_id: UUID, user_id: UUID) -> bool:
 
 def get_unread_message_count(db: Session, user_id: UUID) -> int:
     """Get count of unread messages for a user"""
-    return db.query(Message).filter(
-        Message.receiver_id == user_id,
-        Message.status != MessageStatusEnum.read,
+    return _unread_messages_query(db, user_id).count()
+
+def get_conversation_summaries(db: Session, user_id: UUID) -> ConversationSummaryList:
+    """Inbox for a user: every friend with the last message, unread count and last activity, in one query"""
+    # The other participant of each message / friendship row
+    message_peer = case((Message.sender_id == user_id, Message.receiver_id), else_=Message.sender_id)
+    friend_peer = case((Friend.sender_id == user_id, Friend.receiver_id), else_=Friend.sender_id)
+    is_unread = case(
+        (and_(Message.receiver_id == user_id, Message.status != MessageStatusEnum.read), 1),
+        else_=0
+    )
+    
+    ranked = db.query(
+        message_peer.label("peer_id"),
+        Message.message_id,
+        Message.sender_id,
+        Message.content,
+        Message.status,
+        Message.created_at,
+        func.row_number().over(
+            partition_by=message_peer,
+            order_by=(Message.created_at.desc(), Message.message_id.desc())
+        ).label("position"),
+        func.sum(is_unread).over(partition_by=message_peer).label("unread_count")
+    ).filter(
+        or_(Message.sender_id == user_id, Message.receiver_id == user_id),
         Message.is_deleted == False
-    ).count()
+    ).subquery()
+    
+    friends = db.query(friend_peer.label("friend_id")).filter(
+        or_(Friend.sender_id == user_id, Friend.receiver_id == user_id),
+        Friend.status == FriendStatusEnum.accepted
+    ).subquery()
+    
+    rows = db.query(
+        Account.account_id, Account.username, Account.full_name, Account.avatar,
+        ranked.c.message_id, ranked.c.sender_id, ranked.c.content, ranked.c.status,
+        ranked.c.created_at, ranked.c.unread_count
+    ).select_from(friends)\
+        .join(Account, Account.account_id == friends.c.friend_id)\
+        .outerjoin(ranked, and_(ranked.c.peer_id == friends.c.friend_id, ranked.c.position == 1))\
+        .order_by(ranked.c.created_at.desc().nullslast(), Account.username)\
+        .all()
+    
+    conversations = []
+    for row in rows:
+        conversations.append({
+            "friend": {
+                "account_id": row.account_id,
+                "username": row.username,
+                "full_name": row.full_name,
+                "avatar": row.avatar
+            },
+            "last_message": {
+                "message_id": row.message_id,
+                "sender_id": row.sender_id,
+                "content": row.content,
+                "status": row.status,
+                "created_at": row.created_at
+            } if row.message_id else None,
+            "unread_count": row.unread_count or 0,
+            "last_activity_at": row.created_at
+        })
+    
+    return ConversationSummaryList(
+        conversations=conversations,
+        total_unread=sum(conversation["unread_count"] for conversation in conversations)
+    )
 
 def update_user_friends_in_manager(db: Session, user_id: UUID):
     """Update the user's friends list in the WebSocket manager"""
@@ -218,13 +350,10 @@ def search_chat_messages(
             detail="You can only search chat messages with your friends"
         )
     # Search messages between the two users containing the keyword
-    query = db.query(Message).options(
+    query = _conversation_messages_query(db, user_id, friend_id).options(
         joinedload(Message.sender),
         joinedload(Message.receiver)
     ).filter(
-        (((Message.sender_id == user_id) & (Message.receiver_id == friend_id)) |
-         ((Message.sender_id == friend_id) & (Message.receiver_id == user_id))),
-        Message.is_deleted == False,
         Message.content.ilike(f"%{keyword}%")
     )
     total = query.count()
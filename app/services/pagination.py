@@ -0,0 +1,22 @@
+from fastapi import HTTPException
+from uuid import UUID
+from datetime import datetime
+from typing import Tuple
+import base64
+import json
+
+def encode_keyset_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Encode a (created_at, id) keyset position into an opaque cursor string"""
+    payload = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_keyset_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor produced by encode_keyset_cursor, raising 400 if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(created_at, str) or not isinstance(row_id, str):
+            raise ValueError("cursor fields must be strings")
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,125 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column, and_
+from uuid import UUID
+from typing import List, Dict, Any
+import logging
+import re
+import unicodedata
+from app.db.models.post import Post, PostStatusEnum
+from app.db.models.step import Step
+from app.db.models.material import Material
+from app.db.models.post_material import PostMaterial
+
+logger = logging.getLogger(__name__)
+
+# Must match the expression index created in migration d4b8f2a61c07
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_search_text(text: str) -> str:
+    """Lowercase, strip Vietnamese diacritics (đ -> d) and collapse punctuation to spaces.
+
+    Documents and queries go through the same normalisation, so "phở bò" matches "Pho Bo".
+    """
+    if not text:
+        return ""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", text)
+    stripped = "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+    return _NON_WORD.sub(" ", stripped.lower()).replace("_", " ").strip()
+
+
+def build_search_document(title: str, content: str, steps: List[str], material_names: List[str]) -> str:
+    """Build the normalised text indexed for a post: title, content, step text and ingredient names"""
+    parts = [title or "", content or ""] + list(steps) + list(material_names)
+    return normalize_search_text(" ".join(parts))
+
+
+def refresh_post_search_document(db: Session, post: Post) -> None:
+    """Recompute post.search_document from the rows currently in the session.
+
+    Call after the post's steps and materials have been flushed; the caller commits.
+    """
+    steps = [
+        content for (content,) in db.query(Step.content)
+        .filter(Step.post_id == post.post_id)
+        .order_by(Step.order_number)
+        .all()
+    ]
+    material_names = [
+        name for (name,) in db.query(Material.name)
+        .join(PostMaterial, PostMaterial.material_id == Material.material_id)
+        .filter(PostMaterial.post_id == post.post_id)
+        .all()
+    ]
+    post.search_document = build_search_document(post.title, post.content, steps, material_names)
+
+
+def refresh_search_documents_for_material(db: Session, material_id: UUID) -> None:
+    """Re-index every post that uses a material, e.g. after the material is renamed"""
+    posts = db.query(Post)\
+        .join(PostMaterial, PostMaterial.post_id == Post.post_id)\
+        .filter(PostMaterial.material_id == material_id)\
+        .all()
+    for post in posts:
+        refresh_post_search_document(db, post)
+
+
+def _query_terms(query: str) -> List[str]:
+    return normalize_search_text(query).split()
+
+
+def _search_post_ids_postgres(db: Session, terms: List[str], skip: int, limit: int) -> List[UUID]:
+    """Ranked full-text search using the GIN expression index on post.search_document"""
+    document = func.to_tsvector(SEARCH_CONFIG, func.coalesce(Post.search_document, literal_column("''")))
+    # Every term must match as a word prefix, so results keep up while the user is typing
+    ts_query = func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms))
+    rank = func.ts_rank_cd(document, ts_query)
+
+    rows = db.query(Post.post_id)\
+        .filter(Post.status == PostStatusEnum.approved)\
+        .filter(document.op("@@")(ts_query))\
+        .order_by(rank.desc(), Post.created_at.desc())\
+        .offset(skip)\
+        .limit(limit)\
+        .all()
+    return [row.post_id for row in rows]
+
+
+def _search_post_ids_in_process(db: Session, terms: List[str], skip: int, limit: int) -> List[UUID]:
+    """Fallback for databases without tsvector (SQLite test runs): filter with LIKE, rank in Python"""
+    rows = db.query(Post.post_id, Post.search_document, Post.created_at)\
+        .filter(Post.status == PostStatusEnum.approved)\
+        .filter(and_(*[Post.search_document.like(f"%{term}%") for term in terms]))\
+        .all()
+
+    ranked = []
+    for row in rows:
+        words = row.search_document.split()
+        # Match the Postgres semantics: each term must prefix-match a whole word
+        matches = [sum(1 for word in words if word.startswith(term)) for term in terms]
+        if all(matches):
+            ranked.append((sum(matches), row.created_at, row.post_id))
+    ranked.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    return [post_id for _, _, post_id in ranked[skip:skip + limit]]
+
+
+def search_posts_ranked(db: Session, query: str, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """Full-text search over approved posts' title, content, steps and ingredient names, best matches first"""
+    from app.services.post_service import hydrate_posts
+
+    terms = _query_terms(query)
+    if not terms:
+        return []
+
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            post_ids = _search_post_ids_postgres(db, terms, skip, limit)
+        else:
+            post_ids = _search_post_ids_in_process(db, terms, skip, limit)
+        return hydrate_posts(db, post_ids)
+    except Exception as e:
+        logger.error(f"Error in search_posts_ranked: {str(e)}", exc_info=True)
+        raise
@@ -7,45 +7,107 @@ from app.db.models.tag import Tag
 from app.db.models.material import Material
 from app.db.models.topic import Topic
 from app.schemas.post import PostCreate, PostUpdate
-from sqlalchemy import or_
-from typing import List
-from app.schemas.post import PostOut
+from sqlalchemy import or_, and_
+from typing import List, Optional, Dict, Any
+from app.schemas.post import PostOut, serialize_posts
 from app.db.models.step import Step
 from app.db.models.unit import Unit
 from app.db.models.post_material import PostMaterial
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 import logging
 from app.db.models.account import Account
 from app.schemas.role import RoleNameEnum
 from app.schemas.post import PostModeration
 from app.db.models.post import PostStatusEnum
 from app.db.models.comment import Comment
+from app.services.post_search_service import refresh_post_search_document
+from app.services.pagination import decode_keyset_cursor, encode_keyset_cursor
 from datetime import datetime, timezone
 logger = logging.getLogger(__name__)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+def _paginate_posts_by_cursor(db: Session, id_query, cursor: Optional[str], limit: int) -> Dict[str, Any]:
+    """Apply keyset pagination over (created_at, post_id) DESC to a post id query.
+
+    `id_query` must select Post.post_id and Post.created_at. Fetches one extra row to know
+    whether another page exists, so no COUNT is needed.
+    """
+    if cursor:
+        cursor_created_at, cursor_post_id = decode_keyset_cursor(cursor)
+        id_query = id_query.filter(
+            or_(
+                Post.created_at < cursor_created_at,
+                and_(Post.created_at == cursor_created_at, Post.post_id < cursor_post_id)
+            )
+        )
+
+    rows = id_query\
+        .order_by(Post.created_at.desc(), Post.post_id.desc())\
+        .limit(limit + 1)\
+        .all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_keyset_cursor(rows[-1].created_at, rows[-1].post_id) if has_more else None
+
+    # Shaped like PostCursorPage; left as a dict so the posts are validated only once, by FastAPI
+    return {
+        "posts": hydrate_posts(db, [row.post_id for row in rows]),
+        "next_cursor": next_cursor,
+        "limit": limit,
+        "has_more": has_more
+    }
+
+def _post_hydration_options():
+    """Loader options for hydrating a page of posts without a cartesian JOIN.
+
+    Collections are fetched with one `SELECT ... WHERE post_id IN (...)` each; the
+    many-to-one account relationships stay joined since they add no extra rows.
+    Material.post_materials is eager by default and would pull every post using the
+    ingredient, so it is switched back to lazy here.
+    """
+    return (
+        selectinload(Post.tags),
+        selectinload(Post.topics),
+        selectinload(Post.images),
+        selectinload(Post.steps),
+        selectinload(Post.post_materials)
+            .joinedload(PostMaterial.material)
+            .lazyload(Material.post_materials),
+        joinedload(Post.creator),
+        joinedload(Post.updater),
+        joinedload(Post.approver)
+    )
+
+def hydrate_posts(db: Session, post_ids: List[UUID]) -> List[Dict[str, Any]]:
+    """Second phase of a listing: load full posts for the given page of ids, keeping their order.
+
+    Returns PostOut-shaped dicts (see serialize_posts); FastAPI validates them against response_model.
+    """
+    if not post_ids:
+        return []
+
+    posts = db.query(Post)\
+        .options(*_post_hydration_options())\
+        .filter(Post.post_id.in_(post_ids))\
+        .all()
+
+    posts_by_id = {post.post_id: post for post in posts}
+    return serialize_posts([posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id])
+
+def _page_post_ids(id_query, skip: int, limit: int) -> List[UUID]:
+    """First phase of a listing: select only the post ids of the requested offset page"""
+    return [row.post_id for row in id_query.offset(skip).limit(limit).all()]
+
 def search_posts(db: Session, title: str, skip: int = 0, limit: int = 100):
     """Search posts by title using case-insensitive partial match with creator info"""
     try:
-        posts = db.query(Post)\
-            .options(
-                joinedload(Post.tags),
-                joinedload(Post.topics),
-                joinedload(Post.images),
-                joinedload(Post.steps),
-                joinedload(Post.post_materials).joinedload(PostMaterial.material),
-                joinedload(Post.creator),
-                joinedload(Post.updater),
-                joinedload(Post.approver)
-            )\
-            .filter(Post.title.ilike(f"%{title}%"))\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
-        
-        return [PostOut.from_db_model(post) for post in posts]
+        id_query = db.query(Post.post_id)\
+            .filter(Post.title.ilike(f"%{title}%"))
+
+        return hydrate_posts(db, _page_post_ids(id_query, skip, limit))
     except Exception as e:
         logger.error(f"Error in search_posts: {str(e)}", exc_info=True)
         raise
@@ -157,6 +219,9 @@ def create_post(db: Session, post_data: PostCreate) -> PostOut:
         if post_data.status == PostStatusEnum.approved:
             post.approved_by = post_data.created_by
 
+        db.flush()
+        refresh_post_search_document(db, post)
+
         db.commit()
         # Debug: Query lại post_materials trực tiếp
         pm_list = db.query(PostMaterial).filter(PostMaterial.post_id == post.post_id).all()
@@ -168,110 +233,73 @@ def create_post(db: Session, post_data: PostCreate) -> PostOut:
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
-def get_approved_posts(db: Session, skip: int = 0, limit: int = 100) -> List[PostOut]:
+def get_approved_posts(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
     """Get all approved posts with eager loading of relationships including creator"""
     try:
-        posts = db.query(Post)\
-            .options(
-                joinedload(Post.tags),
-                joinedload(Post.topics),
-                joinedload(Post.images),
-                joinedload(Post.steps),
-                joinedload(Post.post_materials).joinedload(PostMaterial.material),
-                joinedload(Post.creator),
-                joinedload(Post.updater),
-                joinedload(Post.approver)
-            )\
+        id_query = db.query(Post.post_id)\
             .filter(Post.status == PostStatusEnum.approved)\
-            .order_by(Post.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+            .order_by(Post.created_at.desc())
 
-        return [PostOut.from_db_model(post) for post in posts]
+        return hydrate_posts(db, _page_post_ids(id_query, skip, limit))
 
     except Exception as e:
         logger.error(f"Error in get_approved_posts: {str(e)}", exc_info=True)
         raise
+def get_approved_posts_by_cursor(db: Session, cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+    """Get approved posts using keyset pagination on (created_at, post_id)"""
+    try:
+        id_query = db.query(Post.post_id, Post.created_at)\
+            .filter(Post.status == PostStatusEnum.approved)
+
+        return _paginate_posts_by_cursor(db, id_query, cursor, limit)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_approved_posts_by_cursor: {str(e)}", exc_info=True)
+        raise
 def search_posts_by_topic_name(db: Session, topic_name: str, skip: int = 0, limit: int = 100):
     """Search posts by topic name with eager loading including creator"""
-    posts = db.query(Post)\
-        .options(
-            joinedload(Post.tags),
-            joinedload(Post.topics),
-            joinedload(Post.images),
-            joinedload(Post.steps),
-            joinedload(Post.post_materials).joinedload(PostMaterial.material),
-            joinedload(Post.creator),
-            joinedload(Post.updater),
-            joinedload(Post.approver)
-        )\
-        .join(Post.topics)\
-        .filter(Topic.name.ilike(f"%{topic_name}%"))\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-    
-    return [PostOut.from_db_model(post) for post in posts]
+    id_query = db.query(Post.post_id)\
+        .filter(Post.topics.any(Topic.name.ilike(f"%{topic_name}%")))
+
+    return hydrate_posts(db, _page_post_ids(id_query, skip, limit))
 def search_posts_by_tag_name(db: Session, tag_name: str, skip: int = 0, limit: int = 100):
     """Search posts by tag name with eager loading including creator"""
-    posts = db.query(Post)\
-        .options(
-            joinedload(Post.tags),
-            joinedload(Post.topics),
-            joinedload(Post.images),
-            joinedload(Post.steps),
-            joinedload(Post.post_materials).joinedload(PostMaterial.material),
-            joinedload(Post.creator),
-            joinedload(Post.updater),
-            joinedload(Post.approver)
-        )\
-        .join(Post.tags)\
-        .filter(Tag.name.ilike(f"%{tag_name}%"))\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-    
-    return [PostOut.from_db_model(post) for post in posts]
+    id_query = db.query(Post.post_id)\
+        .filter(Post.tags.any(Tag.name.ilike(f"%{tag_name}%")))
+
+    return hydrate_posts(db, _page_post_ids(id_query, skip, limit))
 def get_all_posts(db: Session, skip: int = 0, limit: int = 100):
     """Get all posts for admin/moderator with creator info"""
     try:
-        posts = db.query(Post)\
-            .options(
-                joinedload(Post.tags),
-                joinedload(Post.topics),
-                joinedload(Post.images),
-                joinedload(Post.steps),
-                joinedload(Post.post_materials).joinedload(PostMaterial.material),
-                joinedload(Post.creator),
-                joinedload(Post.updater),
-                joinedload(Post.approver)
-            )\
-            .order_by(Post.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
-
-        return [PostOut.from_db_model(post) for post in posts]
+        id_query = db.query(Post.post_id)\
+            .order_by(Post.created_at.desc())
+
+        return hydrate_posts(db, _page_post_ids(id_query, skip, limit))
 
     except Exception as e:
         logger.error(f"Error in get_all_posts: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def get_all_posts_by_cursor(db: Session, cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+    """Get all posts for admin/moderator using keyset pagination on (created_at, post_id)"""
+    try:
+        id_query = db.query(Post.post_id, Post.created_at)
+
+        return _paginate_posts_by_cursor(db, id_query, cursor, limit)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_all_posts_by_cursor: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 def get_post_by_id(db: Session, post_id: UUID) -> PostOut:
     """Get a single post by ID with all relationships including creator"""
     try:
         post = db.query(Post)\
-            .options(
-                joinedload(Post.tags),
-                joinedload(Post.topics),
-                joinedload(Post.images),
-                joinedload(Post.steps),
-                joinedload(Post.post_materials).joinedload(PostMaterial.material),
-                joinedload(Post.creator),
-                joinedload(Post.updater),
-                joinedload(Post.approver)
-            )\
+            .options(*_post_hydration_options())\
             .filter(Post.post_id == post_id)\
             .first()
 
@@ -286,32 +314,32 @@ def get_post_by_id(db: Session, post_id: UUID) -> PostOut:
         logger.error(f"Error in get_post_by_id: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
-def get_my_posts(db: Session, user_id: UUID, skip: int = 0, limit: int = 100) -> list[PostOut]:
+def get_my_posts(db: Session, user_id: UUID, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
     """Get user's posts with creator info"""
     try:
-        posts = db.query(Post)\
-            .options(
-                joinedload(Post.tags),
-                joinedload(Post.topics),
-                joinedload(Post.images),
-                joinedload(Post.steps),
-                joinedload(Post.post_materials).joinedload(PostMaterial.material),
-                joinedload(Post.creator),
-                joinedload(Post.updater),
-                joinedload(Post.approver)
-            )\
+        id_query = db.query(Post.post_id)\
             .filter(Post.created_by == user_id)\
-            .order_by(Post.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+            .order_by(Post.created_at.desc())
 
-        # Convert to Pydantic models explicitly
-        return [PostOut.from_db_model(post) for post in posts]
+        return hydrate_posts(db, _page_post_ids(id_query, skip, limit))
 
     except Exception as e:
         logger.error(f"Error in get_my_posts: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
+
+def get_my_posts_by_cursor(db: Session, user_id: UUID, cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+    """Get user's posts using keyset pagination on (created_at, post_id)"""
+    try:
+        id_query = db.query(Post.post_id, Post.created_at)\
+            .filter(Post.created_by == user_id)
+
+        return _paginate_posts_by_cursor(db, id_query, cursor, limit)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_my_posts_by_cursor: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
 def update_post(db: Session, post_id: UUID, post_data: PostUpdate) -> PostOut:
     # Get the actual DB model, not the Pydantic model
     existing_post = db.query(Post)\
@@ -436,6 +464,9 @@ def update_post(db: Session, post_id: UUID, post_data: PostUpdate) -> PostOut:
 
         # Update the updated_at timestamp
         existing_post.updated_at = datetime.now(timezone.utc)
+
+        db.flush()
+        refresh_post_search_document(db, existing_post)
         
         db.commit()
         
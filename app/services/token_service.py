@@ -1,10 +1,11 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import List, Optional
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 from app.core.settings import settings
-from app.db.models.token import Token
+from app.db.models.token import Token, token_hash_for
 from app.db.models.account import Account
+from app.core.token_revocation import token_revocation_list
 import uuid
 
 class TokenService:
@@ -47,7 +48,8 @@ class TokenService:
         """
         to_encode = data.copy()
         expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-        to_encode.update({"exp": expire})
+        # jti: a rotated refresh token never equals the one it replaces, even within the same second
+        to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
         encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
         return encoded_jwt
 
@@ -86,12 +88,20 @@ class TokenService:
         # Calculate expiration time for the database record
         # This should align with the JWT's 'exp' claim for the access_token
         expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        if refresh_token:
+            # The row is also the refresh token's session: keep it (and the sweeper off it) until the
+            # refresh token expires. The access token's own exp claim still bounds its lifetime.
+            expires_at = max(
+                expires_at, datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+            )
 
         # Deactivate all existing active tokens for this account to enforce single active session
-        db.query(Token).filter(
+        active = db.query(Token).filter(
             Token.account_id == account.account_id,
             Token.is_active == True
-        ).update({"is_active": False}, synchronize_session=False) # Use synchronize_session=False for bulk updates
+        )
+        revoked = [token_hash for token_hash, in active.with_entities(Token.token_hash).all()]
+        active.update({"is_active": False}, synchronize_session=False) # Use synchronize_session=False for bulk updates
 
         # Create new token record
         token_record = Token(
@@ -105,6 +115,7 @@ class TokenService:
         db.add(token_record)
         db.commit()
         db.refresh(token_record)
+        token_revocation_list.revoke(revoked)
         return token_record
 
     @staticmethod
@@ -120,8 +131,33 @@ class TokenService:
             Optional[Token]: The active token record if found, otherwise None.
         """
         return db.query(Token).filter(
-            Token.access_token == access_token,
+            Token.token_hash == token_hash_for(access_token),
+            Token.is_active == True,
+            Token.expires_at > datetime.now(timezone.utc)
+        ).first()
+
+    @staticmethod
+    def get_active_refresh_session(db: Session, account_id: uuid.UUID, refresh_token: str) -> Optional[Token]:
+        """
+        Retrieves the active session record a refresh token was issued with.
+
+        Logging out, logging in again, a password reset or a ban deactivates the record, so a
+        refresh token is only honoured while its session is still the account's active one.
+
+        Args:
+            db (Session): The database session.
+            account_id (uuid.UUID): The account the refresh token was issued to.
+            refresh_token (str): The refresh token string.
+
+        Returns:
+            Optional[Token]: The active token record if found, otherwise None.
+        """
+        # Served by ix_token_account_id_is_active: an account has at most one active session
+        return db.query(Token).filter(
+            Token.account_id == account_id,
             Token.is_active == True,
+            Token.token_type == "access",
+            Token.refresh_token == refresh_token,
             Token.expires_at > datetime.now(timezone.utc)
         ).first()
 
@@ -134,11 +170,14 @@ class TokenService:
             db (Session): The database session.
             token_id (uuid.UUID): The UUID of the token record to deactivate.
         """
-        db.query(Token).filter(Token.token_id == token_id).update(
-            {"is_active": False, "revoked_at": datetime.now(timezone.utc)},
+        token = db.query(Token).filter(Token.token_id == token_id)
+        revoked = [token_hash for token_hash, in token.with_entities(Token.token_hash).all()]
+        token.update(
+            {"is_active": False},
             synchronize_session=False # Use synchronize_session=False for bulk updates
         )
         db.commit()
+        token_revocation_list.revoke(revoked)
 
     @staticmethod
     def create_reset_password_token_record(db: Session, account: Account, reset_token: str, expires_at: datetime) -> Token:
@@ -195,18 +234,52 @@ class TokenService:
         
         return expired_count
 
+    @staticmethod
+    def purge_tokens(db: Session, batch_size: int = settings.TOKEN_SWEEP_BATCH_SIZE) -> int:
+        """
+        Deletes expired and deactivated token rows in batches of `batch_size`, committing
+        after each batch so the sweep never holds long locks. Run by the scheduled sweeper.
+
+        Args:
+            db (Session): The database session.
+            batch_size (int): Rows deleted per statement.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        now = datetime.now(timezone.utc)
+        deleted = 0
+        # One pass per condition, each served by its own index
+        for condition in (Token.expires_at < now, Token.is_active == False):
+            while True:
+                batch = [token_id for token_id, in db.query(Token.token_id).filter(condition).limit(batch_size).all()]
+                if batch:
+                    db.query(Token).filter(Token.token_id.in_(batch)).delete(synchronize_session=False)
+                    db.commit()
+                    deleted += len(batch)
+                if len(batch) < batch_size:
+                    break
+        return deleted
+
     # BONUS: Method để revoke tất cả tokens của user (dùng khi ban user)
     @staticmethod  
-    def revoke_all_user_tokens(db: Session, account_id: uuid.UUID):
+    def revoke_all_user_tokens(db: Session, account_id: uuid.UUID, token_types: Optional[List[str]] = None):
         """
         Revoke tất cả tokens của user (dùng khi ban account)
+        token_types: chỉ revoke các loại này (vd. ["access", "refresh"] khi reset password)
+        Commits the session, so pending changes of the caller are saved with it
         """
-        revoked_count = db.query(Token).filter(
+        active = db.query(Token).filter(
             Token.account_id == account_id,
             Token.is_active == True
-        ).update({"is_active": False}, synchronize_session=False)
+        )
+        if token_types is not None:
+            active = active.filter(Token.token_type.in_(token_types))
+        revoked = [token_hash for token_hash, in active.with_entities(Token.token_hash).all()]
+        revoked_count = active.update({"is_active": False}, synchronize_session=False)
         
         db.commit()
+        token_revocation_list.revoke(revoked)
         
         print(f"🚫 Revoked {revoked_count} tokens for user {account_id}")
         return revoked_count
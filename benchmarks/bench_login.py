@@ -0,0 +1,87 @@
+"""Login throughput benchmark: bcrypt on the event loop vs on the password hashing pool.
+
+Run from the project root (needs the usual .env, like the app itself):
+    python -m benchmarks.bench_login [logins] [concurrency]
+
+Fires `logins` password checks at BCRYPT_ROUNDS, `concurrency` at a time, from one event
+loop, the way login_for_access_token calls them, while a heartbeat task ticks every 10 ms.
+"inline" is the previous login path (pwd_context.verify in the handler); "pool" awaits
+verify_and_update_password_async (PASSWORD_HASH_WORKERS threads). The heartbeat's worst
+delay is how long every other request and WebSocket on the worker stood still. Also checks
+that a hash made at a lower cost factor is upgraded on login and a current one is not;
+exits with status 1 when that check fails.
+"""
+from typing import Awaitable, Callable
+import asyncio
+import sys
+import time
+
+from passlib.context import CryptContext
+
+from app.core.security import pwd_context, verify_and_update_password_async
+from app.core.settings import settings
+
+PASSWORD = "correct horse battery staple"
+TICK = 0.01
+
+
+async def _run(check: Callable[[], Awaitable[bool]], logins: int, concurrency: int):
+    stalls = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            stalls.append(time.perf_counter() - started - TICK)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            assert await check()
+
+    ticker = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticker
+    return elapsed, max(stalls, default=0.0)
+
+
+def _check_rehash() -> bool:
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=settings.BCRYPT_ROUNDS - 1).hash(PASSWORD)
+    verified, new_hash = asyncio.run(verify_and_update_password_async(PASSWORD, old_hash))
+    upgraded = verified and new_hash is not None and not pwd_context.needs_update(new_hash)
+    verified, unchanged = asyncio.run(verify_and_update_password_async(PASSWORD, new_hash or old_hash))
+    print(f"rehash on login: older cost factor upgraded={upgraded}, current hash left alone={verified and unchanged is None}")
+    return upgraded and verified and unchanged is None
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    stored_hash = pwd_context.hash(PASSWORD)
+
+    async def inline() -> bool:
+        return pwd_context.verify(PASSWORD, stored_hash)
+
+    async def pool() -> bool:
+        verified, _ = await verify_and_update_password_async(PASSWORD, stored_hash)
+        return verified
+
+    print(
+        f"logins={logins} concurrency={concurrency} "
+        f"BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS} PASSWORD_HASH_WORKERS={settings.PASSWORD_HASH_WORKERS}"
+    )
+    for name, check in {"inline": inline, "pool": pool}.items():
+        elapsed, worst_stall = asyncio.run(_run(check, logins, concurrency))
+        print(f"{name:<8} {logins / elapsed:8.1f} logins/s  worst event loop stall {worst_stall * 1000:8.1f} ms")
+
+    if not _check_rehash():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
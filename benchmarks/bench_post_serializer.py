@@ -0,0 +1,94 @@
+"""Micro-benchmark: PostOut.from_db_model (validating) vs serialize_posts (bulk dicts).
+
+Run from the project root:
+    python -m benchmarks.bench_post_serializer [page_size] [rounds]
+
+Posts are plain attribute objects shaped like the ORM rows, so no database is needed.
+Each "response" case also runs the validate + JSON dump step FastAPI applies to the
+return value, since that is the cost a request actually pays.
+"""
+import sys
+import timeit
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.db.models.post import PostStatusEnum
+from app.schemas.post import PostOut, serialize_posts
+
+
+def _account(i):
+    return SimpleNamespace(account_id=uuid.uuid4(), username=f"user{i}", full_name=f"User {i}", avatar=None)
+
+
+def _fake_post(i):
+    now = datetime.now(timezone.utc)
+    creator = _account(i)
+    return SimpleNamespace(
+        post_id=uuid.uuid4(),
+        title=f"Post {i}",
+        content="Lorem ipsum " * 40,
+        status=PostStatusEnum.approved,
+        rejection_reason=None,
+        created_at=now,
+        updated_at=now,
+        created_by=creator.account_id,
+        updated_by=creator.account_id,
+        approved_by=None,
+        creator=creator,
+        updater=creator,
+        approver=None,
+        tags=[
+            SimpleNamespace(tag_id=uuid.uuid4(), name=f"tag{t}", status="active", created_at=now,
+                            updated_at=now, created_by=None, updated_by=None)
+            for t in range(3)
+        ],
+        topics=[
+            SimpleNamespace(topic_id=uuid.uuid4(), name=f"topic{t}", status="active", created_at=now, updated_at=now)
+            for t in range(2)
+        ],
+        images=[
+            SimpleNamespace(image_id=uuid.uuid4(), image_url=f"https://img/{i}/{n}.jpg", created_at=now, updated_at=now)
+            for n in range(3)
+        ],
+        steps=[SimpleNamespace(step_id=uuid.uuid4(), order_number=n, content=f"Step {n}") for n in range(5, 0, -1)],
+        post_materials=[
+            SimpleNamespace(
+                material=SimpleNamespace(material_id=uuid.uuid4(), name=f"material{m}"),
+                unit="g",
+                quantity=100.0
+            )
+            for m in range(6)
+        ],
+    )
+
+
+def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    posts = [_fake_post(i) for i in range(page_size)]
+    response = TypeAdapter(List[PostOut])
+
+    validated = response.dump_json([PostOut.from_db_model(post) for post in posts])
+    bulk = response.dump_json(response.validate_python(serialize_posts(posts)))
+    assert validated == bulk, "serialize_posts output differs from PostOut.from_db_model"
+
+    cases = {
+        "from_db_model": lambda: [PostOut.from_db_model(post) for post in posts],
+        "serialize_posts": lambda: serialize_posts(posts),
+        "from_db_model response": lambda: response.dump_json(
+            response.validate_python([PostOut.from_db_model(post).model_dump() for post in posts])
+        ),
+        "serialize_posts response": lambda: response.dump_json(response.validate_python(serialize_posts(posts))),
+    }
+    print(f"page_size={page_size} rounds={rounds}")
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=rounds, repeat=3)) / rounds
+        print(f"{name:<26} {best * 1000:8.2f} ms/page  {page_size / best:10.0f} posts/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Load test: blocking DB calls inline in async WebSocket handlers vs on the DB thread pool.
+
+Run from the project root (needs the usual .env, like the app itself):
+    python -m benchmarks.bench_ws_db_latency [senders] [messages_per_sender] [db_ms] [interval_ms]
+
+Each simulated sender receives a message every interval_ms (staggered across senders) and
+awaits one handler for it; latency is measured from the message's arrival, so time spent
+waiting for a blocked event loop counts. Each handler makes one blocking database round
+trip of db_ms (time.sleep stands in for the driver waiting on the socket; the session is
+never asked to connect). "inline" calls it straight from the coroutine, as the handlers
+used to; "run_db" goes through app.db.database.run_db. A bystander task ticks every 5 ms
+to measure how long every other socket on the worker would be frozen.
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from app.db.database import db_executor, run_db
+
+TICK_SECONDS = 0.005
+
+
+def _db_round_trip(db, seconds: float):
+    time.sleep(seconds)
+
+
+async def _inline(seconds: float):
+    _db_round_trip(None, seconds)
+
+
+async def _offloaded(seconds: float):
+    await run_db(_db_round_trip, seconds)
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _run(handler, senders: int, messages: int, seconds: float, interval: float):
+    latencies = []
+    lags = []
+    done = asyncio.Event()
+    origin = time.perf_counter()
+
+    async def sender(index: int):
+        offset = interval * index / senders
+        for message in range(messages):
+            arrival = origin + offset + message * interval
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            await handler(seconds)
+            latencies.append(time.perf_counter() - arrival)
+
+    async def bystander():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+    ticker = asyncio.create_task(bystander())
+    start = time.perf_counter()
+    await asyncio.gather(*(sender(index) for index in range(senders)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker
+    return latencies, lags, elapsed
+
+
+def main():
+    senders = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    db_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+    interval_ms = float(sys.argv[4]) if len(sys.argv) > 4 else 250.0
+    print(f"{senders} senders x {messages} messages every {interval_ms:.0f} ms, "
+          f"{db_ms:.0f} ms per DB round trip, {db_executor._max_workers} DB threads")
+
+    for name, handler in (("inline", _inline), ("run_db", _offloaded)):
+        latencies, lags, elapsed = asyncio.run(
+            _run(handler, senders, messages, db_ms / 1000, interval_ms / 1000)
+        )
+        print(
+            f"{name:>7}: send p50 {statistics.median(latencies) * 1000:8.1f} ms"
+            f"  p99 {_percentile(latencies, 99) * 1000:8.1f} ms"
+            f" | loop lag p99 {_percentile(lags, 99) * 1000:7.1f} ms  max {max(lags) * 1000:7.1f} ms"
+            f" | {senders * messages / elapsed:7.0f} msg/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Email outbox check: enqueue latency, connection reuse, retries and dead-lettering.
+
+Run from the project root (needs the usual .env, like the app itself):
+    python -m benchmarks.check_email_outbox [emails]
+
+Everything runs against a temporary SQLite database and the local SMTP stand-in
+(benchmarks.local_smtp), with a handshake delay to stand for a real relay's TCP + TLS setup.
+It compares the latency a request used to pay (connect and send inline) with what it pays
+now (add the job and commit), then checks that the workers deliver every job over at most
+one connection each, retry temporary failures with backoff, and dead-letter permanent
+rejections and jobs that run out of attempts. Exits with status 1 when a check fails.
+"""
+from pathlib import Path
+from statistics import median
+import asyncio
+import sys
+import tempfile
+import time
+
+import aiosmtplib
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.email_outbox import EmailOutbox, enqueue_email, outbox_stats
+from app.db.base_class import Base
+from app.db.models.email_job import EmailJob, EmailJobStatusEnum
+from benchmarks.local_smtp import LocalSMTPServer
+
+HANDSHAKE_DELAY = 0.05
+
+
+def _session_factory():
+    # A file, not ":memory:": the workers' sessions need connections of their own, like on Postgres
+    path = Path(tempfile.mkdtemp()) / "outbox.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[EmailJob.__table__])
+    return sessionmaker(bind=engine)
+
+
+def _outbox(session_factory, server: LocalSMTPServer, **options) -> EmailOutbox:
+    options.setdefault("workers", 2)
+    options.setdefault("poll_interval", 0.05)
+    options.setdefault("retry_base", 0.05)
+    options.setdefault("retry_max", 0.2)
+    return EmailOutbox(
+        session_factory=session_factory,
+        smtp_options={"hostname": server.host, "port": server.port, "start_tls": False, "timeout": 5},
+        sender="Food Forum <noreply@example.com>",
+        **options
+    )
+
+
+def _enqueue(session_factory, recipients, subject="Welcome") -> float:
+    """Queue one email per recipient, one request (transaction) each; returns the median latency"""
+    latencies = []
+    for recipient in recipients:
+        started = time.perf_counter()
+        with session_factory() as db:
+            enqueue_email(db, recipient, subject, "<p>hello</p>")
+            db.commit()
+        latencies.append(time.perf_counter() - started)
+    return median(latencies)
+
+
+async def _inline_send(server: LocalSMTPServer, count: int) -> float:
+    """What a request paid before: a fresh connection and an SMTP round trip per email"""
+    latencies = []
+    for index in range(count):
+        started = time.perf_counter()
+        await aiosmtplib.send(
+            f"From: noreply@example.com\r\nTo: inline{index}@example.com\r\nSubject: Welcome\r\n\r\nhello\r\n",
+            sender="noreply@example.com", recipients=[f"inline{index}@example.com"],
+            hostname=server.host, port=server.port, start_tls=False
+        )
+        latencies.append(time.perf_counter() - started)
+    return median(latencies)
+
+
+async def _until(predicate, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+
+
+async def _run(emails: int) -> list:
+    results = []
+
+    # 1. Request latency and connection reuse
+    server = await LocalSMTPServer(handshake_delay=HANDSHAKE_DELAY).start()
+    inline = await _inline_send(server, 5)
+    server.connections, server.messages = 0, []
+    sessions = _session_factory()
+    outbox = _outbox(sessions, server)
+    await outbox.start()
+    queued = await asyncio.get_running_loop().run_in_executor(
+        None, _enqueue, sessions, [f"user{index}@example.com" for index in range(emails)]
+    )
+    await _until(lambda: len(server.messages) >= emails)
+    await outbox.stop()
+    with sessions() as db:
+        stats = outbox_stats(db)
+    results.append((queued < inline, f"request latency: {inline * 1000:.1f} ms inline send -> {queued * 1000:.2f} ms enqueue"))
+    results.append((stats["sent"] == emails, f"delivery: {stats['sent']}/{emails} sent"))
+    results.append((
+        server.connections <= outbox.workers,
+        f"connection reuse: {server.connections} SMTP connection(s) for {emails} emails, {outbox.workers} workers"
+    ))
+    await server.stop()
+
+    # 2. Temporary failures are retried with backoff
+    server = await LocalSMTPServer(fail_first=2).start()
+    sessions = _session_factory()
+    outbox = _outbox(sessions, server, workers=1, max_attempts=5)
+    await outbox.start()
+    _enqueue(sessions, ["retry@example.com"])
+    await _until(lambda: len(server.messages) >= 1)
+    await outbox.stop()
+    with sessions() as db:
+        job = db.query(EmailJob).one()
+    results.append((
+        job.status == EmailJobStatusEnum.sent and job.attempts == 3,
+        f"retry: status {job.status.value} after {job.attempts} attempt(s) (2 temporary failures)"
+    ))
+    await server.stop()
+
+    # 3. Permanent rejections and exhausted attempts are dead-lettered
+    server = await LocalSMTPServer(fail_first=1000, reject=lambda address: address.startswith("bounce")).start()
+    sessions = _session_factory()
+    outbox = _outbox(sessions, server, workers=1, max_attempts=3)
+    await outbox.start()
+    _enqueue(sessions, ["bounce@example.com", "flaky@example.com"])
+
+    def all_dead():
+        with sessions() as db:
+            return outbox_stats(db)["dead"] == 2
+
+    await _until(all_dead)
+    await outbox.stop()
+    with sessions() as db:
+        jobs = {job.recipient: job for job in db.query(EmailJob).all()}
+    bounce, flaky = jobs["bounce@example.com"], jobs["flaky@example.com"]
+    results.append((
+        bounce.status == EmailJobStatusEnum.dead and bounce.attempts == 1,
+        f"permanent rejection: status {bounce.status.value} after {bounce.attempts} attempt(s) ({bounce.last_error})"
+    ))
+    results.append((
+        flaky.status == EmailJobStatusEnum.dead and flaky.attempts == 3,
+        f"out of attempts: status {flaky.status.value} after {flaky.attempts} attempt(s)"
+    ))
+    await server.stop()
+    return results
+
+
+def main():
+    emails = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    failures = 0
+    for ok, line in asyncio.run(_run(emails)):
+        failures += not ok
+        print(f"[{'ok' if ok else 'FAIL'}] {line}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
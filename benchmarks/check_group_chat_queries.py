@@ -0,0 +1,111 @@
+"""Query-count check: group chat listings must cost the same number of queries for 1 or N groups.
+
+Run from the project root (needs the usual .env, like the app itself):
+    python -m benchmarks.check_group_chat_queries [groups]
+
+The chat tables are created in an in-memory SQLite database and seeded twice, with one
+group and with `groups` groups (each with members and messages). Every listing function
+is run on both and its statements are counted; a count that grows with the number of
+groups is an N+1 regression. Exits with status 1 when that happens.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import sys
+import uuid
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base_class import Base
+from app.db.models.account import Account
+from app.db.models.role import Role
+from app.db.models.topic import Topic
+from app.db.models.group import Group
+from app.db.models.group_member import GroupMember, GroupMemberRoleEnum, GroupMemberStatusEnum
+from app.db.models.group_message import GroupMessage
+from app.services import group_chat_service
+
+TABLES = [Role, Account, Topic, Group, GroupMember, GroupMessage]
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL statements executed on `engine` inside the block"""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+
+def _seed(db, groups: int, members_per_group: int = 5, messages_per_group: int = 5) -> uuid.UUID:
+    """Seed `groups` chat groups (one topic each); returns an account that is a member of all of them"""
+    accounts = [
+        Account(account_id=uuid.uuid4(), username=f"user{index}", email=f"user{index}@example.com",
+                password_hash="x", full_name=f"User {index}")
+        for index in range(members_per_group)
+    ]
+    db.add_all(accounts)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for index in range(groups):
+        topic = Topic(topic_id=uuid.uuid4(), name=f"Topic {index}")
+        group = Group(
+            group_id=uuid.uuid4(), topic_id=topic.topic_id, name=f"Group {index}",
+            group_leader=accounts[0].account_id, created_by=accounts[0].account_id,
+            is_chat_group=True, created_at=start + timedelta(minutes=index)
+        )
+        db.add_all([topic, group])
+        for position, account in enumerate(accounts):
+            db.add(GroupMember(
+                group_id=group.group_id, account_id=account.account_id,
+                role=GroupMemberRoleEnum.leader if position == 0 else GroupMemberRoleEnum.member,
+                status=GroupMemberStatusEnum.active
+            ))
+        for number in range(messages_per_group):
+            db.add(GroupMessage(
+                group_id=group.group_id, sender_id=accounts[number % len(accounts)].account_id,
+                content=f"message {number}", created_at=start + timedelta(minutes=index, seconds=number)
+            ))
+    db.commit()
+    return accounts[0].account_id
+
+
+def _measure(groups: int) -> dict:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[model.__table__ for model in TABLES])
+    db = sessionmaker(bind=engine)()
+    user_id = _seed(db, groups)
+    cases = {
+        "get_all_group_chats": lambda: group_chat_service.get_all_group_chats(db, limit=max(groups, 1)),
+        "get_my_group_chats": lambda: group_chat_service.get_my_group_chats(db, user_id),
+        "get_topics_with_chat_groups": lambda: group_chat_service.get_topics_with_chat_groups(db),
+        "get_all_topics_with_group_chat": lambda: group_chat_service.get_all_topics_with_group_chat(db),
+    }
+    counts = {}
+    for name, run in cases.items():
+        db.expire_all()
+        with count_queries(engine) as statements:
+            run()
+        counts[name] = len(statements)
+    db.close()
+    return counts
+
+
+def main():
+    groups = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    single, many = _measure(1), _measure(groups)
+    failures = 0
+    for name in single:
+        ok = single[name] == many[name]
+        failures += not ok
+        print(f"[{'ok' if ok else 'FAIL'}] {name}: {single[name]} queries for 1 group, {many[name]} for {groups}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
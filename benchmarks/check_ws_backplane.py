@@ -0,0 +1,110 @@
+"""WebSocket backplane check: cross-node delivery through an in-process broker.
+
+Run from the project root (needs the usual .env, like the app itself):
+    python -m benchmarks.check_ws_backplane
+
+Starts two ConnectionManagers (nodes A and B) on one shared InMemoryBroker, connects fake
+sockets to them and checks that direct messages, group broadcasts and presence reach sockets
+on the other node, including a user who holds a socket on both nodes at once. Exits with
+status 1 when a check fails.
+"""
+from uuid import uuid4
+import asyncio
+import json
+import sys
+
+from app.core.websocket_backplane import InMemoryBackplane, InMemoryBroker
+from app.core.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    """Records the frames the writer task sends"""
+
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.frames.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        pass
+
+    def count(self, message_type: str) -> int:
+        return sum(1 for frame in self.frames if frame.get("type") == message_type)
+
+
+async def _settle():
+    # Let the writer and background publish tasks run
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _run() -> list:
+    results = []
+    broker = InMemoryBroker()
+    node_a = ConnectionManager(backplane=InMemoryBackplane(broker, node_id="a"))
+    node_b = ConnectionManager(backplane=InMemoryBackplane(broker, node_id="b"))
+    await node_a.start()
+    await node_b.start()
+
+    alice, bob, carol = uuid4(), uuid4(), uuid4()
+    group_id = uuid4()
+    alice_a, bob_b, carol_a, carol_b = FakeWebSocket(), FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await node_a.connect(alice_a, alice)
+    await node_b.connect(bob_b, bob)
+    # Carol holds a socket on each node
+    await node_a.connect(carol_a, carol)
+    await node_b.connect(carol_b, carol)
+    for node, user_id in ((node_a, alice), (node_b, bob), (node_a, carol), (node_b, carol)):
+        node.join_group(user_id, group_id)
+    # join_group announces membership from background tasks
+    await _settle()
+
+    # 1. Presence is shared
+    results.append((
+        node_a.is_user_online(bob) and node_b.is_user_online(alice),
+        "presence: each node sees the other node's users online"
+    ))
+    online = set(node_a.get_online_group_members(group_id))
+    results.append((online == {alice, bob, carol}, f"group presence: {len(online)}/3 members online seen from node A"))
+
+    # 2. A direct message reaches a user connected only to the other node
+    await node_a.send_personal_message({"type": "direct", "text": "hi bob"}, bob)
+    await _settle()
+    results.append((bob_b.count("direct") == 1, f"cross-node DM: node B socket got {bob_b.count('direct')} frame(s)"))
+
+    # 3. A user on both nodes gets the message on every socket
+    delivered = await node_a.send_personal_message({"type": "direct", "text": "hi carol"}, carol)
+    await _settle()
+    results.append((
+        delivered and carol_a.count("direct") == 1 and carol_b.count("direct") == 1,
+        f"same user on two nodes: node A socket got {carol_a.count('direct')}, node B socket got {carol_b.count('direct')}"
+    ))
+
+    # 4. A group broadcast reaches members on both nodes exactly once per socket
+    await node_a.broadcast_to_group({"type": "group", "text": "hello group"}, group_id, exclude_user=alice)
+    await _settle()
+    counts = [socket.count("group") for socket in (bob_b, carol_a, carol_b)]
+    results.append((
+        counts == [1, 1, 1] and alice_a.count("group") == 0,
+        f"group broadcast: {counts} frame(s) on bob@B, carol@A, carol@B; sender excluded"
+    ))
+
+    await node_a.stop()
+    await node_b.stop()
+    return results
+
+
+def main():
+    failures = 0
+    for ok, line in asyncio.run(_run()):
+        failures += not ok
+        print(f"[{'ok' if ok else 'FAIL'}] {line}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
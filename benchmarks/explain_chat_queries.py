@@ -0,0 +1,136 @@
+"""Plan check: the chat history / unread / mark-read queries must use their composite indexes.
+
+Run from the project root (needs the usual .env, like the app itself):
+    python -m benchmarks.explain_chat_queries [database_url]
+
+Without an argument the message tables are created in an in-memory SQLite database, seeded
+with a realistic shape (a few users, mostly read messages) and ANALYZEd so the planner has
+statistics to choose between indexes, then checked with EXPLAIN QUERY PLAN. With a PostgreSQL URL (an already migrated database) the
+same queries are checked with EXPLAIN, with sequential scans disabled so the answer does
+not depend on table size: the question is whether the index *can* serve the query, i.e.
+whether the partial-index predicates still match what the services filter on.
+Exits with status 1 when a query does not use its index.
+"""
+from datetime import datetime, timedelta, timezone
+import random
+import sys
+import uuid
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base_class import Base
+from app.db.models.message import Message
+from app.db.models.group_message import GroupMessage
+from app.services.message_service import _conversation_messages_query, _unread_messages_query
+from app.services.group_chat_service import _group_history_query
+
+
+def _seed(engine, users: int = 20, messages: int = 5000, groups: int = 10):
+    rng = random.Random(0)
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    group_ids = [uuid.uuid4() for _ in range(groups)]
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    message_rows, group_rows = [], []
+    for index in range(messages):
+        sender_id, receiver_id = rng.sample(user_ids, 2)
+        message_rows.append({
+            "message_id": uuid.uuid4(),
+            "sender_id": sender_id,
+            "receiver_id": receiver_id,
+            "content": "hi",
+            # Most of a mailbox has been read; unread messages are the recent tail
+            "status": "read" if index < messages * 0.95 else "sent",
+            "is_deleted": rng.random() < 0.02,
+            "created_at": start + timedelta(seconds=index)
+        })
+        group_rows.append({
+            "message_id": uuid.uuid4(),
+            "group_id": rng.choice(group_ids),
+            "sender_id": sender_id,
+            "content": "hi",
+            "is_deleted": rng.random() < 0.02,
+            "created_at": start + timedelta(seconds=index)
+        })
+    with engine.begin() as conn:
+        conn.execute(insert(Message), message_rows)
+        conn.execute(insert(GroupMessage), group_rows)
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _checks(db):
+    user_id, friend_id, group_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    return [
+        (
+            "chat history page",
+            "ix_message_conversation_key_created_at",
+            lambda: _conversation_messages_query(db, user_id, friend_id)
+            .order_by(Message.created_at.desc()).offset(50).limit(50).all()
+        ),
+        (
+            "chat history total",
+            "ix_message_conversation_key_created_at",
+            lambda: _conversation_messages_query(db, user_id, friend_id).count()
+        ),
+        (
+            "unread count",
+            "ix_message_unread_receiver_sender_created_at",
+            lambda: _unread_messages_query(db, user_id).count()
+        ),
+        (
+            "mark conversation read",
+            "ix_message_unread_receiver_sender_created_at",
+            lambda: _unread_messages_query(db, user_id).filter(
+                Message.sender_id == friend_id,
+                Message.created_at <= now
+            ).all()
+        ),
+        (
+            "group history page",
+            "ix_group_message_group_id_created_at",
+            lambda: _group_history_query(db, group_id)
+            .order_by(GroupMessage.created_at.asc()).offset(50).limit(50).all()
+        ),
+    ]
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "sqlite://"
+    engine = create_engine(url)
+    explain = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine, tables=[Message.__table__, GroupMessage.__table__])
+        _seed(engine)
+
+    db = sessionmaker(bind=engine)()
+    if engine.dialect.name == "postgresql":
+        db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+    plans = []
+
+    # Explain every statement on the same cursor, right before it runs for real
+    @event.listens_for(engine, "before_cursor_execute")
+    def _explain(conn, cursor, statement, parameters, context, executemany):
+        cursor.execute(explain + statement, parameters)
+        plans.append("\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall()))
+
+    failures = 0
+    try:
+        for name, index_name, run in _checks(db):
+            plans.clear()
+            run()
+            plan = plans[-1]
+            ok = index_name in plan
+            failures += not ok
+            print(f"[{'ok' if ok else 'FAIL'}] {name}: expected {index_name}")
+            print("    " + plan.replace("\n", "\n    "))
+    finally:
+        db.rollback()
+        db.close()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Local SMTP stand-in: accepts mail on localhost and keeps it in memory, no TLS, no AUTH.
+
+Run from the project root to catch the app's emails in development:
+    python -m benchmarks.local_smtp [port]
+
+then point the API at it with SMTP_HOST=localhost, SMTP_PORT=<port>, SMTP_TLS=false. Every
+received message is printed. The outbox check (benchmarks.check_email_outbox) embeds the
+same server and scripts failures through its knobs: a per-session handshake delay (a slow
+relay), temporary 451 replies for the first messages, and permanent 550 rejections.
+"""
+from email import message_from_bytes
+from email.message import Message
+from typing import Callable, List, Optional
+import asyncio
+import sys
+
+
+class LocalSMTPServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        handshake_delay: float = 0.0,
+        fail_first: int = 0,
+        reject: Optional[Callable[[str], bool]] = None,
+        on_message: Optional[Callable[[Message], None]] = None
+    ):
+        self.host = host
+        self.port = port
+        self.handshake_delay = handshake_delay  # seconds before the greeting, per connection
+        self.fail_first = fail_first  # answer DATA of the first N messages with 451
+        self.reject = reject  # recipients for which RCPT TO gets 550
+        self.on_message = on_message
+        self.messages: List[Message] = []
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> "LocalSMTPServer":
+        self._server = await asyncio.start_server(self._session, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await asyncio.sleep(self.handshake_delay)
+        await reply("220 localhost local SMTP stand-in")
+        recipients: List[str] = []
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode(errors="replace").rstrip("\r\n")
+                verb = line[:4].upper()
+                if verb == "EHLO":
+                    await reply("250-localhost")
+                    await reply("250 8BITMIME")
+                elif verb == "HELO":
+                    await reply("250 localhost")
+                elif verb == "MAIL":
+                    recipients = []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    address = line.split(":", 1)[1].strip().strip("<>")
+                    if self.reject and self.reject(address):
+                        await reply("550 Mailbox unavailable")
+                    else:
+                        recipients.append(address)
+                        await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = bytearray()
+                    while True:
+                        chunk = await reader.readline()
+                        if chunk in (b".\r\n", b".\n", b""):
+                            break
+                        data += chunk[1:] if chunk.startswith(b"..") else chunk
+                    if self.fail_first > 0:
+                        self.fail_first -= 1
+                        await reply("451 Try again later")
+                        continue
+                    message = message_from_bytes(bytes(data))
+                    self.messages.append(message)
+                    if self.on_message:
+                        self.on_message(message)
+                    await reply("250 Queued")
+                elif verb == "RSET":
+                    recipients = []
+                    await reply("250 OK")
+                elif verb == "NOOP":
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.CancelledError):
+            # Client went away, or the loop is shutting down with the session still open
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(port: int):
+    def show(message: Message):
+        print(f"--- {message['Subject']} -> {message['To']} ({message['Message-ID']})")
+
+    server = await LocalSMTPServer(port=port, on_message=show).start()
+    print(f"Local SMTP stand-in listening on {server.host}:{server.port}")
+    await asyncio.Event().wait()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 1025
+    try:
+        asyncio.run(_serve(port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()